@@ -0,0 +1,170 @@
+"""Offline benchmark of the mobile gateway.
+
+The auth and reservation services are replaced by httpx.MockTransport and the
+facility service by the in-process fake gRPC server, so only gateway work
+(routing, validation, indexes, serialisation, pooled client overhead) is measured.
+
+Usage: python benchmarks/bench_gateway.py [--concurrency 32] [--requests 2000] [--facilities 500]
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import logging
+import argparse
+import itertools
+import importlib.util
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from harness import amicro, micro, run_mix
+
+GATEWAY_DIR = Path(__file__).resolve().parent.parent / "mobile-gateway"
+# Roughly the size of Slovenia, as in bench_geo_index.py
+LAT_RANGE = (45.4, 46.9)
+LNG_RANGE = (13.4, 16.6)
+
+
+def load_gateway():
+    os.environ.setdefault("LOG_FILE", "")
+    if str(GATEWAY_DIR) not in sys.path:
+        sys.path.append(str(GATEWAY_DIR))
+    spec = importlib.util.spec_from_file_location("mobile_gateway", GATEWAY_DIR / "mobile-gateway.py")
+    gateway = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gateway)
+    return gateway
+
+
+def mock_upstreams(gateway, upstream_latency: float):
+    reservation_ids = itertools.count(1)
+
+    async def auth_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(upstream_latency)
+        if request.url.path == "/auth/login":
+            return httpx.Response(200, json={"token": "mock-token"})
+        return httpx.Response(200, json={"message": "ok"})
+
+    async def reservation_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(upstream_latency)
+        if request.method == "GET":
+            return httpx.Response(200, json=[])
+        body = json.loads(request.content or b"{}")
+        return httpx.Response(200, json={"id": next(reservation_ids), "status": "confirmed", **body})
+
+    gateway.auth_upstream._transport = httpx.MockTransport(auth_handler)
+    gateway.reservation_upstream._transport = httpx.MockTransport(reservation_handler)
+
+
+def build_mix(facility_ids: list):
+    today = datetime.now(timezone.utc).date()
+
+    def random_point(rng):
+        return rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)
+
+    async def login(client, rng):
+        response = await client.post("/mobile/auth/login", json={
+            "email": f"user{rng.randrange(1000)}@example.com", "password": "pw", "device_id": "bench"
+        })
+        return response.status_code
+
+    async def nearby(client, rng):
+        lat, lng = random_point(rng)
+        response = await client.get("/mobile/facilities/nearby", params={"lat": lat, "lng": lng, "radius": 10000})
+        return response.status_code
+
+    async def availability(client, rng):
+        date = (today + timedelta(days=rng.randrange(7))).isoformat()
+        response = await client.get(
+            f"/mobile/facilities/{rng.choice(facility_ids)}/availability", params={"date": date}
+        )
+        return response.status_code
+
+    async def available_window(client, rng):
+        day = datetime.combine(today + timedelta(days=rng.randrange(7)), datetime.min.time())
+        start = day + timedelta(hours=rng.randrange(8, 20))
+        response = await client.get("/mobile/facilities/available", params={
+            "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "end": (start + timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "duration_minutes": 60,
+        })
+        return response.status_code
+
+    async def reserve(client, rng):
+        response = await client.post("/mobile/reservations/quick-book", json={
+            "facility_id": rng.choice(facility_ids), "duration_minutes": 60, "user_email": "bench@example.com"
+        })
+        return response.status_code
+
+    return {
+        "login": (0.1, login),
+        "nearby": (0.35, nearby),
+        "availability": (0.25, availability),
+        "available_window": (0.1, available_window),
+        "reserve": (0.2, reserve),
+    }
+
+
+async def run(concurrency: int, requests: int, facilities: int, upstream_latency: float, micro_iterations: int) -> dict:
+    gateway = load_gateway()
+    from fake_facility_server import start_fake_facility_server
+
+    # Per-request access logs are part of the gateway's cost, but not of the report
+    logging.disable(logging.INFO)
+    server, port, service = await start_fake_facility_server()
+    service.seed(facilities)
+    gateway.facility_client.target = f"127.0.0.1:{port}"
+    mock_upstreams(gateway, upstream_latency)
+
+    rng = random.Random(7)
+    facility_ids = [f"facility_{i}" for i in range(facilities)]
+    results = {}
+    try:
+        async with gateway.lifespan(gateway.app):
+            for facility_id in facility_ids:
+                gateway.index_facility_location(
+                    facility_id, facility_id, "benchmark",
+                    {"lat": rng.uniform(*LAT_RANGE), "lng": rng.uniform(*LNG_RANGE)}
+                )
+            transport = httpx.ASGITransport(app=gateway.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                # The startup load runs in the background; wait for a full index before measuring
+                await gateway.refresh_availability()
+                results["mix"] = await run_mix(client, build_mix(facility_ids), concurrency, requests)
+
+                lat, lng = 46.05, 14.5
+                nearby_params = {"lat": lat, "lng": lng, "radius": 10000}
+                results["micro"] = {
+                    "geo_query": micro(lambda: gateway.facility_index.query(lat, lng, 10000, limit=20), micro_iterations),
+                    "handler_nearby": await amicro(
+                        lambda: client.get("/mobile/facilities/nearby", params=nearby_params), micro_iterations
+                    ),
+                    "handler_facility": await amicro(
+                        lambda: client.get(f"/mobile/facilities/{facility_ids[0]}"), micro_iterations
+                    ),
+                    "handler_health": await amicro(lambda: client.get("/mobile/health"), micro_iterations),
+                }
+    finally:
+        await server.stop(None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--facilities", type=int, default=500)
+    parser.add_argument("--upstream-latency-ms", type=float, default=5.0)
+    parser.add_argument("--micro-iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(
+        args.concurrency, args.requests, args.facilities, args.upstream_latency_ms / 1000, args.micro_iterations
+    ))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare GeoGridIndex radius queries against a linear scan.
+
+Usage: python benchmarks/bench_geo_index.py [--facilities 50000] [--radius 5000]
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "mobile-gateway"))
+
+from geo_index import GeoGridIndex
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--facilities", type=int, default=50000)
+    parser.add_argument("--radius", type=float, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--cell-deg", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # Roughly the size of Slovenia
+    index = GeoGridIndex(cell_deg=args.cell_deg)
+    start = time.perf_counter()
+    for i in range(args.facilities):
+        index.upsert(f"facility_{i}", rng.uniform(45.4, 46.9), rng.uniform(13.4, 16.6))
+    build = time.perf_counter() - start
+
+    queries = [(rng.uniform(45.4, 46.9), rng.uniform(13.4, 16.6)) for _ in range(args.queries)]
+    indexed = timed(lambda lat, lng: index.query(lat, lng, args.radius, limit=20), queries)
+    linear = timed(lambda lat, lng: index.linear_query(lat, lng, args.radius)[:20], queries[:50])
+
+    print(f"facilities={args.facilities} radius={args.radius:.0f}m build={build * 1000:.1f}ms")
+    print(f"grid index : {indexed * 1e6:9.1f} us/query")
+    print(f"linear scan: {linear * 1e6:9.1f} us/query")
+    print(f"speedup    : {linear / indexed:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Offline benchmark of the gateway's push notification pipeline.
+
+Notifications go through the real token store, queue and worker pool to the
+local stand-in provider, which costs a fixed latency per batch. The batched
+run uses the gateway defaults; the unbatched one sends every notification on
+its own, as a naive per-request send would.
+
+Usage: python benchmarks/bench_push.py [--requests 2000] [--provider-latency-ms 20]
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+from harness import micro
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "mobile-gateway"))
+from push import LocalPushProvider, PushDispatcher, PushTokenStore
+
+
+def build_store(users: int, seed: int = 7) -> PushTokenStore:
+    rng = random.Random(seed)
+    store = PushTokenStore()
+    for i in range(users):
+        for device in range(rng.choice((1, 1, 2))):
+            store.register(f"user{i}@bench", f"device{device}", f"token-{i}-{device}")
+    return store
+
+
+async def deliver(notifications: int, users: int, provider_latency: float, workers: int,
+                  batch_size: int, linger: float) -> dict:
+    store = build_store(users)
+    provider = LocalPushProvider(batch_latency=provider_latency)
+    dispatcher = PushDispatcher(store, provider, queue_size=notifications, workers=workers,
+                                batch_size=batch_size, linger=linger)
+    rng = random.Random(11)
+    await dispatcher.start()
+    start = time.perf_counter()
+    for i in range(notifications):
+        dispatcher.notify(f"user{rng.randrange(users)}@bench", "Reservation confirmed", f"#{i}")
+    await dispatcher.close(drain_timeout=600)
+    elapsed = time.perf_counter() - start
+    return {
+        "notifications": notifications,
+        "messages": provider.delivered,
+        "batches": provider.batches,
+        "coalesced": dispatcher.coalesced,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "ops_per_second": round(notifications / elapsed, 1),
+    }
+
+
+async def run(requests: int, users: int, provider_latency: float, micro_iterations: int) -> dict:
+    store = build_store(users)
+    dispatcher = PushDispatcher(store, LocalPushProvider(batch_latency=0), queue_size=micro_iterations + 10)
+    await dispatcher.start()
+    results = {"micro": {"enqueue": micro(lambda: dispatcher.notify("user0@bench", "t", "b"), micro_iterations)}}
+    await dispatcher.close()
+
+    results["delivery"] = {
+        "batched": await deliver(requests, users, provider_latency, workers=4, batch_size=500, linger=0.02),
+        "unbatched": await deliver(requests, users, provider_latency, workers=4, batch_size=1, linger=0),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000, help="notifications to deliver per run")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--provider-latency-ms", type=float, default=20.0)
+    parser.add_argument("--micro-iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.users, args.provider_latency_ms / 1000, args.micro_iterations))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
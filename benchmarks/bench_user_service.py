@@ -0,0 +1,123 @@
+"""Offline benchmark of the user service on a temporary SQLite database.
+
+Usage: python benchmarks/bench_user_service.py [--concurrency 16] [--requests 500] [--bcrypt-rounds 4]
+"""
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from harness import amicro, micro, run_mix
+
+USER_SERVICE_DIR = Path(__file__).resolve().parent.parent / "services" / "user"
+PASSWORD = "benchmark-password"
+
+
+def configure_environment(db_path: str, bcrypt_rounds: int):
+    """Must run before the app is imported: its config is read from the environment at import time."""
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["BCRYPT_ROUNDS"] = str(bcrypt_rounds)
+    os.environ["BCRYPT_CALIBRATE_ON_STARTUP"] = "false"
+    # Every simulated client shares one address; the throttle is not what we measure here
+    for name in ("LOGIN_EMAIL_BURST", "LOGIN_EMAIL_RATE", "LOGIN_IP_BURST", "LOGIN_IP_RATE"):
+        os.environ[name] = "1e9"
+    # Let requests queue for bcrypt workers instead of being shed with 503s
+    os.environ["HASH_QUEUE_SIZE"] = "100000"
+    os.environ.setdefault("LOG_FILE", "")
+    if str(USER_SERVICE_DIR) not in sys.path:
+        sys.path.append(str(USER_SERVICE_DIR))
+
+
+def build_mix(registered: list):
+    counter = {"next": 0}
+
+    async def register(client, rng):
+        counter["next"] += 1
+        email = f"bench-new-{counter['next']}@example.com"
+        response = await client.post("/users/register", json={
+            "email": email, "password": PASSWORD, "full_name": "Bench User"
+        })
+        if response.status_code == 200:
+            registered.append(email)
+        return response.status_code
+
+    async def login(client, rng):
+        response = await client.post("/users/login", json={"email": rng.choice(registered), "password": PASSWORD})
+        return response.status_code
+
+    async def failed_login(client, rng):
+        response = await client.post("/users/login", json={"email": rng.choice(registered), "password": "wrong"})
+        return response.status_code
+
+    return {
+        "register": (0.2, register),
+        "login": (0.7, login),
+        "failed_login": (0.1, failed_login),
+    }
+
+
+async def run(concurrency: int, requests: int, micro_iterations: int) -> dict:
+    from app.main import app, on_shutdown
+    from app.core.startup import run_startup
+    from app.core.auth import hash_password, verify_password, create_jwt, token_verifier
+
+    # Failed-login warnings are part of the mix; keep stdout for the JSON report
+    logging.disable(logging.WARNING)
+    # The app's startup hook only schedules this in the background; seeding needs the schema now
+    await run_startup()
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            registered = []
+            seed_emails = [f"bench-seed-{i}@example.com" for i in range(50)]
+            for email in seed_emails:
+                response = await client.post("/users/register", json={
+                    "email": email, "password": PASSWORD, "full_name": "Seed"
+                })
+                response.raise_for_status()
+                registered.append(email)
+
+            results["mix"] = await run_mix(client, build_mix(registered), concurrency, requests)
+
+            token = create_jwt({"sub": seed_emails[0]})
+            hashed = hash_password(PASSWORD)
+            headers = {"Authorization": f"Bearer {token}"}
+            login_body = {"email": seed_emails[0], "password": PASSWORD}
+            bcrypt_iterations = max(3, micro_iterations // 50)
+            results["micro"] = {
+                "hash_password": micro(lambda: hash_password(PASSWORD), bcrypt_iterations),
+                "verify_password": micro(lambda: verify_password(PASSWORD, hashed), bcrypt_iterations),
+                "create_jwt": micro(lambda: create_jwt({"sub": seed_emails[0]}), micro_iterations),
+                "verify_jwt_cached": micro(lambda: token_verifier.verify(token), micro_iterations),
+                "handler_me": await amicro(lambda: client.get("/users/me", headers=headers), micro_iterations),
+                "handler_login": await amicro(lambda: client.post("/users/login", json=login_body), bcrypt_iterations),
+                "handler_login_page": await amicro(lambda: client.get("/users/login"), micro_iterations),
+            }
+    finally:
+        await on_shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--micro-iterations", type=int, default=500)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="production uses 12; 4 keeps runs short")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(os.path.join(tmp, "bench.db"), args.bcrypt_rounds)
+        results = asyncio.run(run(args.concurrency, args.requests, args.micro_iterations))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Shared helpers for the offline benchmark suites: load mixes, micro-benchmarks, regression checks."""
+import math
+import time
+import random
+import asyncio
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+# name -> (weight, async fn(client, rng) -> status code)
+Mix = Dict[str, Tuple[float, Callable[..., Awaitable[int]]]]
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_samples))
+    return sorted_samples[min(len(sorted_samples), max(1, rank)) - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, statuses: Counter) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if count else 0.0,
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+    }
+
+
+async def run_mix(client, mix: Mix, concurrency: int, requests: int, seed: int = 42) -> dict:
+    """Drive `requests` weighted operations with `concurrency` workers; summary per operation and overall."""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name][0] for name in names]
+    plan = rng.choices(names, weights=weights, k=requests)
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    statuses: Dict[str, Counter] = {name: Counter() for name in names}
+    next_op = iter(plan)
+
+    async def worker(worker_id: int):
+        worker_rng = random.Random(seed * 1000 + worker_id)
+        for name in next_op:
+            start = time.perf_counter()
+            status = await mix[name][1](client, worker_rng)
+            samples[name].append(time.perf_counter() - start)
+            statuses[name][status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "concurrency": concurrency,
+        "overall": summarize(
+            [s for name in names for s in samples[name]], elapsed,
+            sum(statuses.values(), Counter())
+        ),
+    }
+    for name in names:
+        if samples[name]:
+            result[name] = summarize(samples[name], elapsed, statuses[name])
+    return result
+
+
+def _micro_summary(samples: List[float]) -> dict:
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "ops_per_second": round(len(samples) / total, 1) if total else 0.0,
+        "mean_us": round(total / len(samples) * 1e6, 2),
+        "p50_us": round(percentile(samples, 50) * 1e6, 2),
+        "p99_us": round(percentile(samples, 99) * 1e6, 2),
+    }
+
+
+def micro(fn: Callable[[], object], iterations: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return _micro_summary(samples)
+
+
+async def amicro(fn: Callable[[], Awaitable[object]], iterations: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return _micro_summary(samples)
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def find_regressions(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Latencies that grew, or throughputs that shrank, by more than `tolerance` (0.2 = 20%)."""
+    regressions = []
+    now = flatten(current)
+    for path, before in flatten(baseline).items():
+        after = now.get(path)
+        if after is None or not before:
+            continue
+        metric = path.rsplit(".", 1)[-1]
+        if metric.endswith(("_ms", "_us")) and not metric.startswith("max"):
+            if after > before * (1 + tolerance):
+                regressions.append(f"{path}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+        elif metric in ("throughput_rps", "ops_per_second"):
+            if after < before * (1 - tolerance):
+                regressions.append(f"{path}: {before} -> {after} ({(after / before - 1) * 100:.0f}%)")
+    return regressions
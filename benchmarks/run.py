@@ -0,0 +1,78 @@
+"""Run the offline benchmark suites and optionally fail on regression.
+
+Each suite runs in its own interpreter (both apps configure process-wide state
+at import time) and reports JSON; the combined report can be saved and used as
+the baseline of a later run.
+
+Usage:
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --baseline baseline.json --tolerance 0.25   # exit 1 on regression
+"""
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+from harness import find_regressions
+
+BENCH_DIR = Path(__file__).resolve().parent
+SUITES = {
+    "user_service": ["bench_user_service.py"],
+    "gateway": ["bench_gateway.py"],
+    "push": ["bench_push.py"],
+}
+QUICK_ARGS = ["--requests", "300", "--micro-iterations", "100"]
+
+
+def run_suite(name: str, quick: bool) -> dict:
+    command = [sys.executable, str(BENCH_DIR / SUITES[name][0])] + (QUICK_ARGS if quick else [])
+    completed = subprocess.run(command, cwd=BENCH_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(f"benchmark suite '{name}' failed")
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append", help="default: all suites")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--quick", action="store_true", help="fewer requests, for CI smoke runs")
+    args = parser.parse_args()
+
+    report = {name: run_suite(name, args.quick) for name in (args.suite or SUITES)}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    for name, results in report.items():
+        for section in ("mix", "micro"):
+            for op, summary in results.get(section, {}).items():
+                if not isinstance(summary, dict):
+                    continue
+                if "p99_ms" in summary:
+                    print(f"{name:12} {op:20} {summary['throughput_rps']:9.1f} req/s  "
+                          f"p50 {summary['p50_ms']:8.2f}ms  p95 {summary['p95_ms']:8.2f}ms  p99 {summary['p99_ms']:8.2f}ms")
+                else:
+                    print(f"{name:12} {op:20} {summary['ops_per_second']:9.1f} op/s   "
+                          f"mean {summary['mean_us']:9.1f}us  p99 {summary['p99_us']:9.1f}us")
+        for op, summary in results.get("delivery", {}).items():
+            print(f"{name:12} {op:20} {summary['ops_per_second']:9.1f} op/s   "
+                  f"{summary['batches']} batches  {summary['elapsed_ms']:.0f}ms total")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        baseline = {name: results for name, results in baseline.items() if name in report}
+        regressions = find_regressions(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
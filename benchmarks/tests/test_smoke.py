@@ -0,0 +1,18 @@
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_quick_benchmark_run_completes():
+    # The same smoke run CI can use: every suite must start, seed and report
+    env = dict(os.environ, LOG_FILE="")
+    completed = subprocess.run(
+        [sys.executable, str(BENCH_DIR / "run.py"), "--quick"],
+        cwd=BENCH_DIR, capture_output=True, text=True, timeout=600, env=env,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    for suite in ("user_service", "gateway", "push"):
+        assert suite in completed.stdout
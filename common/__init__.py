@@ -0,0 +1 @@
+"""Code shared by the Python services (user service and mobile gateway)."""
@@ -0,0 +1,185 @@
+"""Local HS256 JWT verification shared by the FastAPI apps.
+
+Verified tokens are remembered in a bounded LRU keyed by a digest of the
+token, so repeat requests skip signature checking until the token's `exp`.
+Logged-out tokens go into a revocation set fronted by a Bloom filter, so the
+common case (token not revoked) is answered without touching the exact set.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+import jwt
+from fastapi import Header, HTTPException
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests."""
+
+    def __init__(self, bits: int = 1 << 16, hashes: int = 4):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray(bits // 8)
+
+    def _positions(self, digest: bytes):
+        # Derive k positions from the digest (double hashing)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, digest: bytes):
+        for pos in self._positions(digest):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def clear(self):
+        self._array = bytearray(self.bits // 8)
+
+
+class RevocationSet:
+    """Revoked token digests, kept until the token would have expired anyway."""
+
+    def __init__(self, bloom_bits: int = 1 << 16):
+        self._bloom = BloomFilter(bloom_bits)
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def add(self, digest: bytes, expires_at: float):
+        with self._lock:
+            self._revoked[digest] = expires_at
+            self._bloom.add(digest)
+
+    def __contains__(self, digest: bytes) -> bool:
+        if digest not in self._bloom:
+            return False
+        expires_at = self._revoked.get(digest)
+        return expires_at is not None and expires_at > time.time()
+
+    def purge(self):
+        """Drop expired entries and rebuild the Bloom filter from what is left."""
+        now = time.time()
+        with self._lock:
+            self._revoked = {d: exp for d, exp in self._revoked.items() if exp > now}
+            self._bloom.clear()
+            for digest in self._revoked:
+                self._bloom.add(digest)
+
+
+class TokenVerifier:
+    def __init__(
+        self,
+        secret: str,
+        algorithms=("HS256",),
+        cache_size: int = 10000,
+        purge_interval: float = 300.0,
+    ):
+        self.secret = secret
+        self.algorithms = list(algorithms)
+        self.cache_size = cache_size
+        self.purge_interval = purge_interval
+        self._cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.revoked = RevocationSet()
+        self._next_purge = time.time() + purge_interval
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        try:
+            return jwt.decode(token, self.secret, algorithms=self.algorithms)
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e))
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Return the token's claims, or raise InvalidToken."""
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            self.revoked.purge()
+
+        digest = token_digest(token)
+        if digest in self.revoked:
+            self.rejected += 1
+            raise InvalidToken("Token has been revoked")
+
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                claims, expires_at = cached
+                if expires_at > now:
+                    self._cache.move_to_end(digest)
+                    self.hits += 1
+                    return claims
+                del self._cache[digest]
+
+        self.misses += 1
+        try:
+            claims = self._decode(token)
+        except InvalidToken:
+            self.rejected += 1
+            raise
+        expires_at = claims.get("exp")
+        if expires_at is not None:
+            with self._lock:
+                self._cache[digest] = (claims, float(expires_at))
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return claims
+
+    def revoke(self, token: str) -> Dict[str, Any]:
+        """Revoke a valid token (logout); returns its claims."""
+        claims = self.verify(token)
+        digest = token_digest(token)
+        expires_at = float(claims.get("exp", time.time() + 86400))
+        self.revoked.add(digest, expires_at)
+        with self._lock:
+            self._cache.pop(digest, None)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cache_size": len(self._cache),
+            "cache_capacity": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "revoked": len(self.revoked),
+        }
+
+
+def bearer_token(authorization: Optional[str]) -> str:
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Invalid authorization header", headers={"WWW-Authenticate": "Bearer"})
+    return token.strip()
+
+
+def auth_dependency(verifier: TokenVerifier):
+    """FastAPI dependency returning the verified claims of the request's bearer token."""
+
+    async def require_claims(authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
+        token = bearer_token(authorization)
+        try:
+            return verifier.verify(token)
+        except InvalidToken as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {e}", headers={"WWW-Authenticate": "Bearer"})
+
+    return require_claims
@@ -0,0 +1,156 @@
+"""Non-blocking structured logging shared by the Python services.
+
+Request threads and the event loop only put LogRecords on a bounded queue;
+a QueueListener thread formats them as JSON and does the actual I/O. When
+the queue is full, records are dropped and counted rather than blocking.
+"""
+import os
+import sys
+import json
+import queue
+import random
+import atexit
+import logging
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields become top-level keys."""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            # %-style args are only merged here, on the listener thread
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record and counts it."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.enqueued = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in-process, so the record can be passed as is and
+        # formatted lazily there (the stock handler formats on the caller)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLogSampler:
+    """Per-route sampling rates for the access log, by longest matching path prefix.
+
+    Configured as "default=1.0,/mobile/health=0.01,/static=0.1".
+    """
+
+    def __init__(self, spec: str = ""):
+        self.default = 1.0
+        self.rates: Dict[str, float] = {}
+        for part in spec.split(","):
+            prefix, _, rate = part.strip().partition("=")
+            if not rate:
+                continue
+            if prefix == "default":
+                self.default = float(rate)
+            else:
+                self.rates[prefix] = float(rate)
+        self._prefixes = sorted(self.rates, key=len, reverse=True)
+        self.sampled_out = 0
+
+    def rate_for(self, path: str) -> float:
+        for prefix in self._prefixes:
+            if path.startswith(prefix):
+                return self.rates[prefix]
+        return self.default
+
+    def should_log(self, path: str) -> bool:
+        rate = self.rate_for(path)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(
+    service: str,
+    log_file: Optional[str] = None,
+    level: int = logging.INFO,
+    queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    max_bytes: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backup_count: int = int(os.getenv("LOG_BACKUP_COUNT", "5")),
+) -> DroppingQueueHandler:
+    """Route the root logger through a bounded queue to stdout and an optional rotating file."""
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+
+    formatter = JsonFormatter(service)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _handler = DroppingQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(level)
+    return _handler
+
+
+def stop_logging():
+    """Flush what is queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, int]:
+    if _handler is None:
+        return {}
+    return {
+        "enqueued": _handler.enqueued,
+        "dropped": _handler.dropped,
+        "queue_depth": _handler.queue.qsize(),
+        "queue_size": _handler.queue.maxsize,
+    }
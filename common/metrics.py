@@ -0,0 +1,222 @@
+"""Minimal in-process metrics rendered in the Prometheus text format.
+
+Updates are plain dict and list operations on the event loop (no locks, no
+label objects), so instrumenting a request costs a few microseconds. Values
+that are cheap to read but expensive to track (pool sizes) are registered as
+callbacks and only evaluated when /metrics is scraped.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.responses import Response
+
+Labels = Tuple[str, ...]
+
+# Seconds; covers sub-millisecond cache hits up to multi-second bcrypt/timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 function: Optional[Callable[[], Dict[Labels, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Labels, float] = {}
+        # For totals a component already keeps (e.g. cache hit counts)
+        self.function = function
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        values = self.function() if self.function is not None else self.values
+        return [f"{self.name}{_label_str(self.labelnames, k)} {_number(v)}" for k, v in values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 function: Optional[Callable[[], Dict[Labels, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Labels, float] = {}
+        self.function = function
+
+    def set(self, value: float, labels: Labels = ()):
+        self.values[labels] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def samples(self) -> List[str]:
+        values = self.function() if self.function is not None else self.values
+        return [f"{self.name}{_label_str(self.labelnames, k)} {_number(v)}" for k, v in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]; cumulated at render time
+        self.series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.bounds) + 1) + [0.0]
+        series[bisect_left(self.bounds, value)] += 1
+        series[-1] += value
+
+    def time(self, labels: Labels = ()) -> "_Timer":
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), series):
+                cumulative += count
+                label_str = _label_str(self.labelnames + ("le",), labels + (_number(bound),))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _label_str(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        # Re-registering returns the existing metric, so modules can be re-imported
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                function: Optional[Callable[[], Dict[Labels, float]]] = None) -> Counter:
+        return self._register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              function: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.samples()
+            except Exception:
+                # A failing callback must not take the whole scrape down
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> Response:
+        return Response(self.render(), media_type=CONTENT_TYPE)
+
+
+# One registry per process, like prometheus_client's default REGISTRY
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by method, route and status code", ("method", "route", "status")
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route", ("method", "route")
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight requests.
+
+    Routes are labelled by their path template ("/mobile/facilities/{facility_id}"),
+    not the raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_seconds.observe(time.perf_counter() - start, (method, path))
+            http_requests.inc((method, path, str(status)))
@@ -0,0 +1,335 @@
+import os
+import sys
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from common.metrics import registry
+
+# Lower number = served first; "exempt" routes bypass admission entirely (probes, metrics)
+PRIORITY_CLASSES = {"critical": 0, "normal": 1, "low": 2}
+EXEMPT = "exempt"
+# Replies that mean the work behind this request is overloaded, not that the request was bad
+OVERLOAD_STATUS = frozenset((503, 504))
+
+admission_queue_seconds = registry.histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for a concurrency slot", ("priority",)
+)
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Requests shed by admission control", ("priority", "reason")
+)
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class GradientLimit:
+    """Concurrency limit steered by latency (in the style of Netflix's gradient2).
+
+    A slow EWMA of request latency is the baseline and a fast one the current
+    value. While current latency stays within `tolerance` of the baseline the
+    limit grows by about sqrt(limit) per sample; when it rises the limit shrinks
+    in proportion (never by more than half). Overload replies cut it by
+    `backoff`. Samples taken while less than half the limit is in use are
+    ignored, since they say nothing about capacity.
+    """
+
+    def __init__(self, initial: float = 20, min_limit: float = 4, max_limit: float = 1000,
+                 tolerance: float = 1.5, smoothing: float = 0.2, backoff: float = 0.9,
+                 short_window: int = 10, long_window: int = 600):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self.short_window = short_window
+        self.long_window = long_window
+        self.short_rtt: Optional[float] = None
+        self.long_rtt: Optional[float] = None
+
+    def on_sample(self, rtt: float, in_flight: int, overloaded: bool):
+        if overloaded:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            return
+        if self.short_rtt is None:
+            self.short_rtt = self.long_rtt = rtt
+        else:
+            self.short_rtt += (rtt - self.short_rtt) / self.short_window
+            self.long_rtt += (rtt - self.long_rtt) / self.long_window
+        # After a long overload the baseline has drifted up; let it come back down
+        if self.long_rtt > 2 * self.short_rtt:
+            self.long_rtt *= 0.95
+        if in_flight < self.limit / 2:
+            return
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = min(self.max_limit, max(self.min_limit, (1 - self.smoothing) * self.limit + self.smoothing * target))
+
+
+class PriorityRules:
+    """Route prefix -> priority class from a spec like "default=normal,/mobile/reservations=critical".
+
+    The longest matching prefix wins, as in the access log sampler.
+    """
+
+    def __init__(self, spec: str):
+        self.default = PRIORITY_CLASSES["normal"]
+        self.rules: List[Tuple[str, Optional[int]]] = []
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            prefix, _, name = part.partition("=")
+            name = name.strip()
+            if name != EXEMPT and name not in PRIORITY_CLASSES:
+                raise ValueError(f"Unknown priority class '{name}' in '{part}'")
+            priority = None if name == EXEMPT else PRIORITY_CLASSES[name]
+            if prefix.strip() == "default":
+                self.default = priority
+            else:
+                self.rules.append((prefix.strip(), priority))
+        self.rules.sort(key=lambda rule: len(rule[0]), reverse=True)
+
+    def priority_for(self, path: str) -> Optional[int]:
+        """Priority class for `path`, or None if it bypasses admission."""
+        for prefix, priority in self.rules:
+            if path.startswith(prefix):
+                return priority
+        return self.default
+
+
+class _Waiter:
+    __slots__ = ("future", "device", "priority", "enqueued")
+
+    def __init__(self, future: asyncio.Future, device: str, priority: int):
+        self.future = future
+        self.device = device
+        self.priority = priority
+        self.enqueued = time.monotonic()
+
+
+class AdmissionController:
+    """Admits up to `limit` concurrent requests; the rest wait or are shed.
+
+    Waiters are kept per priority class, and within a class per device, served
+    round-robin so one chatty device cannot starve the others. A device with
+    `max_queue_per_device` waiters gets 429; a full queue, a wait longer than
+    the class's `max_wait`, or an estimated wait beyond it gets 503. A full
+    queue first sheds the newest waiter of a lower class to make room.
+    """
+
+    def __init__(self, limit: GradientLimit, rules: PriorityRules, max_queue: int = 200,
+                 max_queue_per_device: int = 4, max_wait: Optional[Dict[int, float]] = None):
+        self.limit = limit
+        self.rules = rules
+        self.max_queue = max_queue
+        self.max_queue_per_device = max_queue_per_device
+        self.max_wait = max_wait or {0: 2.0, 1: 1.0, 2: 0.25}
+        self.in_flight = 0
+        self.queued = 0
+        self._queues: List["OrderedDict[str, deque]"] = [OrderedDict() for _ in PRIORITY_CLASSES]
+        self._per_device: Dict[str, int] = {}
+        self.admitted = 0
+
+    def _estimated_wait(self, ahead: int) -> float:
+        rtt = self.limit.short_rtt or 0.0
+        return ahead * rtt / max(1.0, self.limit.limit)
+
+    def _reject(self, priority: int, status_code: int, reason: str) -> Rejected:
+        admission_rejected.inc((_class_name(priority), reason))
+        return Rejected(status_code, reason, self._estimated_wait(self.queued + 1))
+
+    async def acquire(self, device: str, priority: int):
+        """Wait for a slot; raises Rejected if the request is shed."""
+        if self.in_flight < int(self.limit.limit) and self.queued == 0:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self._per_device.get(device, 0) >= self.max_queue_per_device:
+            raise self._reject(priority, 429, "device_queue_full")
+        ahead = sum(self._class_size(p) for p in range(priority + 1))
+        if self._estimated_wait(ahead) > self.max_wait[priority]:
+            raise self._reject(priority, 503, "estimated_wait")
+        if self.queued >= self.max_queue and not self._shed_lower(priority):
+            raise self._reject(priority, 503, "queue_full")
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), device, priority)
+        queue = self._queues[priority]
+        queue.setdefault(device, deque()).append(waiter)
+        self._per_device[device] = self._per_device.get(device, 0) + 1
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait[priority])
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._remove(waiter)
+                waiter.future.cancel()
+                raise self._reject(priority, 503, "queue_timeout") from None
+            waiter.future.result()  # granted (or shed) just as the wait ran out
+        except asyncio.CancelledError:
+            if waiter.future.done() and waiter.future.exception() is None:
+                self.release_slot()  # granted as the client went away
+            else:
+                self._remove(waiter)
+            raise
+        admission_queue_seconds.observe(time.monotonic() - waiter.enqueued, (_class_name(priority),))
+
+    def release(self, rtt: float, status: int):
+        """Return a slot and feed the request's latency to the limit."""
+        self.limit.on_sample(rtt, self.in_flight, status in OVERLOAD_STATUS)
+        self.release_slot()
+
+    def release_slot(self):
+        self.in_flight -= 1
+        while self.queued and self.in_flight < int(self.limit.limit):
+            waiter = self._pop_next()
+            self.in_flight += 1
+            self.admitted += 1
+            waiter.future.set_result(None)
+
+    def _class_size(self, priority: int) -> int:
+        return sum(len(waiters) for waiters in self._queues[priority].values())
+
+    def _pop_next(self) -> _Waiter:
+        for queue in self._queues:
+            if queue:
+                device, waiters = next(iter(queue.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    queue.move_to_end(device)  # round-robin: this device goes to the back
+                else:
+                    del queue[device]
+                self._forget(waiter)
+                return waiter
+        raise LookupError("no waiters")
+
+    def _shed_lower(self, priority: int) -> bool:
+        for lower in range(len(self._queues) - 1, priority, -1):
+            queue = self._queues[lower]
+            if queue:
+                device = next(reversed(queue))
+                waiter = queue[device].pop()
+                if not queue[device]:
+                    del queue[device]
+                self._forget(waiter)
+                waiter.future.set_exception(self._reject(lower, 503, "shed_for_priority"))
+                return True
+        return False
+
+    def _remove(self, waiter: _Waiter):
+        waiters = self._queues[waiter.priority].get(waiter.device)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self._queues[waiter.priority][waiter.device]
+        self._forget(waiter)
+
+    def _forget(self, waiter: _Waiter):
+        self.queued -= 1
+        count = self._per_device[waiter.device] - 1
+        if count:
+            self._per_device[waiter.device] = count
+        else:
+            del self._per_device[waiter.device]
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit.limit, 1),
+            "in_flight": self.in_flight,
+            "queued": {name: self._class_size(p) for name, p in PRIORITY_CLASSES.items()},
+            "queued_devices": len(self._per_device),
+            "admitted": self.admitted,
+            "short_rtt_ms": round(self.limit.short_rtt * 1000, 2) if self.limit.short_rtt else None,
+            "long_rtt_ms": round(self.limit.long_rtt * 1000, 2) if self.limit.long_rtt else None,
+        }
+
+    def register_metrics(self):
+        registry.gauge("admission_limit", "Current adaptive concurrency limit", function=lambda: {(): self.limit.limit})
+        registry.gauge("admission_in_flight", "Requests holding a concurrency slot", function=lambda: {(): self.in_flight})
+        registry.gauge(
+            "admission_queued", "Requests waiting for a slot", ("priority",),
+            function=lambda: {(name,): self._class_size(p) for name, p in PRIORITY_CLASSES.items()},
+        )
+
+
+def _class_name(priority: int) -> str:
+    for name, value in PRIORITY_CLASSES.items():
+        if value == priority:
+            return name
+    return str(priority)
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware putting every non-exempt request through the controller.
+
+    Devices are told apart by X-Device-Id, falling back to the first
+    X-Forwarded-For hop and then the peer address.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = self.controller.rules.priority_for(scope["path"])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        device = forwarded = None
+        for name, value in scope["headers"]:
+            if name == b"x-device-id":
+                device = value.decode("latin-1")
+                break
+            if name == b"x-forwarded-for":
+                forwarded = value.decode("latin-1").split(",")[0].strip()
+        if device is None:
+            client = scope.get("client")
+            device = forwarded or (client[0] if client else "unknown")
+
+        try:
+            await self.controller.acquire(device, priority)
+        except Rejected as e:
+            await _send_rejection(send, e)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.controller.release(time.perf_counter() - start, status)
+
+
+async def _send_rejection(send, rejection: Rejected):
+    detail = "Too many requests from this device" if rejection.status_code == 429 else "Server overloaded, please retry"
+    body = ('{"detail":"%s","reason":"%s"}' % (detail, rejection.reason)).encode()
+    await send({
+        "type": "http.response.start",
+        "status": rejection.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(rejection.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
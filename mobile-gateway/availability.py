@@ -0,0 +1,220 @@
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Set, Tuple, Iterable
+
+Interval = Tuple[int, int]
+DAY = 86400
+
+
+def parse_iso(value: str) -> int:
+    """ISO-8601 string -> epoch seconds; naive timestamps are taken as UTC."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def format_iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def day_bounds(date: str) -> Interval:
+    """'YYYY-MM-DD' -> [midnight, next midnight) in UTC epoch seconds."""
+    start = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+class FreeIntervals:
+    """Sorted, merged, non-overlapping free [start, end) intervals of one facility.
+
+    Starts and ends live in two parallel sorted lists so every lookup is a
+    bisect; adding merges with neighbours and removing splits an interval.
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends))
+
+    def add(self, start: int, end: int):
+        if end <= start:
+            return
+        # Every interval touching or overlapping [start, end) gets merged
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def remove(self, start: int, end: int):
+        if end <= start:
+            return
+        lo = bisect_right(self.ends, start)
+        hi = bisect_left(self.starts, end)
+        if lo >= hi:
+            return
+        keep_starts = []
+        keep_ends = []
+        if self.starts[lo] < start:
+            keep_starts.append(self.starts[lo])
+            keep_ends.append(start)
+        if self.ends[hi - 1] > end:
+            keep_starts.append(end)
+            keep_ends.append(self.ends[hi - 1])
+        self.starts[lo:hi] = keep_starts
+        self.ends[lo:hi] = keep_ends
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True if any part of [start, end) is free."""
+        i = bisect_right(self.ends, start)
+        return i < len(self.starts) and self.starts[i] < end
+
+    def covers(self, start: int, end: int) -> bool:
+        """True if [start, end) is entirely free."""
+        i = bisect_right(self.starts, start) - 1
+        return i >= 0 and self.ends[i] >= end
+
+    def between(self, start: int, end: int) -> List[Interval]:
+        """Free intervals clipped to [start, end)."""
+        result = []
+        i = bisect_right(self.ends, start)
+        while i < len(self.starts) and self.starts[i] < end:
+            result.append((max(self.starts[i], start), min(self.ends[i], end)))
+            i += 1
+        return result
+
+    def next_free(self, after: int, duration: int, before: Optional[int] = None) -> Optional[Interval]:
+        """Earliest [s, s + duration) that is free with s >= after (and ending by `before`)."""
+        i = bisect_right(self.ends, after)
+        while i < len(self.starts):
+            slot_start = max(self.starts[i], after)
+            slot_end = slot_start + duration
+            if before is not None and slot_end > before:
+                return None
+            if slot_end <= self.ends[i]:
+                return slot_start, slot_end
+            i += 1
+        return None
+
+
+def _days(start: int, end: int) -> range:
+    """UTC day numbers that [start, end) touches."""
+    return range(start // DAY, (end - 1) // DAY + 1)
+
+
+class AvailabilityEngine:
+    """Per-facility free-time index on epoch seconds, shared by the gateway routes.
+
+    Alongside the intervals, each UTC day maps to the facilities with some free
+    time on it, so window searches only look at facilities that can match.
+    """
+
+    def __init__(self):
+        self._facilities: Dict[str, FreeIntervals] = {}
+        self._by_day: Dict[int, Set[str]] = {}
+        # Epoch seconds of the last full load (see replace); None while partial
+        self.loaded_at: Optional[float] = None
+
+    def __contains__(self, facility_id: str) -> bool:
+        return facility_id in self._facilities
+
+    def __len__(self) -> int:
+        return len(self._facilities)
+
+    def _reindex(self, facility_id: str, start: int, end: int):
+        """Update the day index for the days [start, end) touches, after a change there."""
+        if end <= start:
+            return
+        free = self._facilities.get(facility_id)
+        for day in _days(start, end):
+            if free is not None and free.overlaps(day * DAY, (day + 1) * DAY):
+                self._by_day.setdefault(day, set()).add(facility_id)
+            else:
+                ids = self._by_day.get(day)
+                if ids is not None:
+                    ids.discard(facility_id)
+                    if not ids:
+                        del self._by_day[day]
+
+    def load(self, facility_id: str, available_times: Iterable[Tuple[str, str]],
+             reserved: Iterable[Interval] = ()):
+        """Replace a facility's free time with its (start, end) ISO-8601 pairs minus `reserved` intervals."""
+        self.forget(facility_id)
+        free = FreeIntervals((parse_iso(start), parse_iso(end)) for start, end in available_times)
+        for start, end in reserved:
+            free.remove(start, end)
+        self._facilities[facility_id] = free
+        for start, end in free:
+            self._reindex(facility_id, start, end)
+
+    def replace(self, other: "AvailabilityEngine"):
+        """Take over `other`'s contents, a full snapshot of every facility."""
+        self._facilities = other._facilities
+        self._by_day = other._by_day
+        self.loaded_at = time.time()
+
+    def forget(self, facility_id: str):
+        free = self._facilities.pop(facility_id, None)
+        if free is not None:
+            for start, end in free:
+                self._reindex(facility_id, start, end)
+
+    def add(self, facility_id: str, start: int, end: int):
+        self._facilities.setdefault(facility_id, FreeIntervals()).add(start, end)
+        self._reindex(facility_id, start, end)
+
+    def remove(self, facility_id: str, start: int, end: int):
+        free = self._facilities.get(facility_id)
+        if free is not None:
+            free.remove(start, end)
+            self._reindex(facility_id, start, end)
+
+    def reserve(self, facility_id: str, start: int, end: int) -> bool:
+        """Claim [start, end) if it is fully free; False if any part is taken."""
+        free = self._facilities.get(facility_id)
+        if free is None or not free.covers(start, end):
+            return False
+        free.remove(start, end)
+        self._reindex(facility_id, start, end)
+        return True
+
+    def release(self, facility_id: str, start: int, end: int):
+        self.add(facility_id, start, end)
+
+    def free_on(self, facility_id: str, date: str) -> List[Interval]:
+        free = self._facilities.get(facility_id)
+        if free is None:
+            return []
+        return free.between(*day_bounds(date))
+
+    def next_free(self, facility_id: str, after: int, duration: int) -> Optional[Interval]:
+        free = self._facilities.get(facility_id)
+        if free is None:
+            return None
+        return free.next_free(after, duration)
+
+    def facilities_free_in(self, start: int, end: int, duration: Optional[int] = None) -> Dict[str, Interval]:
+        """Facilities with `duration` seconds free inside [start, end) (the whole window by default)."""
+        duration = end - start if duration is None else duration
+        candidates: Set[str] = set()
+        if end > start:
+            for day in _days(start, end):
+                candidates.update(self._by_day.get(day, ()))
+        result = {}
+        for facility_id in candidates:
+            slot = self._facilities[facility_id].next_free(start, duration, before=end)
+            if slot is not None:
+                result[facility_id] = slot
+        return result
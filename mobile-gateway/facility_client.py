@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import itertools
+import logging
+from typing import Optional, List, Dict, Any
+
+import grpc
+
+logger = logging.getLogger("MobileGateway.facility")
+
+PROTO_DIR = os.path.dirname(os.path.abspath(__file__))
+if PROTO_DIR not in sys.path:
+    sys.path.append(PROTO_DIR)
+
+# Generated at import time from facility.proto (needs grpcio-tools), like the
+# web gateway does with @grpc/proto-loader.
+facility_pb2, facility_pb2_grpc = grpc.protos_and_services("facility.proto")
+
+# Repository root, for the shared `common` package
+REPO_ROOT = os.path.dirname(PROTO_DIR)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from common.metrics import registry
+
+grpc_request_seconds = registry.histogram(
+    "facility_grpc_duration_seconds", "Latency of facility gRPC calls", ("method", "code")
+)
+
+DEFAULT_TIMEOUT = float(os.getenv("FACILITY_GRPC_TIMEOUT", "2.0"))
+DEFAULT_CHANNELS = int(os.getenv("FACILITY_GRPC_CHANNELS", "1"))
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+def facility_to_dict(facility) -> Dict[str, Any]:
+    return {
+        "id": facility.id,
+        "name": facility.name,
+        "description": facility.description,
+        "availableTimes": [
+            {"start": t.start, "end": t.end} for t in facility.availableTimes
+        ],
+        "location": facility_location(facility),
+    }
+
+
+def facility_location(facility) -> Optional[Dict[str, float]]:
+    """{"lat", "lng"} of a Facility message, or None if it has no location"""
+    if not facility.HasField("location"):
+        return None
+    return {"lat": facility.location.lat, "lng": facility.location.lng}
+
+
+class FacilityClient:
+    """grpc.aio client for FacilityService over a small round-robin set of long-lived channels."""
+
+    def __init__(self, target: str, channels: int = DEFAULT_CHANNELS, default_timeout: float = DEFAULT_TIMEOUT):
+        self.target = target
+        self.channel_count = max(1, channels)
+        self.default_timeout = default_timeout
+        self._channels: List[grpc.aio.Channel] = []
+        self._stubs = []
+        self._next_stub = None
+
+    async def start(self):
+        if self._channels:
+            return
+        for _ in range(self.channel_count):
+            channel = grpc.aio.insecure_channel(self.target, options=CHANNEL_OPTIONS)
+            self._channels.append(channel)
+            self._stubs.append(facility_pb2_grpc.FacilityServiceStub(channel))
+        self._next_stub = itertools.cycle(self._stubs)
+        logger.info("Facility gRPC client started for %s (%s channel(s))", self.target, self.channel_count)
+
+    async def close(self):
+        for channel in self._channels:
+            await channel.close()
+        self._channels = []
+        self._stubs = []
+        self._next_stub = None
+        logger.info("Facility gRPC client closed")
+
+    @property
+    def stub(self):
+        if self._next_stub is None:
+            raise RuntimeError("Facility gRPC client is not started")
+        return next(self._next_stub)
+
+    def _timeout(self, timeout: Optional[float]) -> float:
+        return self.default_timeout if timeout is None else timeout
+
+    async def _call(self, method: str, request, timeout: float):
+        code = "OK"
+        start = time.perf_counter()
+        try:
+            return await getattr(self.stub, method)(request, timeout=timeout)
+        except grpc.aio.AioRpcError as e:
+            code = e.code().name
+            raise
+        finally:
+            grpc_request_seconds.observe(time.perf_counter() - start, (method, code))
+
+    async def get_facility(self, facility_id: str, timeout: Optional[float] = None):
+        return await self._call(
+            "GetFacility",
+            facility_pb2.GetFacilityRequest(id=facility_id),
+            timeout=self._timeout(timeout),
+        )
+
+    async def list_facilities(self, offset: int = 0, limit: int = 0, timeout: Optional[float] = None):
+        response = await self._call(
+            "ListFacilities",
+            facility_pb2.ListFacilitiesRequest(offset=offset, limit=limit),
+            timeout=self._timeout(timeout),
+        )
+        return list(response.facilities)
+
+    async def create_facility(self, name: str, description: str, location: Optional[Dict[str, float]] = None,
+                              timeout: Optional[float] = None):
+        request = facility_pb2.CreateFacilityRequest(name=name, description=description)
+        if location is not None:
+            request.location.CopyFrom(facility_pb2.Location(lat=location["lat"], lng=location["lng"]))
+        return await self._call("CreateFacility", request, timeout=self._timeout(timeout))
+
+    async def set_facility_location(self, facility_id: str, lat: float, lng: float, timeout: Optional[float] = None):
+        return await self._call(
+            "SetFacilityLocation",
+            facility_pb2.SetFacilityLocationRequest(id=facility_id, location=facility_pb2.Location(lat=lat, lng=lng)),
+            timeout=self._timeout(timeout),
+        )
+
+    async def delete_facility(self, facility_id: str, timeout: Optional[float] = None):
+        return await self._call(
+            "DeleteFacility",
+            facility_pb2.DeleteFacilityRequest(id=facility_id),
+            timeout=self._timeout(timeout),
+        )
+
+    async def add_available_time(self, facility_id: str, start: str, end: str, timeout: Optional[float] = None):
+        return await self._call(
+            "AddAvailableTime",
+            facility_pb2.AddAvailableTimeRequest(
+                facilityId=facility_id,
+                time=facility_pb2.AvailableTime(start=start, end=end),
+            ),
+            timeout=self._timeout(timeout),
+        )
+
+    async def remove_available_time(self, facility_id: str, start: str, end: str, timeout: Optional[float] = None):
+        return await self._call(
+            "RemoveAvailableTime",
+            facility_pb2.RemoveAvailableTimeRequest(facilityId=facility_id, start=start, end=end),
+            timeout=self._timeout(timeout),
+        )
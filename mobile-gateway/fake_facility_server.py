@@ -0,0 +1,141 @@
+"""In-process stand-in for the Node FacilityService, for local load tests.
+
+Run standalone with: python fake_facility_server.py --port 50051 --facilities 1000
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+import grpc
+
+from facility_client import facility_pb2, facility_pb2_grpc
+
+logger = logging.getLogger("MobileGateway.fake_facility")
+
+
+class FakeFacilityService(facility_pb2_grpc.FacilityServiceServicer):
+    """Dict-backed FacilityService with the same semantics as services/facility."""
+
+    def __init__(self, latency: float = 0.0):
+        self.facilities: Dict[str, facility_pb2.Facility] = {}
+        self.latency = latency
+        self.calls = 0
+
+    async def _tick(self):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def CreateFacility(self, request, context):
+        await self._tick()
+        facility = facility_pb2.Facility(
+            id=uuid.uuid4().hex[:24], name=request.name, description=request.description
+        )
+        if request.HasField("location"):
+            facility.location.CopyFrom(request.location)
+        self.facilities[facility.id] = facility
+        return facility
+
+    async def GetFacility(self, request, context):
+        await self._tick()
+        facility = self.facilities.get(request.id)
+        if facility is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Facility not found")
+        return facility
+
+    async def UpdateFacility(self, request, context):
+        await self._tick()
+        facility = self.facilities.get(request.id)
+        if facility is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Facility not found")
+        facility.name = request.name
+        facility.description = request.description
+        return facility
+
+    async def DeleteFacility(self, request, context):
+        await self._tick()
+        if self.facilities.pop(request.id, None) is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Facility not found")
+        return facility_pb2.DeleteResponse(success=True)
+
+    async def ListFacilities(self, request, context):
+        await self._tick()
+        ids = sorted(self.facilities)[request.offset:request.offset + (request.limit or 500)]
+        return facility_pb2.ListFacilitiesResponse(facilities=[self.facilities[i] for i in ids])
+
+    async def SetFacilityLocation(self, request, context):
+        await self._tick()
+        facility = self.facilities.get(request.id)
+        if facility is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Facility not found")
+        facility.location.CopyFrom(request.location)
+        return facility
+
+    async def AddAvailableTime(self, request, context):
+        await self._tick()
+        facility = self.facilities.get(request.facilityId)
+        if facility is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Facility not found")
+        facility.availableTimes.append(request.time)
+        return facility
+
+    async def RemoveAvailableTime(self, request, context):
+        await self._tick()
+        facility = self.facilities.get(request.facilityId)
+        if facility is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Facility not found")
+        kept = [t for t in facility.availableTimes if t.start != request.start or t.end != request.end]
+        del facility.availableTimes[:]
+        facility.availableTimes.extend(kept)
+        return facility
+
+    def seed(self, count: int, days: int = 7, start: Optional[datetime] = None):
+        """Populate with `count` facilities, each with hourly slots 08:00-22:00 for `days` days.
+
+        Facility i sits at lat 46.05, lng 14.5 + i / 1000 (about 77 m apart).
+        """
+        start = start or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        for i in range(count):
+            facility = facility_pb2.Facility(
+                id=f"facility_{i}", name=f"Facility {i}", description="Seeded test facility",
+                location=facility_pb2.Location(lat=46.05, lng=14.5 + i / 1000)
+            )
+            for day in range(days):
+                for hour in range(8, 22):
+                    slot_start = start + timedelta(days=day, hours=hour)
+                    facility.availableTimes.append(facility_pb2.AvailableTime(
+                        start=slot_start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        end=(slot_start + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    ))
+            self.facilities[facility.id] = facility
+
+
+async def start_fake_facility_server(service: Optional[FakeFacilityService] = None, port: int = 0):
+    """Start a grpc.aio server on localhost; returns (server, bound_port, service)."""
+    service = service or FakeFacilityService()
+    server = grpc.aio.server()
+    facility_pb2_grpc.add_FacilityServiceServicer_to_server(service, server)
+    bound_port = server.add_insecure_port(f"127.0.0.1:{port}")
+    await server.start()
+    logger.info("Fake FacilityService listening on 127.0.0.1:%s", bound_port)
+    return server, bound_port, service
+
+
+async def _serve(port: int, facilities: int, latency: float):
+    service = FakeFacilityService(latency=latency)
+    service.seed(facilities)
+    server, _, _ = await start_fake_facility_server(service, port)
+    await server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake FacilityService gRPC server")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--facilities", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial per-call latency in seconds")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve(args.port, args.facilities, args.latency))
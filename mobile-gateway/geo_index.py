@@ -0,0 +1,156 @@
+import math
+from typing import Dict, Tuple, List, Optional, Any, Set
+
+EARTH_RADIUS_M = 6371008.8
+# Same sphere as haversine_m, so the latitude band and cell range never cut off a match
+METERS_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGridIndex:
+    """In-memory equal-angle grid index over facility coordinates.
+
+    Points are bucketed into cells of `cell_deg` degrees. A radius query only
+    visits the cells overlapping the search circle's bounding box, and falls
+    back to a full scan when that box covers more cells than there are points.
+    """
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._lng_cells = int(math.ceil(360.0 / cell_deg))
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._points: Dict[str, Tuple[float, float, Tuple[int, int]]] = {}
+        self._data: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._points
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        row = int(math.floor((lat + 90.0) / self.cell_deg))
+        col = int(math.floor((lng + 180.0) / self.cell_deg)) % self._lng_cells
+        return row, col
+
+    def upsert(self, item_id: str, lat: float, lng: float, data: Any = None):
+        """Insert a point or move an existing one; `data` is returned with query results."""
+        if not -90.0 <= lat <= 90.0 or not -180.0 <= lng <= 180.0:
+            raise ValueError(f"Invalid coordinates: {lat}, {lng}")
+        cell = self._cell(lat, lng)
+        previous = self._points.get(item_id)
+        if previous is not None and previous[2] != cell:
+            self._discard_from_cell(item_id, previous[2])
+        self._cells.setdefault(cell, set()).add(item_id)
+        self._points[item_id] = (lat, lng, cell)
+        if data is not None or item_id not in self._data:
+            self._data[item_id] = data
+
+    def update_data(self, item_id: str, data: Any):
+        if item_id in self._points:
+            self._data[item_id] = data
+
+    def remove(self, item_id: str) -> bool:
+        previous = self._points.pop(item_id, None)
+        if previous is None:
+            return False
+        self._discard_from_cell(item_id, previous[2])
+        self._data.pop(item_id, None)
+        return True
+
+    def _discard_from_cell(self, item_id: str, cell: Tuple[int, int]):
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(item_id)
+            if not members:
+                del self._cells[cell]
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        point = self._points.get(item_id)
+        if point is None:
+            return None
+        return {"id": item_id, "lat": point[0], "lng": point[1], "data": self._data.get(item_id)}
+
+    def _candidate_ids(self, lat: float, lng: float, radius_m: float):
+        dlat = radius_m / METERS_PER_DEGREE_LAT
+        min_lat = max(-90.0, lat - dlat)
+        max_lat = min(90.0, lat + dlat)
+        # Widest longitude span of the circle is at the latitude closest to a pole
+        widest = max(abs(min_lat), abs(max_lat))
+        cos_lat = math.cos(math.radians(widest))
+        if cos_lat < 1e-9:
+            return self._points.keys()
+        dlng = radius_m / (METERS_PER_DEGREE_LAT * cos_lat)
+
+        row_lo, _ = self._cell(min_lat, 0.0)
+        row_hi, _ = self._cell(max_lat, 0.0)
+        if dlng >= 180.0:
+            col_span = self._lng_cells
+            col_lo = 0
+        else:
+            col_lo = int(math.floor((lng - dlng + 180.0) / self.cell_deg))
+            col_hi = int(math.floor((lng + dlng + 180.0) / self.cell_deg))
+            col_span = min(self._lng_cells, col_hi - col_lo + 1)
+
+        if (row_hi - row_lo + 1) * col_span > len(self._points):
+            return self._points.keys()
+
+        cells = self._cells
+        candidates: List[str] = []
+        for row in range(row_lo, row_hi + 1):
+            for offset in range(col_span):
+                members = cells.get((row, (col_lo + offset) % self._lng_cells))
+                if members:
+                    candidates.extend(members)
+        return candidates
+
+    def query(
+        self,
+        lat: float,
+        lng: float,
+        radius_m: float,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[int, List[Tuple[str, float]]]:
+        """Return (total matches, page of (id, distance_m)) sorted by distance."""
+        points = self._points
+        dlat = radius_m / METERS_PER_DEGREE_LAT
+        phi1 = math.radians(lat)
+        cos_phi1 = math.cos(phi1)
+        sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+        diameter = 2 * EARTH_RADIUS_M
+
+        matches = []
+        for item_id in self._candidate_ids(lat, lng, radius_m):
+            plat, plng, _ = points[item_id]
+            # Cheap latitude band check before the trigonometry
+            if abs(plat - lat) > dlat:
+                continue
+            phi2 = radians(plat)
+            a = sin((phi2 - phi1) / 2) ** 2 + cos_phi1 * cos(phi2) * sin(radians(plng - lng) / 2) ** 2
+            distance = diameter * asin(min(1.0, sqrt(a)))
+            if distance <= radius_m:
+                matches.append((distance, item_id))
+
+        matches.sort()
+        end = None if limit is None else offset + limit
+        return len(matches), [(item_id, distance) for distance, item_id in matches[offset:end]]
+
+    def linear_query(self, lat: float, lng: float, radius_m: float) -> List[Tuple[str, float]]:
+        """Reference full scan, used by the tests and the benchmark."""
+        matches = []
+        for item_id, (plat, plng, _) in self._points.items():
+            distance = haversine_m(lat, lng, plat, plng)
+            if distance <= radius_m:
+                matches.append((distance, item_id))
+        matches.sort()
+        return [(item_id, distance) for distance, item_id in matches]
@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from common.metrics import registry
+from upstream import NOT_SENT_ERRORS
+
+logger = logging.getLogger("MobileGateway.idempotency")
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyKeyReused(HTTPException):
+    """Same key, different request body: most likely a client bug, never a retry."""
+
+    def __init__(self):
+        super().__init__(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+
+class OutcomeUnknown(HTTPException):
+    """The first attempt may or may not have reached the upstream; running it again could apply it twice."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=504,
+            detail="The original request timed out and may have been applied; "
+                   "check its result before retrying with a new Idempotency-Key",
+        )
+
+
+class _Reply:
+    """What a completed request answered: a rendered response, or a client error to raise again."""
+    __slots__ = ("status_code", "body", "media_type", "error")
+
+    def __init__(self, status_code: int, body: bytes = b"", media_type: Optional[str] = None,
+                 error: Optional[HTTPException] = None):
+        self.status_code = status_code
+        self.body = body
+        self.media_type = media_type
+        self.error = error
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "task", "reply", "stored_at")
+
+    def __init__(self, fingerprint: str, task: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.task = task
+        self.reply: Optional[_Reply] = None
+        self.stored_at = time.monotonic()
+
+
+class IdempotencyStore:
+    """Bounded LRU/TTL store of in-flight and completed responses by (scope, key).
+
+    The first request with a key runs its handler as a task of its own, so a
+    client that disconnects does not abandon the upstream write; duplicates
+    arriving meanwhile wait for that task, and later ones get the stored
+    response back without calling the handler. Successful and 4xx outcomes
+    are kept for `ttl` seconds, and so are timeouts and upstream errors after
+    the request was sent: the write may have happened, so retries get 504
+    rather than a second POST. Other failures (circuit open, connection
+    refused, 5xx) are not stored, and the next retry runs again. Entries
+    still in flight are never evicted.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self.executed = 0
+        self.replayed = 0
+        self.coalesced = 0
+        self.conflicts = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def fingerprint(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    async def run(self, scope: str, key: str, body: bytes,
+                  handler: Callable[[], Awaitable[Response]]) -> Response:
+        """Answer the request `body` under `key`, calling `handler` only for the first attempt."""
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+        fingerprint = self.fingerprint(body)
+        entry_key = (scope, key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry.reply is not None and time.monotonic() - entry.stored_at >= self.ttl:
+            del self._entries[entry_key]
+            entry = None
+
+        if entry is None:
+            self.executed += 1
+            entry = self._start(entry_key, fingerprint, handler)
+            first = True
+        else:
+            if entry.fingerprint != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyKeyReused()
+            self._entries.move_to_end(entry_key)
+            first = False
+            if entry.reply is None:
+                self.coalesced += 1
+            else:
+                self.replayed += 1
+
+        # Shielded: a caller that goes away must not cancel the write the others wait for
+        reply = entry.reply or await asyncio.shield(entry.task)
+        if reply.error is not None:
+            raise reply.error
+        headers = None if first else {REPLAY_HEADER: "true"}
+        return Response(reply.body, status_code=reply.status_code, media_type=reply.media_type, headers=headers)
+
+    def _start(self, entry_key: Tuple[str, str], fingerprint: str,
+               handler: Callable[[], Awaitable[Response]]) -> _Entry:
+        entry = _Entry(fingerprint, asyncio.ensure_future(_capture(handler)))
+        self._entries[entry_key] = entry
+
+        def store(task: asyncio.Future):
+            if self._entries.get(entry_key) is not entry:
+                return  # cleared meanwhile
+            if task.cancelled() or task.exception() is not None:
+                # Not stored: the next retry of this key runs the handler again
+                del self._entries[entry_key]
+                return
+            entry.reply = task.result()
+            entry.stored_at = time.monotonic()
+
+        entry.task.add_done_callback(store)
+        while len(self._entries) > self.max_entries:
+            victim = next((k for k, e in self._entries.items() if e.reply is not None), None)
+            if victim is None:
+                break  # all in flight: over the bound until some finish
+            del self._entries[victim]
+            self.evictions += 1
+        return entry
+
+    def stats(self) -> Dict[str, float]:
+        requests = self.executed + self.replayed + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "in_flight": sum(1 for entry in self._entries.values() if entry.reply is None),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+            "conflicts": self.conflicts,
+            "evictions": self.evictions,
+            "dedup_ratio": round((self.replayed + self.coalesced) / requests, 3) if requests else 0.0,
+        }
+
+    def register_metrics(self):
+        registry.counter(
+            "idempotency_requests_total", "Requests carrying an Idempotency-Key by outcome", ("outcome",),
+            function=lambda: {
+                ("executed",): self.executed, ("replayed",): self.replayed,
+                ("coalesced",): self.coalesced, ("conflict",): self.conflicts,
+            },
+        )
+        registry.gauge("idempotency_store_size", "Stored idempotent responses", function=lambda: {(): len(self._entries)})
+
+
+def _maybe_applied(error: BaseException) -> bool:
+    """True if the failed attempt may still have been applied upstream."""
+    if isinstance(error, HTTPException) and error.status_code == 504:
+        return True
+    # Routes turn transport errors into HTTPException inside their except block
+    cause = error if isinstance(error, httpx.RequestError) else error.__cause__ or error.__context__
+    return isinstance(cause, (httpx.RequestError, asyncio.TimeoutError)) and not isinstance(cause, NOT_SENT_ERRORS)
+
+
+async def _capture(handler: Callable[[], Awaitable[Response]]) -> _Reply:
+    try:
+        response = await handler()
+    except (HTTPException, httpx.RequestError) as e:
+        if _maybe_applied(e):
+            logger.warning("Idempotent request failed after it may have been sent: %s", e)
+            return _Reply(504, error=OutcomeUnknown())
+        if not isinstance(e, HTTPException) or e.status_code >= 500:
+            raise
+        return _Reply(e.status_code, error=e)
+    if response.status_code >= 500:
+        raise HTTPException(status_code=response.status_code, detail="Upstream request failed")
+    return _Reply(response.status_code, response.body, response.media_type)
@@ -1,29 +1,167 @@
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.exceptions import HTTPException as StarletteHTTPException
 import httpx
 import grpc
 import asyncio
-from typing import Optional, Dict, Any
+import os
+import time
+import sys
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Set
 import logging
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timezone
 import json
+import gzip
+import zlib
+# Make the repository-level `common` package (shared with the user service) importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mobile-gateway.log'),
-        logging.StreamHandler()
-    ]
-)
+from common.jwt_auth import TokenVerifier, auth_dependency, bearer_token
+from common.logging_setup import setup_logging, AccessLogSampler, logging_stats
+from common.metrics import MetricsMiddleware, registry as metrics_registry
+from upstream import PoolSettings, UpstreamPool, UpstreamRegistry
+from resilience import CallPolicy
+from admission import AdmissionController, AdmissionMiddleware, GradientLimit, PriorityRules
+from facility_client import FacilityClient, facility_location, facility_to_dict
+from geo_index import GeoGridIndex
+from availability import AvailabilityEngine, parse_iso, format_iso
+from read_cache import CoalescingCache
+from reservation_sync import ReservationSyncLog
+from push import LocalPushProvider, PushDispatcher, PushTokenStore
+from idempotency import IdempotencyStore
+import fast_json
+from fast_json import FastJSONResponse
+
+# Setup logging: JSON records written by a background thread, file rotated by size
+setup_logging("mobile-gateway", log_file=os.getenv("LOG_FILE", "mobile-gateway.log"))
 logger = logging.getLogger("MobileGateway")
+# Per-route access log sampling, e.g. "default=1.0,/mobile/health=0.01"
+access_log_sampler = AccessLogSampler(os.getenv("ACCESS_LOG_SAMPLING", "default=1.0,/mobile/health=0.05"))
+
+# Service URLs
+AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8000")
+RESERVATION_SERVICE_URL = os.getenv("RESERVATION_SERVICE_URL", "http://localhost:8080")
+FACILITY_GRPC_HOST = os.getenv("FACILITY_GRPC_HOST", "localhost:50051")
+# Must match the user service's JWT_SECRET so tokens can be verified locally
+JWT_SECRET = os.getenv("JWT_SECRET", "e8694db72620093716a6c0a54ce7936e4bfc134da762595b7599092017c54872")
+
+# One pooled keep-alive client per upstream, shared by all requests
+upstreams = UpstreamRegistry()
+auth_upstream = upstreams.register(
+    UpstreamPool("auth", AUTH_SERVICE_URL, PoolSettings.from_env("AUTH"))
+)
+reservation_upstream = upstreams.register(
+    UpstreamPool("reservation", RESERVATION_SERVICE_URL, PoolSettings.from_env("RESERVATION"))
+)
+# Per-route call policies; override e.g. RESERVATION_READ_TIMEOUT=1.5, RESERVATION_READ_HEDGE=false.
+# POSTs are only retried when the request never reached the upstream.
+AUTH_POLICY = CallPolicy.from_env("AUTH_CALL", timeout=5.0, retries=1)
+RESERVATION_READ_POLICY = CallPolicy.from_env("RESERVATION_READ", timeout=2.0, retries=2, hedge=True)
+RESERVATION_WRITE_POLICY = CallPolicy.from_env("RESERVATION_WRITE", timeout=5.0, retries=1)
+# Long-lived gRPC channel(s) to the facility service
+facility_client = FacilityClient(FACILITY_GRPC_HOST)
+# Local JWT verification: no round trip to the user service per protected call
+token_verifier = TokenVerifier(JWT_SECRET)
+require_user = auth_dependency(token_verifier)
+# Facility locations for radius search, loaded from the facility service along with
+# availability and kept in sync by the facility write routes
+facility_index = GeoGridIndex(cell_deg=float(os.getenv("GEO_INDEX_CELL_DEG", "0.05")))
+# Free time per facility as sorted epoch intervals, minus booked slots. Rebuilt
+# from the facility and reservation services at startup and every
+# AVAILABILITY_REFRESH_SECONDS; the routes keep it current in between.
+availability = AvailabilityEngine()
+AVAILABILITY_REFRESH_SECONDS = float(os.getenv("AVAILABILITY_REFRESH_SECONDS", "60"))
+AVAILABILITY_RETRY_SECONDS = float(os.getenv("AVAILABILITY_RETRY_SECONDS", "5"))
+FACILITY_LIST_PAGE_SIZE = int(os.getenv("FACILITY_LIST_PAGE_SIZE", "500"))
+# reservation id -> (facility_id, start, end, booked_at) for slots booked through
+# the gateway that no reservation listing has shown yet (see refresh_availability)
+reserved_slots: Dict[str, tuple] = {}
+# (facility_id, start, end) claimed locally while the upstream POST is in flight
+pending_claims: Set[tuple] = set()
+# Facility reads: concurrent requests for one id share a single gRPC call, and
+# results are reused for FACILITY_CACHE_TTL (then served stale while refreshing)
+facility_cache = CoalescingCache(
+    "facility",
+    max_entries=int(os.getenv("FACILITY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("FACILITY_CACHE_TTL", "5")),
+    stale_ttl=float(os.getenv("FACILITY_CACHE_STALE_TTL", "30")),
+)
+# Per-user feed of reservations for delta sync, seeded from the reservation
+# service and compared with it again every SYNC_RESEED_SECONDS
+reservation_log = ReservationSyncLog(
+    tombstone_retention=float(os.getenv("SYNC_TOMBSTONE_RETENTION", str(30 * 24 * 3600))),
+    max_records=int(os.getenv("SYNC_MAX_RECORDS_PER_USER", "1000")),
+    max_users=int(os.getenv("SYNC_MAX_USERS", "100000")),
+    reseed_interval=float(os.getenv("SYNC_RESEED_SECONDS", "60")),
+)
+# Adaptive concurrency limit in front of all routes; excess requests queue per
+# priority class and device, or are shed with 429/503 and Retry-After
+admission = AdmissionController(
+    GradientLimit(
+        initial=float(os.getenv("ADMISSION_INITIAL_LIMIT", "50")),
+        min_limit=float(os.getenv("ADMISSION_MIN_LIMIT", "8")),
+        max_limit=float(os.getenv("ADMISSION_MAX_LIMIT", "1000")),
+    ),
+    PriorityRules(os.getenv(
+        "ADMISSION_PRIORITIES",
+        "default=normal,/mobile/reservations=critical,/mobile/auth=critical,"
+        "/mobile/auth/me=low,/mobile/user/profile=low,/mobile/health=exempt,/metrics=exempt",
+    )),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "200")),
+    max_queue_per_device=int(os.getenv("ADMISSION_MAX_QUEUE_PER_DEVICE", "4")),
+)
+# Push tokens by user and device; notifications are queued without blocking
+# the request and sent in batches by background workers. The local provider
+# stands in for FCM/APNs (no network), with a simulated per-batch latency.
+push_tokens = PushTokenStore(max_devices=int(os.getenv("PUSH_MAX_DEVICES_PER_USER", "10")))
+push_dispatcher = PushDispatcher(
+    push_tokens,
+    LocalPushProvider(
+        max_batch=int(os.getenv("PUSH_PROVIDER_MAX_BATCH", "500")),
+        batch_latency=float(os.getenv("PUSH_PROVIDER_LATENCY_MS", "20")) / 1000,
+    ),
+    queue_size=int(os.getenv("PUSH_QUEUE_SIZE", "10000")),
+    workers=int(os.getenv("PUSH_WORKERS", "4")),
+    batch_size=int(os.getenv("PUSH_BATCH_SIZE", "500")),
+    linger=float(os.getenv("PUSH_LINGER_MS", "20")) / 1000,
+    max_retries=int(os.getenv("PUSH_MAX_RETRIES", "5")),
+)
+# Responses of reservation POSTs by (user, Idempotency-Key), so client retries
+# wait for or replay the first attempt instead of booking again
+idempotency_store = IdempotencyStore(
+    max_entries=int(os.getenv("IDEMPOTENCY_STORE_SIZE", "10000")),
+    ttl=float(os.getenv("IDEMPOTENCY_TTL", "3600")),
+)
+upstreams.register_metrics()
+facility_cache.register_metrics()
+idempotency_store.register_metrics()
+admission.register_metrics()
+push_dispatcher.register_metrics()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstreams.start()
+    await facility_client.start()
+    await push_dispatcher.start()
+    availability_task = asyncio.create_task(keep_availability_fresh())
+    try:
+        yield
+    finally:
+        availability_task.cancel()
+        await asyncio.gather(availability_task, return_exceptions=True)
+        await push_dispatcher.close()
+        await facility_client.close()
+        await upstreams.close()
 
 app = FastAPI(
     title="Mobile API Gateway",
     description="API Gateway for Mobile Applications",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for mobile apps
@@ -34,11 +172,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Service URLs
-AUTH_SERVICE_URL = "http://localhost:8000"
-RESERVATION_SERVICE_URL = "http://localhost:8080"
-FACILITY_GRPC_HOST = "localhost:50051"
+if os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes"):
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+# Route latency, status codes and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Pydantic models for mobile-specific requests
 class MobileUserCreate(BaseModel):
@@ -59,6 +196,10 @@ class MobileFacilityCreate(BaseModel):
     description: str
     location: Optional[Dict[str, float]] = None  # GPS coordinates for mobile
 
+class FacilityLocation(BaseModel):
+    lat: float
+    lng: float
+
 class MobileReservation(BaseModel):
     facility_id: str
     user_email: str
@@ -70,12 +211,38 @@ class MobileReservation(BaseModel):
 class QuickBookingRequest(BaseModel):
     facility_id: str
     duration_minutes: int = 60
+    user_email: Optional[str] = None
+
+class AvailableTimeSlot(BaseModel):
+    start: str
+    end: str
+
+class BatchSubRequest(BaseModel):
+    method: str = "GET"
+    path: str  # e.g. "/mobile/facilities/abc?x=1"
+    body: Optional[Any] = None
+    headers: Optional[Dict[str, str]] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
 
 # Middleware to log requests
 @app.middleware("http")
 async def log_requests(request, call_next):
-    logger.info(f"{request.method} {request.url.path} - Mobile Gateway")
+    start = time.perf_counter()
     response = await call_next(request)
+    path = request.url.path
+    if access_log_sampler.should_log(path):
+        logger.info(
+            "%s %s - Mobile Gateway", request.method, path,
+            extra={
+                "method": request.method,
+                "path": path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "sample_rate": access_log_sampler.rate_for(path),
+            }
+        )
     return response
 
 # Dependency to extract mobile device info
@@ -90,266 +257,825 @@ async def get_device_info(
         "app_version": x_app_version
     }
 
+# Dependency to read the client's remaining time budget (X-Request-Timeout-Ms)
+MAX_REQUEST_TIMEOUT = 30.0
+
+async def get_request_deadline(x_request_timeout_ms: Optional[int] = Header(None)) -> Optional[float]:
+    if x_request_timeout_ms is None or x_request_timeout_ms <= 0:
+        return None
+    return min(x_request_timeout_ms / 1000.0, MAX_REQUEST_TIMEOUT)
+
+GRPC_TO_HTTP_STATUS = {
+    grpc.StatusCode.NOT_FOUND: 404,
+    grpc.StatusCode.INVALID_ARGUMENT: 400,
+    grpc.StatusCode.DEADLINE_EXCEEDED: 504,
+    grpc.StatusCode.UNAVAILABLE: 503,
+}
+
+def grpc_http_error(e: grpc.aio.AioRpcError) -> HTTPException:
+    status_code = GRPC_TO_HTTP_STATUS.get(e.code(), 500)
+    if status_code == 404:
+        return HTTPException(status_code=404, detail="Facility not found")
+    logger.error("Facility service error: %s %s", e.code(), e.details())
+    return HTTPException(status_code=status_code, detail="Facility service unavailable")
+
+async def fetch_facility(facility_id: str, timeout: Optional[float] = None):
+    """Read a facility through the coalescing cache; each caller still gets its own deadline.
+
+    The shared load runs with the client's default deadline: it also serves
+    the other coalesced callers and background refreshes, so one impatient
+    caller must not cut it short for everyone.
+    """
+    read = facility_cache.get(facility_id, lambda: facility_client.get_facility(facility_id))
+    if timeout is None:
+        return await read
+    try:
+        return await asyncio.wait_for(read, timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Facility service timed out")
+
+# Upstream bodies are encoded with fast_json and sent as bytes
+JSON_HEADERS = {"content-type": "application/json"}
+# Connection-scoped headers that must not be forwarded by a proxy (RFC 9110 7.6.1)
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+))
+
+def forwarded_for(request: Request) -> Dict[str, str]:
+    """X-Forwarded-For with the caller's address appended, for upstreams that key on client IP"""
+    forwarded = request.headers.get("x-forwarded-for")
+    if request.client is None:
+        return {"x-forwarded-for": forwarded} if forwarded else {}
+    return {"x-forwarded-for": f"{forwarded}, {request.client.host}" if forwarded else request.client.host}
+
+async def stream_proxy(
+    request: Request, upstream: UpstreamPool, path: str, policy: Optional[CallPolicy] = None
+) -> StreamingResponse:
+    """Forward a request and relay the reply as byte streams, without decoding either body.
+
+    Content-Encoding and Content-Length pass through untouched, so compressed
+    upstream replies are never inflated and re-encoded here.
+    """
+    headers = [
+        (k, v) for k, v in request.headers.items() if k not in HOP_BY_HOP_HEADERS and k != "x-forwarded-for"
+    ]
+    headers.extend(forwarded_for(request).items())
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    response = await upstream.request(
+        request.method, path,
+        params=request.query_params,
+        headers=headers,
+        content=request.stream() if has_body else None,
+        stream=True,
+        policy=policy,
+    )
+    return relay_response(response)
+
+def relay_response(response: httpx.Response) -> StreamingResponse:
+    """Relay a streamed upstream reply unchanged; the upstream response is closed once sent.
+
+    Headers are copied as raw pairs, so repeated ones (Set-Cookie, Vary...) all survive.
+    """
+    relayed = StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        background=BackgroundTask(response.aclose),
+    )
+    relayed.raw_headers = [
+        (name.lower(), value) for name, value in response.headers.raw
+        if name.lower().decode("latin-1") not in HOP_BY_HOP_HEADERS
+    ]
+    return relayed
+
+async def merge_upstream_reply(response: httpx.Response, extra: Dict[str, Any]) -> Response:
+    """A 200 reply with `extra` added to its JSON object; any other reply is relayed as it is.
+
+    The response must have been requested with stream=True.
+    """
+    if response.status_code != 200:
+        return relay_response(response)
+    try:
+        body = await response.aread()
+    finally:
+        await response.aclose()
+    try:
+        return FastJSONResponse(fast_json.merge_object(body, extra))
+    except ValueError:
+        logger.error("Upstream %s replied 200 without a JSON object", response.request.url.path)
+        raise HTTPException(status_code=502, detail="Invalid response from upstream service")
+
 # ============= MOBILE AUTH ROUTES =============
 
 @app.post("/mobile/auth/register")
-async def mobile_register(user: MobileUserCreate):
+async def mobile_register(user: MobileUserCreate, request: Request):
     """Mobile-specific registration with device tracking"""
     try:
-        async with httpx.AsyncClient() as client:
-            # Prepare payload for auth service
-            auth_payload = {
-                "email": user.email,
-                "password": user.password,
-                "full_name": user.full_name
-            }
-            
-            response = await client.post(
-                f"{AUTH_SERVICE_URL}/auth/register",
-                json=auth_payload
-            )
+        # Prepare payload for auth service
+        auth_payload = {
+            "email": user.email,
+            "password": user.password,
+            "full_name": user.full_name
+        }
+        
+        response = await auth_upstream.post(
+            "/auth/register", content=fast_json.dumps(auth_payload),
+            headers={**JSON_HEADERS, **forwarded_for(request)}, policy=AUTH_POLICY, stream=True
+        )
+        
+        if response.status_code == 200:
+            logger.info("Mobile user registered: %s, device: %s", user.email, user.device_id)
+            if user.push_token:
+                push_tokens.register(user.email, user.device_id, user.push_token)
+        # Mobile fields are spliced into the reply's bytes; errors pass through unparsed
+        return await merge_upstream_reply(response, {
+            "mobile_registration": True,
+            "device_registered": user.device_id is not None,
+        })
             
-            if response.status_code == 200:
-                logger.info(f"Mobile user registered: {user.email}, device: {user.device_id}")
-                result = response.json()
-                # Add mobile-specific response data
-                result["mobile_registration"] = True
-                result["device_registered"] = user.device_id is not None
-                return result
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=response.json().get("detail", "Registration failed")
-                )
-                
     except httpx.RequestError as e:
-        logger.error(f"Mobile registration error: {str(e)}")
+        logger.error("Mobile registration error: %s", e)
         raise HTTPException(status_code=500, detail="Auth service unavailable")
 
 @app.post("/mobile/auth/login")
-async def mobile_login(user: MobileUserLogin):
+async def mobile_login(user: MobileUserLogin, request: Request):
     """Mobile-specific login with device tracking"""
     try:
-        async with httpx.AsyncClient() as client:
-            auth_payload = {
-                "email": user.email,
-                "password": user.password
-            }
-            
-            response = await client.post(
-                f"{AUTH_SERVICE_URL}/auth/login",
-                json=auth_payload
-            )
+        auth_payload = {
+            "email": user.email,
+            "password": user.password
+        }
+        
+        response = await auth_upstream.post(
+            "/auth/login", content=fast_json.dumps(auth_payload),
+            # The user service throttles failed logins per client IP, not per gateway
+            headers={**JSON_HEADERS, **forwarded_for(request)}, policy=AUTH_POLICY, stream=True
+        )
+        
+        if response.status_code == 200:
+            logger.info("Mobile user logged in: %s, device: %s", user.email, user.device_id)
+            if user.push_token:
+                push_tokens.register(user.email, user.device_id, user.push_token)
+        return await merge_upstream_reply(response, {
+            "mobile_login": True,
+            "device_id": user.device_id,
+            "push_notifications_enabled": user.push_token is not None,
+        })
             
-            if response.status_code == 200:
-                logger.info(f"Mobile user logged in: {user.email}, device: {user.device_id}")
-                result = response.json()
-                # Add mobile-specific response data
-                result["mobile_login"] = True
-                result["device_id"] = user.device_id
-                result["push_notifications_enabled"] = user.push_token is not None
-                return result
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=response.json().get("detail", "Login failed")
-                )
-                
     except httpx.RequestError as e:
-        logger.error(f"Mobile login error: {str(e)}")
+        logger.error("Mobile login error: %s", e)
         raise HTTPException(status_code=500, detail="Auth service unavailable")
 
+@app.get("/mobile/auth/me")
+async def mobile_me(claims: dict = Depends(require_user)):
+    """Identity of the caller, from the locally verified bearer token"""
+    return {"email": claims.get("sub"), "expires_at": claims.get("exp")}
+
+@app.post("/mobile/auth/logout")
+async def mobile_logout(
+    claims: dict = Depends(require_user),
+    authorization: Optional[str] = Header(None)
+):
+    """Revoke the bearer token at the gateway and tell the auth service"""
+    token_verifier.revoke(bearer_token(authorization))
+    logger.info("Mobile user logged out: %s", claims.get('sub'))
+    try:
+        await auth_upstream.post("/auth/logout", headers={"Authorization": authorization}, policy=AUTH_POLICY)
+    except (httpx.RequestError, HTTPException) as e:
+        logger.warning("Auth service logout failed: %s", e)
+    return {"message": "Logout successful", "mobile_logout": True}
+
 # ============= MOBILE FACILITY ROUTES =============
 
+def index_facility_location(facility_id: str, name: str, description: str, location: Dict[str, float]):
+    try:
+        facility_index.upsert(
+            facility_id, location["lat"], location["lng"],
+            {"name": name, "description": description}
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Location must contain valid 'lat' and 'lng'")
+
+def index_facility(facility):
+    """Add, move or drop a facility in the nearby index to match its stored location"""
+    location = facility_location(facility)
+    if location is None:
+        facility_index.remove(facility.id)
+    else:
+        index_facility_location(facility.id, facility.name, facility.description, location)
+
 @app.get("/mobile/facilities/nearby")
 async def get_nearby_facilities(
     lat: float,
     lng: float,
     radius: int = 5000,  # radius in meters
+    limit: int = 20,
+    offset: int = 0,
     device_info: dict = Depends(get_device_info)
 ):
-    """Get facilities near user's location (mobile-specific)"""
-    logger.info(f"Nearby facilities requested for location: {lat}, {lng}")
+    """Get facilities near user's location (mobile-specific), closest first"""
+    logger.info("Nearby facilities requested for location: %s, %s", lat, lng)
+    
+    if radius <= 0 or limit <= 0 or offset < 0:
+        raise HTTPException(status_code=400, detail="radius and limit must be positive, offset non-negative")
+    
+    total, page = facility_index.query(lat, lng, radius, limit=min(limit, 100), offset=offset)
+    facilities = []
+    for facility_id, distance in page:
+        entry = facility_index.get(facility_id)
+        data = entry["data"] or {}
+        facilities.append({
+            "id": facility_id,
+            "name": data.get("name"),
+            "description": data.get("description"),
+            "distance_meters": round(distance),
+            "coordinates": {"lat": entry["lat"], "lng": entry["lng"]}
+        })
     
-    # This would integrate with your facility service to get location-based results
-    # For now, returning mock data
     return {
-        "facilities": [
-            {
-                "id": "1",
-                "name": "Tennis Court A",
-                "description": "Professional tennis court",
-                "distance_meters": 150,
-                "coordinates": {"lat": lat + 0.001, "lng": lng + 0.001}
-            },
-            {
-                "id": "2", 
-                "name": "Basketball Court",
-                "description": "Outdoor basketball court",
-                "distance_meters": 300,
-                "coordinates": {"lat": lat + 0.002, "lng": lng + 0.001}
-            }
-        ],
+        "facilities": facilities,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
         "search_location": {"lat": lat, "lng": lng},
         "search_radius": radius
     }
 
+@app.get("/mobile/facilities/available")
+async def get_facilities_available_in_window(
+    start: str,
+    end: str,
+    duration_minutes: Optional[int] = None
+):
+    """Facilities with a free slot of duration_minutes (default: the whole window) between start and end"""
+    start_ts, end_ts = parse_slot(start, end)
+    if availability.loaded_at is None:
+        # Before the first full load the index only knows facilities looked up so far
+        raise HTTPException(status_code=503, detail="Availability is still loading",
+                            headers={"Retry-After": str(int(AVAILABILITY_RETRY_SECONDS))})
+    duration = duration_minutes * 60 if duration_minutes else None
+    matches = availability.facilities_free_in(start_ts, end_ts, duration)
+    return {
+        "window": {"start": start, "end": end},
+        "facilities": [
+            {"facility_id": facility_id, "start": format_iso(slot[0]), "end": format_iso(slot[1])}
+            for facility_id, slot in sorted(matches.items(), key=lambda item: item[1])
+        ]
+    }
+
+@app.post("/mobile/facilities")
+async def create_mobile_facility(
+    facility: MobileFacilityCreate,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Create a facility with its GPS location and register it for nearby search"""
+    if facility.location is not None and ("lat" not in facility.location or "lng" not in facility.location):
+        raise HTTPException(status_code=400, detail="Location must contain valid 'lat' and 'lng'")
+    try:
+        created = await facility_client.create_facility(
+            facility.name, facility.description, facility.location, timeout=timeout
+        )
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
+    
+    index_facility(created)
+    logger.info("Mobile facility created: %s", created.id)
+    return facility_to_dict(created)
+
+@app.put("/mobile/facilities/{facility_id}/location")
+async def update_facility_location(
+    facility_id: str,
+    location: FacilityLocation,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Set or move a facility's GPS location in the facility service and the nearby index"""
+    try:
+        updated = await facility_client.set_facility_location(facility_id, location.lat, location.lng, timeout=timeout)
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
+    facility_cache.invalidate(facility_id)
+    index_facility(updated)
+    return {"facility_id": facility_id, "location": facility_location(updated)}
+
+@app.delete("/mobile/facilities/{facility_id}")
+async def delete_mobile_facility(
+    facility_id: str,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Delete a facility and drop it from the nearby index"""
+    try:
+        await facility_client.delete_facility(facility_id, timeout=timeout)
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
+    facility_cache.invalidate(facility_id)
+    facility_index.remove(facility_id)
+    availability.forget(facility_id)
+    logger.info("Mobile facility deleted: %s", facility_id)
+    return {"message": "Facility deleted successfully", "facility_id": facility_id}
+
+@app.get("/mobile/facilities")
+async def get_mobile_facilities(
+    ids: str,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Get several facilities at once (comma separated ids), fetched concurrently"""
+    facility_ids = [fid for fid in ids.split(",") if fid]
+    logger.info("Mobile facilities requested: %s ids", len(facility_ids))
+    
+    results = await asyncio.gather(
+        *(fetch_facility(fid, timeout) for fid in facility_ids), return_exceptions=True
+    )
+    facilities = []
+    missing = []
+    for facility_id, result in zip(facility_ids, results):
+        if isinstance(result, grpc.aio.AioRpcError):
+            if result.code() != grpc.StatusCode.NOT_FOUND:
+                raise grpc_http_error(result)
+            missing.append(facility_id)
+        elif isinstance(result, Exception):
+            raise result
+        else:
+            facilities.append(facility_to_dict(result))
+    
+    return {"facilities": facilities, "missing": missing}
+
 @app.get("/mobile/facilities/{facility_id}")
-async def get_mobile_facility(facility_id: str):
+async def get_mobile_facility(
+    facility_id: str,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
     """Get facility details with mobile-optimized data"""
-    # Here you would call your gRPC facility service
-    # For demonstration, returning mock data with mobile-specific fields
+    logger.info("Mobile facility details requested: %s", facility_id)
     
-    logger.info(f"Mobile facility details requested: {facility_id}")
+    try:
+        facility = await fetch_facility(facility_id, timeout)
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
     
-    return {
-        "id": facility_id,
-        "name": "Tennis Court A",
-        "description": "Professional tennis court with lighting",
-        "mobile_optimized": True,
-        "images": ["thumb_1.jpg", "thumb_2.jpg"],  # Mobile-optimized thumbnails
-        "available_times_today": [
-            {"start": "09:00", "end": "10:00", "available": True},
-            {"start": "10:00", "end": "11:00", "available": False},
-            {"start": "11:00", "end": "12:00", "available": True}
-        ],
-        "rating": 4.5,
-        "amenities": ["Lighting", "Equipment rental", "Parking"]
-    }
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    result = facility_to_dict(facility)
+    result["mobile_optimized"] = True
+    result["available_times_today"] = [
+        t for t in result["availableTimes"] if t["start"].startswith(today)
+    ]
+    return result
+
+def booked_intervals(reservations: List[Any]) -> Dict[str, List[tuple]]:
+    """facility id -> booked (start, end) epoch intervals of reservation service records"""
+    booked: Dict[str, List[tuple]] = {}
+    for reservation in reservations:
+        if not isinstance(reservation, dict) or reservation.get("status") == "cancelled":
+            continue
+        try:
+            slot = parse_iso(reservation["startTime"]), parse_iso(reservation["endTime"])
+        except (KeyError, TypeError, ValueError):
+            continue  # no slot, e.g. booked through the web gateway by date only
+        booked.setdefault(reservation.get("facilityId"), []).append(slot)
+    return booked
+
+async def fetch_reservations(facility_id: Optional[str] = None, user_email: Optional[str] = None) -> List[Any]:
+    """All reservations from the reservation service, or those of one facility or user"""
+    params = {"facilityId": facility_id} if facility_id else {}
+    if user_email:
+        params["userEmail"] = user_email
+    response = await reservation_upstream.get("/reservations", params=params, policy=RESERVATION_READ_POLICY)
+    if response.status_code != 200:
+        raise HTTPException(status_code=503, detail="Reservation service unavailable")
+    try:
+        reservations = fast_json.loads(response.content)
+    except ValueError:
+        reservations = None
+    if not isinstance(reservations, list):
+        raise HTTPException(status_code=502, detail="Invalid response from reservation service")
+    return reservations
+
+async def refresh_availability() -> int:
+    """Rebuild the availability index from every facility and reservation, then swap it in.
+
+    Facility locations in the listing also refresh the nearby index.
+    """
+    facilities = []
+    while True:
+        page = await facility_client.list_facilities(len(facilities), FACILITY_LIST_PAGE_SIZE)
+        if not page:
+            break
+        facilities.extend(page)
+    listed_at = time.monotonic()
+    booked = booked_intervals(await fetch_reservations())
+    # The listing now covers bookings made before it, including any cancelled
+    # elsewhere since; only later ones are still subtracted locally
+    now = time.time()
+    for reservation_id, (_, _, end, booked_at) in list(reserved_slots.items()):
+        if booked_at < listed_at or end <= now:
+            del reserved_slots[reservation_id]
+    fresh = AvailabilityEngine()
+    for facility in facilities:
+        fresh.load(facility.id, [(t.start, t.end) for t in facility.availableTimes], booked.get(facility.id, ()))
+        index_facility(facility)
+    for facility_id, start, end in local_claims():
+        fresh.remove(facility_id, start, end)
+    availability.replace(fresh)
+    return len(facilities)
+
+def local_claims(facility_id: Optional[str] = None) -> List[tuple]:
+    """(facility_id, start, end) booked or being booked here that listings may not show yet"""
+    claims = list(pending_claims) + [entry[:3] for entry in reserved_slots.values()]
+    return [claim for claim in claims if facility_id is None or claim[0] == facility_id]
+
+async def keep_availability_fresh():
+    """Load the availability index at startup, then rebuild it periodically"""
+    while True:
+        try:
+            count = await refresh_availability()
+            logger.info("Availability index loaded for %s facilities", count)
+            delay = AVAILABILITY_REFRESH_SECONDS
+        except (grpc.aio.AioRpcError, httpx.RequestError, HTTPException) as e:
+            logger.warning("Availability refresh failed: %s", e)
+            delay = min(AVAILABILITY_REFRESH_SECONDS, AVAILABILITY_RETRY_SECONDS)
+        await asyncio.sleep(delay)
+
+async def ensure_availability(facility_id: str, timeout: Optional[float] = None):
+    """Load one facility into the index if it is missing (not loaded yet, or created since)"""
+    if facility_id in availability:
+        return
+    try:
+        facility, reservations = await asyncio.gather(
+            fetch_facility(facility_id, timeout), fetch_reservations(facility_id)
+        )
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
+    except httpx.RequestError as e:
+        logger.error("Reservation listing error: %s", e)
+        raise HTTPException(status_code=503, detail="Reservation service unavailable")
+    if facility_id not in availability:
+        booked = booked_intervals(reservations).get(facility_id, [])
+        availability.load(
+            facility_id, [(t.start, t.end) for t in facility.availableTimes],
+            booked + [claim[1:] for claim in local_claims(facility_id)]
+        )
+
+def parse_slot(start: str, end: str):
+    try:
+        slot = parse_iso(start), parse_iso(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Times must be ISO-8601")
+    if slot[1] <= slot[0]:
+        raise HTTPException(status_code=400, detail="End time must be after start time")
+    return slot
 
 @app.get("/mobile/facilities/{facility_id}/availability")
 async def get_facility_availability(
     facility_id: str,
-    date: Optional[str] = None
+    date: Optional[str] = None,
+    timeout: Optional[float] = Depends(get_request_deadline)
 ):
     """Get real-time availability for mobile quick booking"""
-    logger.info(f"Availability check for facility {facility_id}")
+    logger.info("Availability check for facility %s", facility_id)
+    
+    await ensure_availability(facility_id, timeout)
     
-    # This would integrate with your facility gRPC service
+    date = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    try:
+        free = availability.free_on(facility_id, date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date must be YYYY-MM-DD")
     return {
         "facility_id": facility_id,
-        "date": date or datetime.now().strftime("%Y-%m-%d"),
+        "date": date,
         "available_slots": [
-            {"start": "09:00", "end": "10:00", "price": 25.00},
-            {"start": "11:00", "end": "12:00", "price": 25.00},
-            {"start": "14:00", "end": "15:00", "price": 30.00},
-            {"start": "16:00", "end": "17:00", "price": 35.00}
-        ],
-        "currency": "EUR"
+            {"start": format_iso(start), "end": format_iso(end)} for start, end in free
+        ]
     }
 
+@app.post("/mobile/facilities/{facility_id}/availability")
+async def add_facility_availability(
+    facility_id: str,
+    slot: AvailableTimeSlot,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Add an available time to a facility"""
+    parse_slot(slot.start, slot.end)
+    try:
+        await facility_client.add_available_time(facility_id, slot.start, slot.end, timeout=timeout)
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
+    facility_cache.invalidate(facility_id)
+    # Reload rather than add: the new time may overlap slots that are already booked
+    availability.forget(facility_id)
+    try:
+        await ensure_availability(facility_id, timeout)
+    except HTTPException as e:
+        logger.warning("Reloading availability of %s failed, it loads on next use: %s", facility_id, e.detail)
+    return {"facility_id": facility_id, "added": {"start": slot.start, "end": slot.end}}
+
+@app.delete("/mobile/facilities/{facility_id}/availability")
+async def remove_facility_availability(
+    facility_id: str,
+    start: str,
+    end: str,
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Remove an available time from a facility"""
+    start_ts, end_ts = parse_slot(start, end)
+    try:
+        await facility_client.remove_available_time(facility_id, start, end, timeout=timeout)
+    except grpc.aio.AioRpcError as e:
+        raise grpc_http_error(e)
+    facility_cache.invalidate(facility_id)
+    availability.remove(facility_id, start_ts, end_ts)
+    return {"facility_id": facility_id, "removed": {"start": start, "end": end}}
+
 # ============= MOBILE RESERVATION ROUTES =============
 
+async def post_reservation(facility_id: str, user_email: str, start_time: str, end_time: str, notes: str):
+    """Claim the slot locally, then create it upstream; the claim is undone on failure"""
+    slot = parse_slot(start_time, end_time)
+    await ensure_availability(facility_id)
+    if not availability.reserve(facility_id, *slot):
+        raise HTTPException(status_code=409, detail="Time slot is not available")
+    claim = (facility_id,) + slot
+    pending_claims.add(claim)
+    try:
+        return await create_upstream_reservation(facility_id, user_email, start_time, end_time, notes, slot)
+    finally:
+        pending_claims.discard(claim)
+
+async def create_upstream_reservation(facility_id: str, user_email: str, start_time: str, end_time: str,
+                                      notes: str, slot: tuple):
+    reservation_payload = {
+        "facilityId": facility_id,
+        "userEmail": user_email,
+        "startTime": start_time,
+        "endTime": end_time,
+        "notes": notes
+    }
+    try:
+        response = await reservation_upstream.post(
+            "/reservations", content=fast_json.dumps(reservation_payload), headers=JSON_HEADERS,
+            policy=RESERVATION_WRITE_POLICY
+        )
+    except BaseException:
+        availability.release(facility_id, *slot)
+        raise
+    
+    if response.status_code != 200:
+        availability.release(facility_id, *slot)
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Failed to create reservation"
+        )
+    
+    try:
+        result = fast_json.loads(response.content)
+    except ValueError:
+        result = None
+    if not isinstance(result, dict):
+        availability.release(facility_id, *slot)
+        logger.error("Reservation service replied 200 without a JSON object")
+        raise HTTPException(status_code=502, detail="Invalid response from reservation service")
+    if result.get("id"):
+        reserved_slots[str(result["id"])] = (facility_id,) + slot + (time.monotonic(),)
+    if result.get("id") and user_email:
+        reservation_log.upsert(user_email, str(result["id"]), {
+            "facility_id": facility_id,
+            "start_time": start_time,
+            "end_time": end_time,
+            "notes": notes,
+            "status": result.get("status") or "confirmed",
+        })
+    return result
+
+async def idempotent(authorization: Optional[str], key: Optional[str], request_model: BaseModel, handler) -> Response:
+    """Run `handler` once per (caller, Idempotency-Key); without a key, every request runs it.
+
+    Keys are scoped by the bearer token's subject, not by anything in the body,
+    so one user's key can never answer another user's request.
+    """
+    if key is None:
+        return await handler()
+    claims = await require_user(authorization)
+    body = fast_json.dumps(request_model.model_dump())
+    return await idempotency_store.run(claims["sub"], key, body, handler)
+
 @app.post("/mobile/reservations")
-async def create_mobile_reservation(reservation: MobileReservation):
-    """Create reservation with mobile-specific features"""
-    try:
-        async with httpx.AsyncClient() as client:
-            # Prepare payload for reservation service
-            reservation_payload = {
-                "facilityId": reservation.facility_id,
-                "userEmail": reservation.user_email,
-                "startTime": reservation.start_time,
-                "endTime": reservation.end_time,
-                "notes": reservation.notes or ""
-            }
-            
-            response = await client.post(
-                f"{RESERVATION_SERVICE_URL}/reservations",
-                json=reservation_payload
-            )
+async def create_mobile_reservation(
+    reservation: MobileReservation,
+    idempotency_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+):
+    """Create reservation with mobile-specific features.
+
+    Retries carrying the same Idempotency-Key (which needs a bearer token) get
+    the first attempt's response.
+    """
+    return await idempotent(
+        authorization, idempotency_key, reservation, lambda: create_reservation(reservation)
+    )
+
+async def create_reservation(reservation: MobileReservation) -> Response:
+    try:
+        result = await post_reservation(
+            reservation.facility_id,
+            reservation.user_email,
+            reservation.start_time,
+            reservation.end_time,
+            reservation.notes or ""
+        )
+        logger.info("Mobile reservation created for user: %s", reservation.user_email)
+        # Add mobile-specific response data
+        result["mobile_booking"] = True
+        # Queued for delivery; False when the user has no registered device or the queue is full
+        result["push_notification_sent"] = push_dispatcher.notify(
+            reservation.user_email, "Reservation confirmed",
+            f"Your booking from {reservation.start_time} is confirmed",
+            {"type": "reservation_created", "reservation_id": result.get("id")},
+        )
+        result["calendar_invite_available"] = True
+        return FastJSONResponse(result)
             
-            if response.status_code == 200:
-                logger.info(f"Mobile reservation created for user: {reservation.user_email}")
-                result = response.json()
-                # Add mobile-specific response data
-                result["mobile_booking"] = True
-                result["push_notification_sent"] = True
-                result["calendar_invite_available"] = True
-                return result
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail="Failed to create reservation"
-                )
-                
     except httpx.RequestError as e:
-        logger.error(f"Mobile reservation error: {str(e)}")
+        logger.error("Mobile reservation error: %s", e)
         raise HTTPException(status_code=500, detail="Reservation service unavailable")
 
 @app.post("/mobile/reservations/quick-book")
 async def quick_book_facility(
     booking: QuickBookingRequest,
-    device_info: dict = Depends(get_device_info)
+    device_info: dict = Depends(get_device_info),
+    timeout: Optional[float] = Depends(get_request_deadline),
+    idempotency_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
 ):
-    """Quick booking feature for mobile - book next available slot"""
-    logger.info(f"Quick booking requested for facility: {booking.facility_id}")
+    """Quick booking feature for mobile - book next available slot.
+
+    Retries carrying the same Idempotency-Key (which needs a bearer token) get
+    the first attempt's booking.
+    """
+    return await idempotent(
+        authorization, idempotency_key, booking, lambda: quick_book(booking, timeout)
+    )
+
+async def quick_book(booking: QuickBookingRequest, timeout: Optional[float]) -> Response:
+    logger.info("Quick booking requested for facility: %s", booking.facility_id)
     
-    # This would find the next available slot and create reservation
-    # For demo purposes, returning success response
+    if booking.duration_minutes <= 0:
+        raise HTTPException(status_code=400, detail="duration_minutes must be positive")
+    await ensure_availability(booking.facility_id, timeout)
     
-    return {
-        "reservation_id": "quick_12345",
+    now = int(datetime.now().timestamp())
+    slot = availability.next_free(booking.facility_id, now, booking.duration_minutes * 60)
+    if slot is None:
+        raise HTTPException(status_code=409, detail="No free slot available")
+    start_time, end_time = format_iso(slot[0]), format_iso(slot[1])
+    
+    try:
+        result = await post_reservation(
+            booking.facility_id, booking.user_email or "", start_time, end_time, "Quick booking"
+        )
+    except httpx.RequestError as e:
+        logger.error("Quick booking error: %s", e)
+        raise HTTPException(status_code=500, detail="Reservation service unavailable")
+    
+    return FastJSONResponse({
+        "reservation_id": result.get("id"),
         "facility_id": booking.facility_id,
-        "start_time": "14:00",
-        "end_time": "15:00",
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "status": "confirmed",
-        "quick_booking": True,
-        "price": 30.00,
-        "currency": "EUR",
-        "confirmation_code": "QB12345"
+        "start_time": start_time,
+        "end_time": end_time,
+        "date": start_time[:10],
+        "status": result.get("status", "confirmed"),
+        "quick_booking": True
+    })
+
+def sync_record(reservation: Dict[str, Any]) -> Dict[str, Any]:
+    """Reservation service record in the shape the sync feed serves (as created by post_reservation)"""
+    return {
+        "facility_id": reservation.get("facilityId"),
+        "start_time": reservation.get("startTime"),
+        "end_time": reservation.get("endTime"),
+        "notes": reservation.get("notes") or "",
+        "status": reservation.get("status") or "confirmed",
     }
 
-@app.get("/mobile/reservations/user/{user_email}")
-async def get_user_reservations_mobile(user_email: str):
-    """Get user reservations with mobile-optimized response"""
-    logger.info(f"Mobile reservations requested for user: {user_email}")
-    
-    # This would call your reservation service
+async def seed_reservation_log(user_email: str) -> bool:
+    """Compare the user's sync feed with the reservation service when it is missing or due.
+
+    False when the listing failed and the cached feed is served as it is.
+    """
+    if not reservation_log.needs_seed(user_email):
+        return True
+    fetched_at = time.time()
+    try:
+        reservations = await fetch_reservations(user_email=user_email)
+    except (httpx.RequestError, HTTPException) as e:
+        if not reservation_log.has_feed(user_email):
+            logger.error("Reservation listing error: %s", e)
+            raise HTTPException(status_code=503, detail="Reservation service unavailable")
+        logger.warning("Serving the cached reservation feed of %s: %s", user_email, e)
+        return False
+    reservation_log.seed(user_email, (
+        dict(sync_record(r), id=str(r["id"])) for r in reservations
+        if isinstance(r, dict) and r.get("id") is not None and r.get("status") != "cancelled"
+    ), fetched_at)
+    return True
+
+def is_upcoming(reservation: Dict[str, Any], now: int) -> bool:
+    try:
+        return parse_iso(reservation["start_time"]) >= now
+    except ValueError:
+        return False
+
+async def reservations_snapshot(user_email: str, reset: bool = False) -> Dict[str, Any]:
+    """Full list of a user's reservations with the token for later delta syncs"""
+    reservations, sync_token = reservation_log.snapshot(user_email)
+    now = int(time.time())
     return {
         "user_email": user_email,
-        "reservations": [
-            {
-                "id": "res_123",
-                "facility_name": "Tennis Court A",
-                "date": "2025-06-12",
-                "start_time": "14:00",
-                "end_time": "15:00",
-                "status": "confirmed",
-                "can_cancel": True,
-                "facility_image": "thumb_tennis.jpg"
-            }
-        ],
-        "upcoming_count": 1,
+        "delta": False,
+        "reset": reset,
+        "reservations": reservations,
+        "deleted": [],
+        "upcoming_count": sum(1 for r in reservations if is_upcoming(r, now)),
+        "sync_token": sync_token,
         "mobile_optimized": True
     }
 
+@app.get("/mobile/reservations/user/{user_email}")
+async def get_user_reservations_mobile(
+    user_email: str,
+    since: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get user reservations; with `since` (a previous sync_token) only what changed.
+
+    A delta lists created or changed reservations plus the ids of cancelled
+    ones. If-None-Match with the last ETag gets a bare 304 when nothing changed.
+    """
+    logger.info("Mobile reservations requested for user: %s", user_email)
+    
+    await seed_reservation_log(user_email)
+    etag = reservation_log.etag(user_email)
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    delta = reservation_log.changes_since(user_email, since) if since else None
+    if delta is not None:
+        changed, deleted, sync_token = delta
+        body = {
+            "user_email": user_email,
+            "delta": True,
+            "reservations": changed,
+            "deleted": deleted,
+            "sync_token": sync_token,
+            "mobile_optimized": True
+        }
+    else:
+        # A stale or unknown token means the client must replace its copy
+        body = await reservations_snapshot(user_email, reset=since is not None)
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+@app.get("/mobile/reservations/{reservation_id}")
+async def get_mobile_reservation(reservation_id: str, request: Request):
+    """Reservation details, streamed through from the reservation service unchanged"""
+    try:
+        return await stream_proxy(
+            request, reservation_upstream, f"/reservations/{reservation_id}", RESERVATION_READ_POLICY
+        )
+    except httpx.RequestError as e:
+        logger.error("Get reservation error: %s", e)
+        raise HTTPException(status_code=503, detail="Reservation service unavailable")
+
 @app.delete("/mobile/reservations/{reservation_id}")
 async def cancel_mobile_reservation(reservation_id: str):
     """Cancel reservation with mobile-specific handling"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{RESERVATION_SERVICE_URL}/reservations/{reservation_id}"
+        response = await reservation_upstream.delete(
+            f"/reservations/{reservation_id}", policy=RESERVATION_WRITE_POLICY
+        )
+        
+        if response.status_code == 200:
+            logger.info("Mobile reservation cancelled: %s", reservation_id)
+            released = reserved_slots.pop(reservation_id, None)
+            if released:
+                availability.release(*released[:3])
+            owner = reservation_log.owner(reservation_id)
+            reservation_log.delete(reservation_id)
+            notified = owner is not None and push_dispatcher.notify(
+                owner, "Reservation cancelled", "Your booking was cancelled",
+                {"type": "reservation_cancelled", "reservation_id": reservation_id},
+            )
+            return {
+                "message": "Reservation cancelled successfully",
+                "reservation_id": reservation_id,
+                "refund_processed": True,
+                "mobile_notification_sent": notified
+            }
+        else:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail="Failed to cancel reservation"
             )
             
-            if response.status_code == 200:
-                logger.info(f"Mobile reservation cancelled: {reservation_id}")
-                return {
-                    "message": "Reservation cancelled successfully",
-                    "reservation_id": reservation_id,
-                    "refund_processed": True,
-                    "mobile_notification_sent": True
-                }
-            else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail="Failed to cancel reservation"
-                )
-                
     except httpx.RequestError as e:
-        logger.error(f"Mobile cancellation error: {str(e)}")
+        logger.error("Mobile cancellation error: %s", e)
         raise HTTPException(status_code=500, detail="Reservation service unavailable")
 
 # ============= MOBILE-SPECIFIC FEATURES =============
@@ -360,7 +1086,7 @@ async def get_mobile_user_profile(
     device_info: dict = Depends(get_device_info)
 ):
     """Get user profile with mobile-specific data"""
-    logger.info(f"Mobile profile requested for: {user_email}")
+    logger.info("Mobile profile requested for: %s", user_email)
     
     return {
         "email": user_email,
@@ -377,20 +1103,242 @@ async def get_mobile_user_profile(
 
 @app.post("/mobile/notifications/register")
 async def register_push_notifications(
-    user_email: str,
     push_token: str,
-    device_info: dict = Depends(get_device_info)
+    device_info: dict = Depends(get_device_info),
+    claims: dict = Depends(require_user)
 ):
-    """Register device for push notifications"""
-    logger.info(f"Push notification registered for: {user_email}")
+    """Register the caller's device for push notifications; a device registering again replaces its token"""
+    user_email = claims["sub"]
+    logger.info("Push notification registered for: %s", user_email)
     
-    # Here you would store the push token for the user
+    push_tokens.register(user_email, device_info["device_id"], push_token)
     return {
         "message": "Push notifications registered successfully",
         "user_email": user_email,
         "device_registered": True
     }
 
+# Per-section deadlines of the home screen, in seconds since the request started
+HOME_SECTION_TIMEOUTS = {
+    "profile": float(os.getenv("HOME_PROFILE_TIMEOUT", "0.3")),
+    "reservations": float(os.getenv("HOME_RESERVATIONS_TIMEOUT", "0.5")),
+    "nearby": float(os.getenv("HOME_NEARBY_TIMEOUT", "0.3")),
+    "availability": float(os.getenv("HOME_AVAILABILITY_TIMEOUT", "0.8")),
+}
+# Nearby facilities whose availability for today is included
+HOME_AVAILABILITY_FACILITIES = int(os.getenv("HOME_AVAILABILITY_FACILITIES", "5"))
+
+async def home_section(coro, deadline: float) -> Dict[str, Any]:
+    """Run one home-screen branch until `deadline` (loop time); failures become a status, not an error"""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    try:
+        data = await asyncio.wait_for(coro, max(0.0, deadline - start))
+        # A branch that had to fall back to cached data says so with "stale"
+        status = "degraded" if isinstance(data, dict) and data.get("stale") else "ok"
+    except asyncio.TimeoutError:
+        data, status = None, "timeout"
+    except HTTPException as e:
+        data, status = None, "error"
+        logger.warning("Home section failed: %s", e.detail)
+    except (httpx.RequestError, grpc.aio.AioRpcError) as e:
+        data, status = None, "error"
+        logger.warning("Home section failed: %s", e)
+    return {"status": status, "elapsed_ms": round((loop.time() - start) * 1000, 1), "data": data}
+
+async def home_reservations(user_email: str) -> Dict[str, Any]:
+    """The user's reservations, seeded from the reservation service like the sync route"""
+    fresh = await seed_reservation_log(user_email)
+    snapshot = await reservations_snapshot(user_email)
+    if not fresh:
+        snapshot["stale"] = True
+    return snapshot
+
+async def home_availability(nearby_task: asyncio.Task, deadline: float) -> Dict[str, Any]:
+    """Today's free slots of the closest facilities; facilities that miss the deadline are left out"""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    # Shielded so this branch giving up never cancels the nearby section itself
+    nearby = await asyncio.shield(nearby_task)
+    if nearby["status"] != "ok":
+        return {"status": "skipped", "elapsed_ms": 0.0, "data": None}
+
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    facility_ids = [f["id"] for f in nearby["data"]["facilities"][:HOME_AVAILABILITY_FACILITIES]]
+    remaining = max(0.0, deadline - loop.time())
+    loads = await asyncio.gather(
+        *(asyncio.wait_for(ensure_availability(fid, remaining), remaining) for fid in facility_ids),
+        return_exceptions=True
+    )
+    data = {}
+    for facility_id, loaded in zip(facility_ids, loads):
+        if isinstance(loaded, BaseException):
+            continue
+        data[facility_id] = [
+            {"start": format_iso(s), "end": format_iso(e)} for s, e in availability.free_on(facility_id, today)
+        ]
+    if len(data) == len(facility_ids):
+        status = "ok"
+    elif data:
+        status = "partial"
+    elif any(isinstance(loaded, asyncio.TimeoutError) for loaded in loads):
+        status = "timeout"
+    else:
+        status = "error"
+    return {"status": status, "elapsed_ms": round((loop.time() - start) * 1000, 1), "data": data}
+
+@app.get("/mobile/home")
+async def get_mobile_home(
+    user_email: str,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius: int = 5000,
+    limit: int = 10,
+    device_info: dict = Depends(get_device_info),
+    timeout: Optional[float] = Depends(get_request_deadline)
+):
+    """Everything the app's home screen needs in one round trip.
+
+    Profile, reservations, nearby facilities and their availability are fetched
+    concurrently, each with its own deadline (capped by X-Request-Timeout-Ms);
+    sections that fail or run late are reported in `sections` instead of
+    failing the whole response.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    def deadline(section: str) -> float:
+        budget = HOME_SECTION_TIMEOUTS[section]
+        return start + (min(budget, timeout) if timeout else budget)
+
+    branches = {
+        "profile": home_section(get_mobile_user_profile(user_email, device_info), deadline("profile")),
+        "reservations": home_section(home_reservations(user_email), deadline("reservations")),
+    }
+    if lat is not None and lng is not None:
+        nearby = asyncio.ensure_future(home_section(
+            get_nearby_facilities(lat, lng, radius, min(limit, 100), 0, device_info), deadline("nearby")
+        ))
+        branches["nearby"] = nearby
+        branches["availability"] = home_availability(nearby, deadline("availability"))
+
+    sections = dict(zip(branches, await asyncio.gather(*branches.values())))
+    for name in ("nearby", "availability"):
+        sections.setdefault(name, {"status": "skipped", "elapsed_ms": 0.0, "data": None})
+
+    result = {name: section["data"] for name, section in sections.items()}
+    result["sections"] = {
+        name: {"status": section["status"], "elapsed_ms": section["elapsed_ms"]}
+        for name, section in sections.items()
+    }
+    result["complete"] = all(s["status"] in ("ok", "skipped") for s in result["sections"].values())
+    result["elapsed_ms"] = round((loop.time() - start) * 1000, 1)
+    return result
+
+# Batch limits: sub-requests per batch, and how many of them run at once
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Parent headers that describe the batch body itself, not the sub-request
+BATCH_SKIP_HEADERS = {b"content-length", b"content-type", b"transfer-encoding"}
+
+async def dispatch_subrequest(parent: Request, sub: BatchSubRequest) -> Dict[str, Any]:
+    """Run one sub-request through the router directly: no HTTP parsing, middleware or socket"""
+    path, _, query = sub.path.partition("?")
+    body = b"" if sub.body is None else json.dumps(sub.body).encode()
+    headers = [(k, v) for k, v in parent.scope["headers"] if k not in BATCH_SKIP_HEADERS]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    for name, value in (sub.headers or {}).items():
+        headers = [(k, v) for k, v in headers if k != name.lower().encode()]
+        headers.append((name.lower().encode(), value.encode()))
+    scope = {
+        **{key: parent.scope[key] for key in ("app", "client", "server", "scheme", "http_version", "asgi")
+           if key in parent.scope},
+        # Lets HTTPException raised by a route become its normal JSON response
+        "starlette.exception_handlers": parent.scope.get("starlette.exception_handlers"),
+        "type": "http",
+        "method": sub.method.upper(),
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": headers,
+    }
+    if scope["starlette.exception_handlers"] is None:
+        del scope["starlette.exception_handlers"]
+
+    received = False
+    finished = asyncio.Event()
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Streaming responses listen for a disconnect; there is none until the sub-response is complete
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    status = 500
+    encoding = None
+    chunks = []
+    async def send(message):
+        nonlocal status, encoding
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-encoding":
+                    encoding = value.decode("latin-1").strip().lower()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        # Raised outside a route (e.g. no route matched), so no handler saw it
+        return {"status": e.status_code, "body": {"detail": e.detail}}
+    except Exception as e:
+        logger.error("Batch sub-request %s %s failed: %s", sub.method, path, e)
+        return {"status": 500, "body": {"detail": "Internal error"}}
+    finally:
+        finished.set()
+
+    raw = b"".join(chunks)
+    try:
+        # Pass-through routes relay the upstream's encoding; the batch reply is one JSON document
+        if encoding == "gzip":
+            raw = gzip.decompress(raw)
+        elif encoding == "deflate":
+            raw = zlib.decompress(raw)
+    except (OSError, zlib.error) as e:
+        logger.error("Batch sub-request %s %s returned an undecodable body: %s", sub.method, path, e)
+        return {"status": 502, "body": {"detail": "Undecodable upstream response"}}
+    try:
+        payload = json.loads(raw) if raw else None
+    except ValueError:
+        payload = raw.decode("utf-8", "replace")
+    return {"status": status, "body": payload}
+
+@app.post("/mobile/batch")
+async def mobile_batch(batch: BatchRequest, request: Request):
+    """Run several /mobile/* calls in one round trip; responses come back in request order"""
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REQUESTS} sub-requests per batch")
+    for sub in batch.requests:
+        if not sub.path.startswith("/mobile/") or sub.path.partition("?")[0] == "/mobile/batch":
+            raise HTTPException(status_code=400, detail=f"Unsupported batch path: {sub.path}")
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(sub: BatchSubRequest):
+        async with semaphore:
+            return await dispatch_subrequest(request, sub)
+
+    responses = await asyncio.gather(*(run(sub) for sub in batch.requests))
+    logger.info("Batch of %s sub-request(s) served", len(responses))
+    return {"responses": responses}
+
 @app.get("/mobile/health")
 async def mobile_health_check():
     """Health check for mobile gateway"""
@@ -406,6 +1354,46 @@ async def mobile_health_check():
         ]
     }
 
+@app.get("/mobile/health/auth")
+async def auth_cache_stats():
+    """Verified-token cache and revocation set statistics"""
+    return token_verifier.stats()
+
+@app.get("/mobile/health/upstreams")
+async def upstream_pool_stats():
+    """Connection pool utilisation for each upstream service"""
+    return upstreams.stats()
+
+@app.get("/mobile/health/logging")
+async def logging_pipeline_stats():
+    """Log queue depth and records dropped under overload"""
+    return {**logging_stats(), "access_log_sampled_out": access_log_sampler.sampled_out}
+
+@app.get("/mobile/health/cache")
+async def facility_cache_stats():
+    """Facility read cache: hits, stale hits, misses and coalesced reads"""
+    return facility_cache.stats()
+
+@app.get("/mobile/health/admission")
+async def admission_stats():
+    """Adaptive concurrency limit, in-flight requests and queue depth per priority class"""
+    return admission.stats()
+
+@app.get("/mobile/health/push")
+async def push_stats():
+    """Push queue depth, batching and delivery outcomes"""
+    return push_dispatcher.stats()
+
+@app.get("/mobile/health/idempotency")
+async def idempotency_stats():
+    """Idempotency-Key store: size, in-flight attempts and how many retries were deduplicated"""
+    return idempotency_store.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, upstream and gRPC metrics"""
+    return metrics_registry.response()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,304 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from common.metrics import registry
+
+logger = logging.getLogger("MobileGateway.push")
+
+# Per-message outcomes reported by a provider
+SENT = "sent"
+INVALID_TOKEN = "invalid_token"  # permanent: the token is removed from the store
+RETRY = "retry"  # transient: sent again after a backoff
+
+push_batch_seconds = registry.histogram("push_batch_duration_seconds", "Time to hand one batch to the provider")
+push_messages = registry.counter("push_messages_total", "Push messages by final outcome", ("outcome",))
+
+
+class Notification(NamedTuple):
+    user_email: str
+    title: str
+    body: str
+    data: Dict[str, Any]
+
+
+class PushMessage(NamedTuple):
+    token: str
+    payload: Dict[str, Any]
+
+
+class PushTokenStore:
+    """Push tokens indexed by user and device, plus a reverse index by token.
+
+    A device registering again replaces its old token; a token moving to
+    another user (re-login on a shared phone) is removed from the previous one.
+    Each user keeps at most `max_devices`, the least recently registered
+    device is dropped first.
+    """
+
+    def __init__(self, max_devices: int = 10):
+        self.max_devices = max_devices
+        self._by_user: Dict[str, "OrderedDict[str, str]"] = {}
+        self._by_token: Dict[str, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_token)
+
+    def register(self, user_email: str, device_id: Optional[str], token: str):
+        # Without a device id the token itself identifies the device
+        device_id = device_id or token
+        owner = self._by_token.get(token)
+        if owner is not None:
+            self._remove(*owner)
+        devices = self._by_user.setdefault(user_email, OrderedDict())
+        if device_id in devices:
+            self._by_token.pop(devices.pop(device_id), None)
+        devices[device_id] = token
+        self._by_token[token] = (user_email, device_id)
+        while len(devices) > self.max_devices:
+            _, dropped = devices.popitem(last=False)
+            self._by_token.pop(dropped, None)
+
+    def remove_token(self, token: str) -> bool:
+        owner = self._by_token.get(token)
+        if owner is None:
+            return False
+        self._remove(*owner)
+        return True
+
+    def _remove(self, user_email: str, device_id: str):
+        devices = self._by_user.get(user_email)
+        if devices is None or device_id not in devices:
+            return
+        self._by_token.pop(devices.pop(device_id), None)
+        if not devices:
+            del self._by_user[user_email]
+
+    def tokens_for(self, user_email: str) -> List[str]:
+        devices = self._by_user.get(user_email)
+        return list(devices.values()) if devices else []
+
+    def has_tokens(self, user_email: str) -> bool:
+        return user_email in self._by_user
+
+
+class LocalPushProvider:
+    """Stand-in for FCM/APNs: no network, a fixed cost per batch and per message,
+    optional random transient failures. Used for development and benchmarks."""
+
+    def __init__(self, max_batch: int = 500, batch_latency: float = 0.02, message_latency: float = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.max_batch = max_batch
+        self.batch_latency = batch_latency
+        self.message_latency = message_latency
+        self.failure_rate = failure_rate
+        self.invalid_tokens = set()
+        self.batches = 0
+        self.delivered = 0
+        self.recent: deque = deque(maxlen=100)
+        self._rng = random.Random(seed)
+
+    async def send_batch(self, messages: List[PushMessage]) -> List[str]:
+        await asyncio.sleep(self.batch_latency + self.message_latency * len(messages))
+        self.batches += 1
+        outcomes = []
+        for message in messages:
+            if message.token in self.invalid_tokens:
+                outcomes.append(INVALID_TOKEN)
+            elif self.failure_rate and self._rng.random() < self.failure_rate:
+                outcomes.append(RETRY)
+            else:
+                outcomes.append(SENT)
+                self.delivered += 1
+                self.recent.append(message)
+        return outcomes
+
+
+class PushDispatcher:
+    """Bounded job queue drained by a pool of workers that send in batches.
+
+    `notify` never blocks: when the queue is full the job is dropped and
+    counted. A worker takes up to `batch_size` jobs, waiting at most `linger`
+    seconds for more after the first. Jobs for the same user are merged into
+    one message per device, and the messages go to the provider in chunks of
+    its `max_batch`. Transient failures are retried with exponential backoff
+    and jitter, up to `max_retries` times.
+    """
+
+    def __init__(self, store: PushTokenStore, provider, queue_size: int = 10000, workers: int = 4,
+                 batch_size: int = 500, linger: float = 0.02, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, max_pending_retries: int = 10000):
+        self.store = store
+        self.provider = provider
+        self.queue_size = queue_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_pending_retries = max_pending_retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retries = set()
+        self._pending_retries = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.retried = 0
+        self.invalid = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        logger.info("Push dispatcher started with %s worker(s), queue size %s", self.workers, self.queue_size)
+
+    async def close(self, drain_timeout: float = 5.0):
+        """Send what is already queued (up to `drain_timeout`), then stop the workers."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Push dispatcher closed with %s job(s) unsent", self._queue.qsize())
+        for task in self._workers + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        logger.info("Push dispatcher stopped")
+
+    def notify(self, user_email: str, title: str, body: str, data: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue a notification for every device of the user; False if it was not queued."""
+        if self._queue is None or not self.store.has_tokens(user_email):
+            return False
+        try:
+            self._queue.put_nowait(Notification(user_email, title, body, data or {}))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self._queue.get()]
+            deadline = loop.time() + self.linger
+            while len(jobs) < self.batch_size:
+                if not self._queue.empty():
+                    jobs.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._dispatch(jobs)
+            except Exception:
+                logger.exception("Push dispatch of %s job(s) failed", len(jobs))
+            finally:
+                for _ in jobs:
+                    self._queue.task_done()
+
+    async def _dispatch(self, jobs: List[Notification]):
+        by_user: Dict[str, List[Notification]] = {}
+        for job in jobs:
+            by_user.setdefault(job.user_email, []).append(job)
+        self.coalesced += len(jobs) - len(by_user)
+        messages = []
+        for user_email, notifications in by_user.items():
+            payload = _merge(notifications)
+            messages.extend(PushMessage(token, payload) for token in self.store.tokens_for(user_email))
+        step = max(1, getattr(self.provider, "max_batch", 500))
+        await asyncio.gather(*(self._send(messages[i:i + step], 0) for i in range(0, len(messages), step)))
+
+    async def _send(self, batch: List[PushMessage], attempt: int):
+        start = time.perf_counter()
+        try:
+            outcomes = await self.provider.send_batch(batch)
+        except Exception as e:
+            logger.warning("Push provider failed a batch of %s: %s", len(batch), e)
+            outcomes = [RETRY] * len(batch)
+        push_batch_seconds.observe(time.perf_counter() - start)
+        retry = []
+        for message, outcome in zip(batch, outcomes):
+            if outcome == SENT:
+                self.sent += 1
+                push_messages.inc((SENT,))
+            elif outcome == INVALID_TOKEN:
+                self.invalid += 1
+                push_messages.inc((INVALID_TOKEN,))
+                self.store.remove_token(message.token)
+            else:
+                retry.append(message)
+        if retry:
+            self._schedule_retry(retry, attempt + 1)
+
+    def _schedule_retry(self, messages: List[PushMessage], attempt: int):
+        if attempt > self.max_retries or self._pending_retries + len(messages) > self.max_pending_retries:
+            self.failed += len(messages)
+            push_messages.inc(("failed",), len(messages))
+            logger.warning("Gave up on %s push message(s) after %s attempt(s)", len(messages), attempt)
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        self._pending_retries += len(messages)
+        task = asyncio.ensure_future(self._retry_later(messages, attempt, delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _retry_later(self, messages: List[PushMessage], attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        self._pending_retries -= len(messages)
+        self.retried += len(messages)
+        await self._send(messages, attempt)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": len(self.store),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "workers": len(self._workers),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "retried": self.retried,
+            "pending_retries": self._pending_retries,
+            "invalid_tokens": self.invalid,
+            "failed": self.failed,
+        }
+
+    def register_metrics(self):
+        registry.gauge("push_queue_depth", "Notification jobs waiting for a worker",
+                       function=lambda: {(): self._queue.qsize() if self._queue else 0})
+        registry.gauge("push_tokens", "Registered push tokens", function=lambda: {(): len(self.store)})
+        registry.counter(
+            "push_jobs_total", "Notification jobs by what happened on enqueue", ("outcome",),
+            function=lambda: {("enqueued",): self.enqueued, ("dropped",): self.dropped, ("coalesced",): self.coalesced},
+        )
+
+
+def _merge(notifications: List[Notification]) -> Dict[str, Any]:
+    """One payload per user: the latest notification, plus a count if others were merged into it."""
+    latest = notifications[-1]
+    payload = {"title": latest.title, "body": latest.body, "data": latest.data}
+    if len(notifications) > 1:
+        payload["collapsed"] = len(notifications)
+        payload["body"] = f"{latest.body} (+{len(notifications) - 1} more)"
+    return payload
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from common.metrics import registry
+
+logger = logging.getLogger("MobileGateway.cache")
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: float):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class CoalescingCache:
+    """Bounded LRU/TTL cache for upstream reads with request coalescing.
+
+    Concurrent misses for one key share a single in-flight load. Entries are
+    fresh for `ttl` seconds; for `stale_ttl` more they are still served while
+    one background load refreshes them (stale-while-revalidate). Failed loads
+    are not cached. `invalidate` drops the entry and detaches any in-flight
+    load, so a read that started before a write cannot store the old value.
+    """
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl: float = 5.0, stale_ttl: float = 30.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._load(key, loader).add_done_callback(self._log_refresh_failure)
+                return entry.value
+            del self._entries[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = self._load(key, loader)
+        # Shielded: a waiter that times out or is cancelled must not cancel the shared load
+        return await asyncio.shield(future)
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = asyncio.ensure_future(loader())
+        self._inflight[key] = future
+
+        def store(done: asyncio.Future):
+            if self._inflight.get(key) is not done:
+                return  # invalidated while loading
+            del self._inflight[key]
+            if done.cancelled() or done.exception() is not None:
+                return
+            self._entries[key] = _Entry(done.result(), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        future.add_done_callback(store)
+        return future
+
+    def _log_refresh_failure(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.refresh_failures += 1
+            logger.warning("Background refresh in %s cache failed: %s", self.name, future.exception())
+
+    def invalidate(self, key: Hashable):
+        self.invalidations += 1
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.stale_hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+    def register_metrics(self):
+        """Expose lookup outcomes and size, read at scrape time."""
+        registry.counter(
+            f"{self.name}_cache_lookups_total", "Cache lookups by outcome", ("outcome",),
+            function=lambda: {
+                ("hit",): self.hits, ("stale_hit",): self.stale_hits,
+                ("miss",): self.misses, ("coalesced",): self.coalesced,
+            },
+        )
+        registry.gauge(f"{self.name}_cache_size", "Entries in the cache", function=lambda: {(): len(self._entries)})
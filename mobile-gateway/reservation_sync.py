@@ -0,0 +1,190 @@
+import time
+import uuid
+import base64
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Tombstones are kept this long; older sync tokens get a full resync instead of a delta
+TOMBSTONE_RETENTION = 30 * 24 * 3600
+# Records (live or tombstones) kept per user; the oldest go first
+MAX_RECORDS_PER_USER = 1000
+# Users with a feed in memory; the least recently used are dropped and seeded again on demand
+MAX_USERS = 100000
+# Seconds before a user's feed is compared with the reservation service again
+RESEED_INTERVAL = 60.0
+
+
+class _UserFeed:
+    __slots__ = ("records", "last_seq", "horizon", "seeded_at")
+
+    def __init__(self, horizon: int = 0):
+        # reservation id -> (seq, record or None for a tombstone, changed_at), in seq order
+        self.records: "OrderedDict[str, Tuple[int, Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self.last_seq = 0
+        # Deltas from before this seq are incomplete (records were purged or never seen)
+        self.horizon = horizon
+        # When the feed was last compared with the reservation service (None: never)
+        self.seeded_at: Optional[float] = None
+
+
+class ReservationSyncLog:
+    """Per-user change feed of reservations for delta sync.
+
+    Every create, change or cancellation gets the next global sequence number;
+    a sync token encodes the sequence a client has seen plus the log's epoch,
+    so tokens from before a gateway restart (or before purged records) fall
+    back to a full resync rather than a wrong delta.
+
+    The reservation service is the source of truth: a user's feed is seeded
+    from it on first use and compared with it again every `reseed_interval`,
+    so a fresh process, another replica or a change made elsewhere still ends
+    up in snapshots and deltas. Feeds are capped at `max_records` entries and
+    `max_users` users; tombstones are queued in time order, so purging only
+    visits the expired ones.
+    """
+
+    def __init__(self, tombstone_retention: float = TOMBSTONE_RETENTION,
+                 max_records: int = MAX_RECORDS_PER_USER, max_users: int = MAX_USERS,
+                 reseed_interval: float = RESEED_INTERVAL):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.tombstone_retention = tombstone_retention
+        self.max_records = max(1, max_records)
+        self.max_users = max(1, max_users)
+        self.reseed_interval = reseed_interval
+        self._seq = 0
+        self._users: "OrderedDict[str, _UserFeed]" = OrderedDict()
+        self._owners: Dict[str, str] = {}
+        # (deleted_at, user, reservation id, seq) of every tombstone, oldest first
+        self._tombstones: Deque[Tuple[float, str, str, int]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def _feed(self, user_email: str, create: bool = False) -> Optional[_UserFeed]:
+        feed = self._users.get(user_email)
+        if feed is None and create:
+            # Whatever happened before this feed existed is unknown: older tokens resync
+            feed = self._users[user_email] = _UserFeed(horizon=self._seq)
+            while len(self._users) > self.max_users:
+                _, evicted = self._users.popitem(last=False)
+                for reservation_id in evicted.records:
+                    self._owners.pop(reservation_id, None)
+        elif feed is not None:
+            self._users.move_to_end(user_email)
+        return feed
+
+    def _append(self, user_email: str, reservation_id: str, record: Optional[Dict[str, Any]],
+                changed_at: Optional[float] = None):
+        self._seq += 1
+        changed_at = time.time() if changed_at is None else changed_at
+        feed = self._feed(user_email, create=True)
+        feed.records[reservation_id] = (self._seq, record, changed_at)
+        feed.records.move_to_end(reservation_id)
+        feed.last_seq = self._seq
+        if record is None:
+            self._tombstones.append((changed_at, user_email, reservation_id, self._seq))
+        while len(feed.records) > self.max_records:
+            dropped_id, (seq, _, _) = feed.records.popitem(last=False)
+            self._owners.pop(dropped_id, None)
+            feed.horizon = max(feed.horizon, seq)
+        self._purge()
+
+    def _purge(self):
+        cutoff = time.time() - self.tombstone_retention
+        while self._tombstones and self._tombstones[0][0] < cutoff:
+            _, user_email, reservation_id, seq = self._tombstones.popleft()
+            feed = self._users.get(user_email)
+            entry = feed.records.get(reservation_id) if feed is not None else None
+            # Skip entries already trimmed, evicted or replaced by a newer change
+            if entry is not None and entry[0] == seq:
+                del feed.records[reservation_id]
+                self._owners.pop(reservation_id, None)
+                feed.horizon = max(feed.horizon, seq)
+
+    def upsert(self, user_email: str, reservation_id: str, record: Dict[str, Any]):
+        self._owners[reservation_id] = user_email
+        self._append(user_email, reservation_id, dict(record, id=reservation_id))
+
+    def owner(self, reservation_id: str) -> Optional[str]:
+        """Email of the user who made `reservation_id`, if known."""
+        return self._owners.get(reservation_id)
+
+    def delete(self, reservation_id: str) -> bool:
+        user_email = self._owners.get(reservation_id)
+        if user_email is None:
+            return False
+        self._append(user_email, reservation_id, None)
+        return True
+
+    def needs_seed(self, user_email: str) -> bool:
+        """True if the user's feed is missing or due for a comparison with the reservation service."""
+        feed = self._users.get(user_email)
+        return feed is None or feed.seeded_at is None or time.time() - feed.seeded_at >= self.reseed_interval
+
+    def has_feed(self, user_email: str) -> bool:
+        return user_email in self._users
+
+    def seed(self, user_email: str, records: Iterable[Dict[str, Any]], fetched_at: float):
+        """Bring a user's feed in line with the reservation service's `records` (each with an "id").
+
+        Differences become ordinary changes and tombstones, so open deltas
+        pick them up. Entries changed after `fetched_at` are newer than the
+        listing and are left alone.
+        """
+        feed = self._feed(user_email, create=True)
+        upstream = {str(record["id"]): record for record in records}
+        for reservation_id, (_, record, changed_at) in list(feed.records.items()):
+            if record is not None and reservation_id not in upstream and changed_at <= fetched_at:
+                self._append(user_email, reservation_id, None)
+        for reservation_id, record in upstream.items():
+            entry = feed.records.get(reservation_id)
+            if entry is not None and entry[2] > fetched_at:
+                continue
+            record = dict(record, id=reservation_id)
+            if entry is None or entry[1] != record:
+                self._owners[reservation_id] = user_email
+                self._append(user_email, reservation_id, record)
+        feed.seeded_at = time.time()
+
+    def encode_token(self, seq: int) -> str:
+        return base64.urlsafe_b64encode(f"{self.epoch}:{seq}".encode()).decode().rstrip("=")
+
+    def decode_token(self, token: str) -> Optional[int]:
+        """Sequence number in `token`, or None if it is malformed or from another epoch."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            epoch, seq = raw.split(":")
+            return int(seq) if epoch == self.epoch else None
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def etag(self, user_email: str) -> str:
+        feed = self._users.get(user_email)
+        return f'"{self.epoch}-{feed.last_seq if feed else 0}"'
+
+    def snapshot(self, user_email: str) -> Tuple[List[Dict[str, Any]], str]:
+        """All live reservations of a user, plus the token to sync from next time."""
+        feed = self._feed(user_email)
+        if feed is None:
+            return [], self.encode_token(self._seq)
+        live = [record for _, record, _ in feed.records.values() if record is not None]
+        return live, self.encode_token(self._seq)
+
+    def changes_since(self, user_email: str, token: str) -> Optional[Tuple[List[Dict[str, Any]], List[str], str]]:
+        """(changed records, deleted ids, next token), or None when a full resync is needed."""
+        since = self.decode_token(token)
+        feed = self._feed(user_email)
+        if since is None or feed is None or since < feed.horizon:
+            return None
+        changed, deleted = [], []
+        # Records are in seq order, so only the tail past `since` is visited
+        for reservation_id, (seq, record, _) in reversed(feed.records.items()):
+            if seq <= since:
+                break
+            if record is None:
+                deleted.append(reservation_id)
+            else:
+                changed.append(record)
+        changed.reverse()
+        deleted.reverse()
+        return changed, deleted, self.encode_token(self._seq)
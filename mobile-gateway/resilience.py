@@ -0,0 +1,172 @@
+import os
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+
+# Safe to send twice: a retry or hedge cannot apply the change a second time
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+# Upstream replies that mean "try again", not "your request is wrong"
+RETRYABLE_STATUS = frozenset((502, 503, 504))
+
+
+class UpstreamUnavailable(HTTPException):
+    """The upstream's circuit is open; the client is told when to come back."""
+
+    def __init__(self, target: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"{target.capitalize()} service unavailable",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class UpstreamTimeout(HTTPException):
+    def __init__(self, target: str):
+        super().__init__(status_code=504, detail=f"{target.capitalize()} service timed out")
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    """How one route calls an upstream: deadline, retries and hedging.
+
+    `timeout` bounds each attempt (None leaves only the pool's httpx timeouts).
+    Retries and hedges are only made when repeating the request is safe, and
+    each one spends from the upstream's retry budget.
+    """
+    timeout: Optional[float] = None
+    retries: int = 0
+    hedge: bool = False
+    # Lower bound on the p95-based hedge delay, so a fast upstream is not doubled up
+    hedge_min_delay: float = 0.01
+    backoff: float = 0.05
+    # None: decided by the HTTP method
+    idempotent: Optional[bool] = None
+
+    @classmethod
+    def from_env(cls, prefix: str, **defaults) -> "CallPolicy":
+        """Route defaults overridable from the environment, e.g. RESERVATION_READ_TIMEOUT."""
+        policy = cls(**defaults)
+        timeout = os.getenv(f"{prefix}_TIMEOUT")
+        return cls(
+            timeout=(float(timeout) or None) if timeout is not None else policy.timeout,
+            retries=int(os.getenv(f"{prefix}_RETRIES", policy.retries)),
+            hedge=os.getenv(f"{prefix}_HEDGE", str(policy.hedge)).lower() in ("1", "true", "yes", "on"),
+            hedge_min_delay=policy.hedge_min_delay,
+            backoff=policy.backoff,
+            idempotent=policy.idempotent,
+        )
+
+
+class RetryBudget:
+    """Token bucket capping retries and hedges at `ratio` of first attempts.
+
+    Every call deposits `ratio` tokens and every retry or hedge withdraws one,
+    so when an upstream degrades the extra load stays proportional instead of
+    multiplying. `min_per_sec` lets low-traffic upstreams retry at all.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_sec: float = 5.0, window: float = 10.0):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.capacity = max(1.0, min_per_sec * window)
+        self.balance = self.capacity
+        self._updated = time.monotonic()
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.balance = min(self.capacity, self.balance + (now - self._updated) * self.min_per_sec)
+        self._updated = now
+
+    def deposit(self):
+        self._refill()
+        self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        self._refill()
+        if self.balance >= 1:
+            self.balance -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast for
+    `reset_timeout` seconds; then lets one probe through (half-open) whose
+    outcome closes or re-opens the circuit."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejections = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejections += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            self.rejections += 1
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.opens += 1
+            self._probing = False
+
+    def record_abandoned(self):
+        """The call was cancelled before it had an outcome; let another probe through."""
+        self._probing = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class LatencyTracker:
+    """p95 of recent successful attempts, re-sorted every `refresh_every` samples."""
+
+    def __init__(self, size: int = 256, min_samples: int = 20, refresh_every: int = 32):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._since_refresh = 0
+        self._p95: Optional[float] = None
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._p95 = None
+
+    def p95(self) -> Optional[float]:
+        if self._p95 is None and len(self.samples) >= self.min_samples:
+            ordered = sorted(self.samples)
+            self._p95 = ordered[int(0.95 * (len(ordered) - 1))]
+            self._since_refresh = 0
+        return self._p95
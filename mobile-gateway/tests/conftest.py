@@ -0,0 +1,25 @@
+import sys
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+GATEWAY_DIR = Path(__file__).resolve().parent.parent
+# Add the gateway directory to the system path
+sys.path.append(str(GATEWAY_DIR))
+
+
+def load_gateway():
+    """mobile-gateway.py as a module (its file name is not importable), executed once per test run."""
+    module = sys.modules.get("mobile_gateway")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("mobile_gateway", GATEWAY_DIR / "mobile-gateway.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["mobile_gateway"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def gateway():
+    return load_gateway()
@@ -0,0 +1,122 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add the gateway directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from admission import AdmissionController, AdmissionMiddleware, GradientLimit, PriorityRules, Rejected
+
+RULES = PriorityRules("default=normal,/r=critical,/profile=low,/health=exempt")
+
+
+def controller(limit: float, **kwargs) -> AdmissionController:
+    return AdmissionController(GradientLimit(initial=limit, min_limit=1), RULES, **kwargs)
+
+
+def test_priority_rules_longest_prefix_wins():
+    rules = PriorityRules("default=low,/mobile=normal,/mobile/reservations=critical,/mobile/health=exempt")
+    assert rules.priority_for("/mobile/reservations/7") == 0
+    assert rules.priority_for("/mobile/home") == 1
+    assert rules.priority_for("/other") == 2
+    assert rules.priority_for("/mobile/health") is None
+    with pytest.raises(ValueError):
+        PriorityRules("/x=urgent")
+
+
+def test_waiters_served_by_priority_then_round_robin_by_device():
+    async def scenario():
+        admission = controller(1)
+        await admission.acquire("holder", 1)
+        order = []
+
+        async def request(device, priority):
+            await admission.acquire(device, priority)
+            order.append(device)
+
+        tasks = [asyncio.ensure_future(request(d, p)) for d, p in [
+            ("a", 1), ("a", 1), ("a", 1), ("b", 1), ("low", 2), ("vip", 0),
+        ]]
+        await asyncio.sleep(0)
+        for _ in tasks:
+            admission.release_slot()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["vip", "a", "b", "a", "a", "low"]
+
+
+def test_overload_is_shed_with_retry_after():
+    async def scenario():
+        admission = controller(1, max_queue=2, max_queue_per_device=1, max_wait={0: 1.0, 1: 1.0, 2: 0.05})
+        await admission.acquire("holder", 1)
+        low = asyncio.ensure_future(admission.acquire("x", 2))
+        waiting = asyncio.ensure_future(admission.acquire("a", 1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Rejected) as device_full:
+            await admission.acquire("a", 1)
+        assert device_full.value.status_code == 429
+        # A full queue makes room for higher priority work by shedding the lowest class
+        critical = asyncio.ensure_future(admission.acquire("c", 0))
+        with pytest.raises(Rejected) as shed:
+            await low
+        assert (shed.value.status_code, shed.value.reason) == (503, "shed_for_priority")
+        assert shed.value.retry_after >= 1
+
+        admission.release_slot()
+        await critical
+        admission.release_slot()
+        await waiting
+        with pytest.raises(Rejected) as timed_out:
+            await admission.acquire("y", 2)
+        assert timed_out.value.reason == "queue_timeout"
+        assert admission.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_gradient_limit_follows_latency():
+    limit = GradientLimit(initial=20, min_limit=4)
+    for _ in range(50):
+        limit.on_sample(0.010, in_flight=20, overloaded=False)
+    grown = limit.limit
+    assert grown > 20
+    for _ in range(50):
+        limit.on_sample(0.050, in_flight=int(limit.limit), overloaded=False)
+    assert limit.limit < grown / 2
+    limit.on_sample(0.010, in_flight=1, overloaded=True)
+    assert limit.limit >= 4
+
+
+def test_middleware_rejects_with_json_and_exempts_probes():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/slow":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        admission = controller(1, max_queue_per_device=0)
+        transport = httpx.ASGITransport(app=AdmissionMiddleware(app, admission))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.ensure_future(client.get("/slow", headers={"X-Device-Id": "a"}))
+            await asyncio.sleep(0.01)
+            rejected = await client.get("/r/1", headers={"X-Device-Id": "a"})
+            probe = await client.get("/health")
+            release.set()
+            assert (await slow).status_code == 200
+        return rejected, probe, admission
+
+    rejected, probe, admission = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "1"
+    assert rejected.json()["reason"] == "device_queue_full"
+    assert probe.status_code == 200
+    assert admission.in_flight == 0
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from availability import AvailabilityEngine, FreeIntervals, parse_iso, format_iso
+from fake_facility_server import start_fake_facility_server
+
+H = 3600
+
+def test_add_merges_and_remove_splits():
+    free = FreeIntervals([(0, H), (H, 2 * H), (5 * H, 6 * H)])
+    assert list(free) == [(0, 2 * H), (5 * H, 6 * H)]
+
+    free.remove(H // 2, H)
+    assert list(free) == [(0, H // 2), (H, 2 * H), (5 * H, 6 * H)]
+
+    free.add(0, 7 * H)
+    assert list(free) == [(0, 7 * H)]
+
+def test_next_free_skips_short_gaps():
+    free = FreeIntervals([(0, H // 2), (H, 2 * H), (3 * H, 5 * H)])
+    assert free.next_free(0, H) == (H, 2 * H)
+    assert free.next_free(H + 1, H) == (3 * H, 4 * H)
+    assert free.next_free(0, 3 * H) is None
+
+def test_engine_day_query_and_reservations():
+    engine = AvailabilityEngine()
+    engine.load("f1", [
+        ("2025-06-11T09:00:00Z", "2025-06-11T10:00:00Z"),
+        ("2025-06-11T10:00:00Z", "2025-06-11T11:00:00Z"),
+        ("2025-06-12T09:00:00Z", "2025-06-12T10:00:00Z"),
+    ])
+    slots = [(format_iso(s), format_iso(e)) for s, e in engine.free_on("f1", "2025-06-11")]
+    assert slots == [("2025-06-11T09:00:00Z", "2025-06-11T11:00:00Z")]
+
+    start, end = parse_iso("2025-06-11T09:00:00Z"), parse_iso("2025-06-11T10:00:00Z")
+    assert engine.reserve("f1", start, end)
+    assert not engine.reserve("f1", start, end)
+    assert engine.next_free("f1", start, H) == (end, end + H)
+
+    engine.release("f1", start, end)
+    assert engine.facilities_free_in(start, end + H) == {"f1": (start, end + H)}
+
+def test_window_search_uses_day_index_and_skips_reserved():
+    engine = AvailabilityEngine()
+    day = parse_iso("2025-06-11T00:00:00Z")
+    engine.load("f1", [("2025-06-11T09:00:00Z", "2025-06-11T11:00:00Z")],
+                reserved=[(day + 9 * H, day + 10 * H)])
+    engine.load("f2", [("2025-06-12T09:00:00Z", "2025-06-12T10:00:00Z")])
+    assert engine.facilities_free_in(day, day + 24 * H, H) == {"f1": (day + 10 * H, day + 11 * H)}
+
+    assert engine.reserve("f1", day + 10 * H, day + 11 * H)
+    assert engine._by_day == {parse_iso("2025-06-12T00:00:00Z") // 86400: {"f2"}}
+    engine.forget("f2")
+    assert engine._by_day == {} and engine.facilities_free_in(day, day + 48 * H) == {}
+
+def test_gateway_index_is_loaded_from_facilities_and_reservations(gateway):
+    tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+    window = {"start": f"{tomorrow}T10:00:00Z", "end": f"{tomorrow}T11:00:00Z"}
+    posts = []
+
+    def reservation_handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, json=[{"id": "r1", "facilityId": "facility_0", "status": "confirmed",
+                                              "startTime": window["start"], "endTime": window["end"]}])
+        posts.append(request)
+        return httpx.Response(200, json={"id": "r2"})
+
+    async def scenario():
+        server, port, service = await start_fake_facility_server()
+        service.seed(2)
+        gateway.facility_client.target = f"127.0.0.1:{port}"
+        gateway.reservation_upstream._transport = httpx.MockTransport(reservation_handler)
+        gateway.availability = gateway.AvailabilityEngine()
+        transport = httpx.ASGITransport(app=gateway.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                loading = await client.get("/mobile/facilities/available", params=window)
+                async with gateway.lifespan(gateway.app):
+                    assert await gateway.refresh_availability() == 2
+                    available = await client.get("/mobile/facilities/available", params=window)
+                    booked = await client.post("/mobile/reservations", json={
+                        "facility_id": "facility_0", "user_email": "a@x",
+                        "start_time": window["start"], "end_time": window["end"]})
+        finally:
+            await server.stop(None)
+        return loading, available, booked
+
+    loading, available, booked = asyncio.run(scenario())
+    assert loading.status_code == 503
+    assert [f["facility_id"] for f in available.json()["facilities"]] == ["facility_1"]
+    assert booked.status_code == 409 and not posts
+
+
+def test_local_bookings_are_dropped_once_listed_and_added_time_keeps_bookings(gateway):
+    tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+    window = {"start": f"{tomorrow}T10:00:00Z", "end": f"{tomorrow}T11:00:00Z"}
+    listing = [{"id": "r1", "facilityId": "facility_0", "startTime": window["start"], "endTime": window["end"]}]
+
+    def reservation_handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(200, json=listing)
+        return httpx.Response(200, json={"id": "r2"})
+
+    async def scenario():
+        server, port, service = await start_fake_facility_server()
+        service.seed(2)
+        gateway.facility_client.target = f"127.0.0.1:{port}"
+        gateway.facility_cache.clear()
+        gateway.reservation_upstream._transport = httpx.MockTransport(reservation_handler)
+        gateway.availability = gateway.AvailabilityEngine()
+        gateway.reserved_slots.clear()
+        transport = httpx.ASGITransport(app=gateway.app)
+        free = lambda: gateway.availability.facilities_free_in(*gateway.parse_slot(window["start"], window["end"]))
+        try:
+            async with gateway.lifespan(gateway.app), \
+                    httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await gateway.refresh_availability()
+                booked = await client.post("/mobile/reservations", json={
+                    "facility_id": "facility_1", "user_email": "a@x",
+                    "start_time": window["start"], "end_time": window["end"]})
+                held = (set(gateway.reserved_slots), set(free()))
+                await gateway.refresh_availability()  # listed after r2 without it: cancelled elsewhere
+                released = (set(gateway.reserved_slots), set(free()))
+                added = await client.post("/mobile/facilities/facility_0/availability", json={
+                    "start": f"{tomorrow}T09:00:00Z", "end": f"{tomorrow}T12:00:00Z"})
+                after_add = set(free())
+        finally:
+            await server.stop(None)
+        return booked, held, released, added, after_add
+
+    booked, held, released, added, after_add = asyncio.run(scenario())
+    assert booked.status_code == 200 and added.status_code == 200
+    assert held == ({"r2"}, set())
+    assert released == (set(), {"facility_1"})
+    assert after_add == {"facility_1"}
@@ -0,0 +1,65 @@
+import gzip
+import asyncio
+
+import httpx
+
+from fake_facility_server import start_fake_facility_server
+
+
+async def post_batch(gateway, requests: list, headers: dict = None) -> httpx.Response:
+    server, port, service = await start_fake_facility_server()
+    service.seed(2)
+    gateway.facility_client.target = f"127.0.0.1:{port}"
+    try:
+        async with gateway.lifespan(gateway.app):
+            transport = httpx.ASGITransport(app=gateway.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/mobile/batch", json={"requests": requests}, headers=headers)
+    finally:
+        await server.stop(None)
+
+
+def test_batch_runs_sub_requests_in_order(gateway):
+    response = asyncio.run(post_batch(gateway, [
+        {"path": "/mobile/facilities/facility_1"},
+        {"path": "/mobile/facilities/missing"},
+        {"path": "/mobile/facilities/nearby?lat=abc&lng=1"},
+        {"method": "PUT", "path": "/mobile/facilities/facility_0/location", "body": {"lat": 46.0, "lng": 14.5}},
+        {"path": "/mobile/no-such-route"},
+        {"path": "/mobile/health", "headers": {"X-Device-Id": "phone-1"}},
+    ]))
+    assert response.status_code == 200
+    statuses = [r["status"] for r in response.json()["responses"]]
+    assert statuses == [200, 404, 422, 200, 404, 200]
+    assert response.json()["responses"][0]["body"]["id"] == "facility_1"
+
+
+def test_batch_rejects_nested_batches(gateway):
+    response = asyncio.run(post_batch(gateway, [{"method": "POST", "path": "/mobile/batch", "body": {"requests": []}}]))
+    assert response.status_code == 400
+
+
+class SlowStream(httpx.AsyncByteStream):
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def __aiter__(self):
+        for i in range(0, len(self.body), 8):
+            await asyncio.sleep(0.005)
+            yield self.body[i:i + 8]
+
+
+class StreamingTransport(httpx.AsyncBaseTransport):
+    """Reservation service stand-in whose gzip body arrives in slow chunks while the gateway streams it."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = gzip.compress(b'{"id": 7, "status": "confirmed"}')
+        return httpx.Response(200, stream=SlowStream(body), headers={
+            "content-type": "application/json", "content-encoding": "gzip"
+        })
+
+
+def test_batch_includes_streamed_pass_through_responses(gateway):
+    gateway.reservation_upstream._transport = StreamingTransport()
+    response = asyncio.run(post_batch(gateway, [{"path": "/mobile/reservations/7"}]))
+    assert response.json()["responses"] == [{"status": 200, "body": {"id": 7, "status": "confirmed"}}]
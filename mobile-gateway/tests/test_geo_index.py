@@ -0,0 +1,57 @@
+import sys
+import random
+from pathlib import Path
+
+# Add the gateway directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from geo_index import GeoGridIndex
+
+def test_query_matches_linear_scan():
+    rng = random.Random(7)
+    index = GeoGridIndex(cell_deg=0.02)
+    for i in range(2000):
+        index.upsert(str(i), 46.05 + rng.uniform(-0.5, 0.5), 14.5 + rng.uniform(-0.5, 0.5))
+
+    for radius in (100, 2000, 15000):
+        total, page = index.query(46.05, 14.5, radius)
+        expected = index.linear_query(46.05, 14.5, radius)
+        assert total == len(expected)
+        assert [item_id for item_id, _ in page] == [item_id for item_id, _ in expected]
+
+def test_points_just_inside_the_radius_north_and_south():
+    index = GeoGridIndex()
+    for i, dlat in enumerate((4995, -4995, 5005)):
+        index.upsert(f"p{i}", 46.05 + dlat / 111195.0, 14.5)
+    total, page = index.query(46.05, 14.5, 5000)
+    assert total == len(index.linear_query(46.05, 14.5, 5000)) == 2
+    assert sorted(item_id for item_id, _ in page) == ["p0", "p1"]
+
+def test_pagination_is_distance_sorted():
+    index = GeoGridIndex()
+    for i in range(10):
+        index.upsert(f"f{i}", 46.0 + i * 0.001, 14.5)
+
+    total, first = index.query(46.0, 14.5, 5000, limit=4)
+    _, second = index.query(46.0, 14.5, 5000, limit=4, offset=4)
+    assert total == 10
+    assert [item_id for item_id, _ in first + second] == [f"f{i}" for i in range(8)]
+
+def test_update_and_delete():
+    index = GeoGridIndex()
+    index.upsert("a", 46.0, 14.5, {"name": "Court"})
+    index.upsert("a", 10.0, 10.0)
+    assert index.query(46.0, 14.5, 1000)[0] == 0
+    assert index.query(10.0, 10.0, 1000)[1][0][0] == "a"
+    assert index.get("a")["data"] == {"name": "Court"}
+
+    assert index.remove("a")
+    assert len(index) == 0
+    assert index.query(10.0, 10.0, 1000)[0] == 0
+
+def test_antimeridian():
+    index = GeoGridIndex()
+    index.upsert("east", 0.0, 179.999)
+    index.upsert("west", 0.0, -179.999)
+    total, _ = index.query(0.0, 180.0, 1000)
+    assert total == 2
@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+
+from fake_facility_server import start_fake_facility_server
+from reservation_sync import ReservationSyncLog
+
+
+def no_reservations(request):
+    return httpx.Response(200, json=[])
+
+
+async def fetch_home(gateway, latency: float, availability_timeout: float, reservations=no_reservations) -> dict:
+    server, port, service = await start_fake_facility_server()
+    service.seed(3)
+    service.latency = latency
+    gateway.facility_client.target = f"127.0.0.1:{port}"
+    gateway.reservation_upstream._transport = httpx.MockTransport(reservations)
+    gateway.availability = gateway.AvailabilityEngine()
+    gateway.facility_cache.clear()
+    gateway.HOME_SECTION_TIMEOUTS["availability"] = availability_timeout
+    for i in range(3):
+        gateway.index_facility_location(f"facility_{i}", f"Facility {i}", "", {"lat": 46.05, "lng": 14.5 + i / 1000})
+    try:
+        async with gateway.lifespan(gateway.app):
+            transport = httpx.ASGITransport(app=gateway.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/mobile/home", params={
+                    "user_email": "a@example.com", "lat": 46.05, "lng": 14.5
+                })
+                assert response.status_code == 200
+                return response.json()
+    finally:
+        await server.stop(None)
+
+
+def test_home_aggregates_all_sections(gateway):
+    home = asyncio.run(fetch_home(gateway, latency=0.0, availability_timeout=2.0))
+    assert home["complete"]
+    assert home["profile"]["email"] == "a@example.com"
+    assert [f["id"] for f in home["nearby"]["facilities"]] == ["facility_0", "facility_1", "facility_2"]
+    assert set(home["availability"]) == {"facility_0", "facility_1", "facility_2"}
+    assert home["sections"]["availability"]["status"] == "ok"
+
+
+def test_home_returns_what_finished_before_a_slow_branch(gateway):
+    home = asyncio.run(fetch_home(gateway, latency=0.5, availability_timeout=0.1))
+    assert not home["complete"]
+    assert home["sections"]["availability"]["status"] == "timeout"
+    assert home["sections"]["profile"]["status"] == "ok"
+    assert home["nearby"]["total"] == 3
+    assert home["elapsed_ms"] < 400
+
+
+def test_home_seeds_reservations_and_flags_a_stale_feed(gateway):
+    booking = {"id": "r1", "facilityId": "facility_0", "userEmail": "a@example.com",
+               "startTime": "2030-01-01T10:00:00Z", "endTime": "2030-01-01T11:00:00Z"}
+
+    def listing(request):
+        mine = request.url.params.get("userEmail") == "a@example.com"
+        return httpx.Response(200, json=[booking] if mine else [])
+
+    gateway.reservation_log = ReservationSyncLog(reseed_interval=0)
+    home = asyncio.run(fetch_home(gateway, latency=0.0, availability_timeout=2.0, reservations=listing))
+    assert home["sections"]["reservations"]["status"] == "ok"
+    assert [r["id"] for r in home["reservations"]["reservations"]] == ["r1"]
+
+    # The reservation service is down: the cached feed is served, marked degraded
+    home = asyncio.run(fetch_home(gateway, latency=0.0, availability_timeout=2.0,
+                                  reservations=lambda request: httpx.Response(500)))
+    assert home["sections"]["reservations"]["status"] == "degraded"
+    assert not home["complete"]
+    assert [r["id"] for r in home["reservations"]["reservations"]] == ["r1"]
+
+
+def test_impatient_caller_does_not_fail_the_shared_facility_load(gateway):
+    async def scenario():
+        server, port, service = await start_fake_facility_server()
+        service.seed(1)
+        service.latency = 0.05
+        gateway.facility_client.target = f"127.0.0.1:{port}"
+        gateway.facility_cache.clear()
+        try:
+            async with gateway.lifespan(gateway.app):
+                impatient = asyncio.ensure_future(gateway.fetch_facility("facility_0", 0.01))
+                await asyncio.sleep(0.005)  # the impatient caller starts the shared load
+                patient = await gateway.fetch_facility("facility_0")
+                return await asyncio.gather(impatient, return_exceptions=True) + [patient]
+        finally:
+            await server.stop(None)
+
+    impatient, patient = asyncio.run(scenario())
+    assert getattr(impatient, "status_code", None) == 504
+    assert patient.id == "facility_0"
+
+
+def test_facility_locations_live_in_the_facility_service(gateway):
+    async def scenario():
+        server, port, service = await start_fake_facility_server()
+        service.seed(2)
+        gateway.facility_client.target = f"127.0.0.1:{port}"
+        gateway.reservation_upstream._transport = httpx.MockTransport(no_reservations)
+        gateway.facility_index = gateway.GeoGridIndex()
+        try:
+            async with gateway.lifespan(gateway.app):
+                await gateway.refresh_availability()
+                preloaded = sorted(gateway.facility_index.linear_query(46.05, 14.5, 1000))
+                transport = httpx.ASGITransport(app=gateway.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    missing = await client.put("/mobile/facilities/missing/location", json={"lat": 1, "lng": 2})
+                    moved = await client.put("/mobile/facilities/facility_1/location", json={"lat": 45.0, "lng": 14.0})
+                    created = await client.post("/mobile/facilities", json={
+                        "name": "Court", "description": "", "location": {"lat": 45.0, "lng": 14.001}
+                    })
+                    nearby = await client.get("/mobile/facilities/nearby", params={"lat": 45.0, "lng": 14.0})
+                return preloaded, missing, moved, created.json(), nearby.json(), service
+        finally:
+            await server.stop(None)
+
+    preloaded, missing, moved, created, nearby, service = asyncio.run(scenario())
+    assert [facility_id for facility_id, _ in preloaded] == ["facility_0", "facility_1"]
+    assert missing.status_code == 404
+    assert "missing" not in gateway.facility_index
+    assert moved.json()["location"] == {"lat": 45.0, "lng": 14.0}
+    assert service.facilities["facility_1"].location.lat == 45.0
+    assert created["location"] == {"lat": 45.0, "lng": 14.001}
+    assert service.facilities[created["id"]].location.lng == 14.001
+    assert [f["id"] for f in nearby["facilities"]] == ["facility_1", created["id"]]
@@ -0,0 +1,146 @@
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+
+from fake_facility_server import start_fake_facility_server
+from idempotency import REPLAY_HEADER, IdempotencyKeyReused, IdempotencyStore, OutcomeUnknown
+
+
+def test_duplicates_wait_for_or_replay_the_first_attempt():
+    async def scenario():
+        store = IdempotencyStore()
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return Response(b'{"id":%d}' % len(calls), media_type="application/json")
+
+        first, duplicate = await asyncio.gather(
+            store.run("a@x", "k1", b"body", handler), store.run("a@x", "k1", b"body", handler)
+        )
+        later = await store.run("a@x", "k1", b"body", handler)
+        other_user = await store.run("b@x", "k1", b"body", handler)
+        with pytest.raises(IdempotencyKeyReused):
+            await store.run("a@x", "k1", b"other body", handler)
+        return calls, first, duplicate, later, other_user, store
+
+    calls, first, duplicate, later, other_user, store = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert first.body == duplicate.body == later.body == b'{"id":1}'
+    assert REPLAY_HEADER not in first.headers and later.headers[REPLAY_HEADER] == "true"
+    assert other_user.body == b'{"id":2}'
+    assert store.stats()["dedup_ratio"] == 0.5 and store.conflicts == 1
+
+
+def test_in_flight_entries_are_never_evicted():
+    async def scenario():
+        store = IdempotencyStore(max_entries=1)
+        release = asyncio.Event()
+        calls = []
+
+        async def slow():
+            calls.append("slow")
+            await release.wait()
+            return Response(b"slow")
+
+        first = asyncio.ensure_future(store.run("a@x", "k1", b"", slow))
+        await asyncio.sleep(0)
+        await store.run("a@x", "k2", b"", lambda: asyncio.sleep(0, Response(b"fast")))
+        retry = asyncio.ensure_future(store.run("a@x", "k1", b"", slow))
+        await asyncio.sleep(0)
+        release.set()
+        return calls, (await first).body, (await retry).body
+
+    calls, first, retry = asyncio.run(scenario())
+    assert calls == ["slow"] and first == retry == b"slow"
+
+
+def test_timeouts_after_sending_are_stored_as_unknown_outcome():
+    async def scenario():
+        store = IdempotencyStore()
+        calls = []
+
+        async def handler():
+            calls.append(1)
+            try:
+                raise httpx.ReadTimeout("read timed out")
+            except httpx.RequestError:
+                raise HTTPException(500, "Reservation service unavailable")
+
+        for _ in range(2):
+            with pytest.raises(OutcomeUnknown):
+                await store.run("a@x", "k", b"", handler)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 1
+
+
+def test_server_errors_are_not_stored_but_client_errors_are():
+    async def scenario():
+        store = IdempotencyStore(max_entries=2)
+        outcomes = iter([HTTPException(503, "down"), HTTPException(409, "taken")])
+
+        async def handler():
+            raise next(outcomes)
+
+        for expected in (503, 409, 409):
+            with pytest.raises(HTTPException) as e:
+                await store.run("a@x", "k", b"", handler)
+            assert e.value.status_code == expected
+        for key in ("k2", "k3"):
+            await store.run("a@x", key, b"", lambda: asyncio.sleep(0, Response(b"ok")))
+        return store
+
+    store = asyncio.run(scenario())
+    assert (store.executed, store.replayed, store.evictions, len(store)) == (4, 1, 1, 2)
+
+
+def test_retried_reservation_is_booked_upstream_once(gateway):
+    async def scenario():
+        posts = []
+
+        async def reservation_handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                return httpx.Response(200, json=[])
+            posts.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"id": len(posts), "status": "confirmed"})
+
+        server, port, service = await start_fake_facility_server()
+        service.seed(1)
+        gateway.facility_client.target = f"127.0.0.1:{port}"
+        gateway.facility_cache.clear()
+        gateway.availability = gateway.AvailabilityEngine()
+        gateway.reservation_upstream._transport = httpx.MockTransport(reservation_handler)
+        tomorrow = datetime.now(timezone.utc).date() + timedelta(days=1)
+        body = {"facility_id": "facility_0", "user_email": "a@x", "start_time": f"{tomorrow}T10:00:00Z",
+                "end_time": f"{tomorrow}T11:00:00Z"}
+        token = jwt.encode({"sub": "a@x", "exp": int(time.time()) + 60}, gateway.JWT_SECRET, algorithm="HS256")
+        headers = {"Idempotency-Key": "retry-1", "Authorization": f"Bearer {token}"}
+        async with gateway.lifespan(gateway.app):
+            transport = httpx.ASGITransport(app=gateway.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first, second = await asyncio.gather(
+                    client.post("/mobile/reservations", json=body, headers=headers),
+                    client.post("/mobile/reservations", json=body, headers=headers),
+                )
+                retry = await client.post("/mobile/reservations", json=body, headers=headers)
+                anonymous = await client.post("/mobile/reservations", json=body, headers={"Idempotency-Key": "retry-1"})
+                assert anonymous.status_code == 401
+                stats = (await client.get("/mobile/health/idempotency")).json()
+        await server.stop(None)
+        return posts, first, second, retry, stats
+
+    posts, first, second, retry, stats = asyncio.run(scenario())
+    assert len(posts) == 1
+    assert first.json() == second.json() == retry.json()
+    assert first.json()["id"] == 1 and retry.headers[REPLAY_HEADER] == "true"
+    assert (stats["executed"], stats["coalesced"], stats["replayed"]) == (1, 1, 1)
@@ -0,0 +1,43 @@
+import sys
+import json
+import queue
+import logging
+from pathlib import Path
+
+# Add the repository root (for the shared `common` package) to the system path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.logging_setup import JsonFormatter, DroppingQueueHandler, AccessLogSampler
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    log = logging.getLogger("test_logging.drops")
+    log.propagate = False
+    log.addHandler(handler)
+    for i in range(5):
+        log.warning("record %s", i)
+    assert handler.enqueued == 2
+    assert handler.dropped == 3
+    # Records are queued unformatted; args are merged by the listener's formatter
+    record = handler.queue.get_nowait()
+    assert record.msg == "record %s" and record.args == (0,)
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.LogRecord("gw", logging.INFO, __file__, 1, "%s %s", ("GET", "/x"), None)
+    record.status = 200
+    entry = json.loads(JsonFormatter("mobile-gateway").format(record))
+    assert entry["message"] == "GET /x"
+    assert entry["service"] == "mobile-gateway"
+    assert entry["status"] == 200
+
+
+def test_access_log_sampler_uses_longest_prefix():
+    sampler = AccessLogSampler("default=1.0,/mobile=0.5,/mobile/health=0")
+    assert sampler.rate_for("/mobile/health/auth") == 0
+    assert sampler.rate_for("/mobile/facilities") == 0.5
+    assert sampler.rate_for("/other") == 1.0
+    assert not sampler.should_log("/mobile/health")
+    assert sampler.should_log("/other")
+    assert sampler.sampled_out == 1
@@ -0,0 +1,93 @@
+import gzip
+import asyncio
+
+import httpx
+
+import fast_json
+
+
+def test_merge_object_appends_keys():
+    assert fast_json.loads(fast_json.merge_object(b' {"token": "t", "a": 1} ', {"a": 2, "b": None})) == {
+        "token": "t", "a": 2, "b": None
+    }
+    assert fast_json.loads(fast_json.merge_object(b"{ }", {"b": True})) == {"b": True}
+    # Keys already in the object are replaced, never emitted twice
+    assert fast_json.merge_object(b'{"a": 1, "c": [1]}', {"a": 2}) == b'{"a":2,"c":[1]}'
+
+
+class UnbufferedTransport(httpx.AsyncBaseTransport):
+    """Like httpx.MockTransport, but leaves the body unread so it can be streamed."""
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return self.handler(request)
+
+
+def json_reply(status: int, payload, **headers) -> httpx.Response:
+    return httpx.Response(status, stream=httpx.ByteStream(fast_json.dumps(payload)), headers={
+        "content-type": "application/json", **headers
+    })
+
+
+async def call_gateway(gateway, method: str, path: str, auth_reply: httpx.Response = None, **kwargs) -> httpx.Response:
+    seen = {}
+
+    def auth_handler(request: httpx.Request) -> httpx.Response:
+        seen["auth_headers"] = request.headers
+        return auth_reply or json_reply(200, {"access_token": "abc", "token_type": "bearer"})
+
+    def reservation_handler(request: httpx.Request) -> httpx.Response:
+        seen["headers"] = request.headers
+        body = gzip.compress(b'{"id": 7, "status": "confirmed"}')
+        return httpx.Response(200, stream=httpx.ByteStream(body), headers=[
+            ("content-type", "application/json"), ("content-encoding", "gzip"), ("x-upstream", "1"),
+            ("set-cookie", "a=1"), ("set-cookie", "b=2"),
+        ])
+
+    gateway.auth_upstream._transport = UnbufferedTransport(auth_handler)
+    gateway.reservation_upstream._transport = UnbufferedTransport(reservation_handler)
+    async with gateway.lifespan(gateway.app):
+        transport = httpx.ASGITransport(app=gateway.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.request(method, path, **kwargs)
+            response.seen = seen
+            return response
+
+
+def test_login_adds_mobile_fields_to_upstream_reply(gateway):
+    response = asyncio.run(call_gateway(gateway, "POST", "/mobile/auth/login", json={
+        "email": "a@example.com", "password": "pw", "device_id": "phone-1"
+    }))
+    assert response.status_code == 200
+    assert response.json() == {
+        "access_token": "abc", "token_type": "bearer",
+        "mobile_login": True, "device_id": "phone-1", "push_notifications_enabled": False,
+    }
+    # The user service throttles per client, so it must see the phone's address, not the gateway's
+    assert response.seen["auth_headers"]["x-forwarded-for"] == "127.0.0.1"
+
+
+def test_login_relays_upstream_errors_and_rejects_non_object_replies(gateway):
+    login = {"email": "a@example.com", "password": "bad"}
+    denied = asyncio.run(call_gateway(gateway, "POST", "/mobile/auth/login", json=login, auth_reply=json_reply(
+        401, {"detail": "Invalid credentials"}, **{"WWW-Authenticate": "Bearer"}
+    )))
+    assert denied.status_code == 401
+    assert denied.json() == {"detail": "Invalid credentials"}
+    assert denied.headers["www-authenticate"] == "Bearer"
+
+    garbled = asyncio.run(call_gateway(gateway, "POST", "/mobile/auth/login", json=login, auth_reply=json_reply(200, [1])))
+    assert garbled.status_code == 502
+
+
+def test_stream_proxy_relays_encoded_body_and_headers(gateway):
+    response = asyncio.run(call_gateway(gateway, "GET", "/mobile/reservations/7", headers={"X-Device-Id": "phone-1"}))
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["x-upstream"] == "1"
+    assert response.headers.get_list("set-cookie") == ["a=1", "b=2"]
+    assert response.json() == {"id": 7, "status": "confirmed"}
+    assert response.seen["headers"]["x-device-id"] == "phone-1"
+    assert response.seen["headers"]["host"] != "test"
@@ -0,0 +1,115 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import jwt
+import httpx
+
+# Add the gateway directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from push import RETRY, LocalPushProvider, PushDispatcher, PushTokenStore
+
+
+def test_token_store_indexes_by_user_and_device():
+    store = PushTokenStore(max_devices=2)
+    store.register("a@x", "phone", "t1")
+    store.register("a@x", "phone", "t2")  # same device, new token
+    store.register("a@x", None, "t3")
+    assert store.tokens_for("a@x") == ["t2", "t3"]
+    store.register("b@x", "tablet", "t2")  # token moved to another user
+    assert store.tokens_for("a@x") == ["t3"]
+    store.register("b@x", "watch", "t4")
+    store.register("b@x", "laptop", "t5")  # over the cap: the oldest device goes
+    assert store.tokens_for("b@x") == ["t4", "t5"]
+    assert store.remove_token("t3") and not store.has_tokens("a@x")
+    assert len(store) == 2
+
+
+def test_jobs_are_coalesced_per_user_and_batched():
+    async def scenario():
+        store = PushTokenStore()
+        for i in range(5):
+            store.register(f"user{i}@x", "phone", f"tok{i}")
+        store.register("user0@x", "tablet", "tok0b")
+        provider = LocalPushProvider(max_batch=4, batch_latency=0)
+        dispatcher = PushDispatcher(store, provider, workers=1, linger=0.01)
+        await dispatcher.start()
+        for i in range(5):
+            assert dispatcher.notify(f"user{i}@x", "Booked", f"#{i}")
+        assert dispatcher.notify("user0@x", "Cancelled", "#0")
+        assert not dispatcher.notify("nobody@x", "Booked", "#9")
+        await dispatcher.close()
+        return provider, dispatcher
+
+    provider, dispatcher = asyncio.run(scenario())
+    # 6 jobs -> 5 users -> 6 device messages -> batches of 4 + 2
+    assert dispatcher.coalesced == 1
+    assert (provider.batches, provider.delivered, dispatcher.sent) == (2, 6, 6)
+    merged = [m.payload for m in provider.recent if m.token == "tok0b"][0]
+    assert merged["title"] == "Cancelled" and merged["collapsed"] == 2
+
+
+def test_invalid_tokens_removed_and_transient_failures_retried():
+    class FlakyProvider(LocalPushProvider):
+        async def send_batch(self, messages):
+            outcomes = await super().send_batch(messages)
+            if self.batches == 1:
+                return [RETRY if o == "sent" else o for o in outcomes]
+            return outcomes
+
+    async def scenario():
+        store = PushTokenStore()
+        store.register("a@x", "phone", "good")
+        store.register("a@x", "old-phone", "stale")
+        provider = FlakyProvider(batch_latency=0)
+        provider.invalid_tokens.add("stale")
+        dispatcher = PushDispatcher(store, provider, linger=0, backoff_base=0.01)
+        await dispatcher.start()
+        dispatcher.notify("a@x", "Booked", "hi")
+        for _ in range(100):
+            if dispatcher.sent:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.close()
+        return store, dispatcher
+
+    store, dispatcher = asyncio.run(scenario())
+    assert store.tokens_for("a@x") == ["good"]
+    assert (dispatcher.invalid, dispatcher.retried, dispatcher.sent, dispatcher.failed) == (1, 1, 1, 0)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    async def scenario():
+        store = PushTokenStore()
+        store.register("a@x", "phone", "t")
+        dispatcher = PushDispatcher(store, LocalPushProvider(batch_latency=0), queue_size=2, workers=1)
+        await dispatcher.start()
+        accepted = [dispatcher.notify("a@x", "n", str(i)) for i in range(4)]
+        await dispatcher.close()
+        return accepted, dispatcher
+
+    accepted, dispatcher = asyncio.run(scenario())
+    assert accepted == [True, True, False, False]
+    assert dispatcher.dropped == 2
+
+
+def test_push_registration_is_bound_to_the_token_subject(gateway):
+    async def scenario():
+        gateway.push_tokens.remove_token("attacker-token")
+        token = jwt.encode({"sub": "attacker@x", "exp": int(time.time()) + 60}, gateway.JWT_SECRET, algorithm="HS256")
+        transport = httpx.ASGITransport(app=gateway.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            params = {"user_email": "victim@x", "push_token": "attacker-token"}
+            anonymous = await client.post("/mobile/notifications/register", params=params)
+            registered = await client.post("/mobile/notifications/register", params=params, headers={
+                "Authorization": f"Bearer {token}", "X-Device-Id": "phone"
+            })
+        return anonymous, registered
+
+    anonymous, registered = asyncio.run(scenario())
+    assert anonymous.status_code == 401
+    assert registered.json()["user_email"] == "attacker@x"
+    assert gateway.push_tokens.tokens_for("attacker@x") == ["attacker-token"]
+    assert not gateway.push_tokens.has_tokens("victim@x")
@@ -0,0 +1,81 @@
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the gateway directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from read_cache import CoalescingCache
+
+
+class Loader:
+    def __init__(self, delay: float = 0.01):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.calls
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = CoalescingCache("test")
+        load = Loader()
+        results = await asyncio.gather(*(cache.get("a", load) for _ in range(50)))
+        assert results == [1] * 50
+        assert load.calls == 1
+        assert await cache.get("a", load) == 1
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 49, 1)
+
+
+def test_stale_entries_are_served_while_refreshing():
+    async def scenario():
+        cache = CoalescingCache("test", ttl=0.0, stale_ttl=60)
+        load = Loader()
+        assert await cache.get("a", load) == 1
+        # Stale: old value now, one background refresh for both callers
+        assert await cache.get("a", load) == 1
+        assert await cache.get("a", load) == 1
+        await asyncio.sleep(0.05)
+        assert load.calls == 2
+        assert await cache.get("a", load) == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_during_a_load_discards_its_result():
+    async def scenario():
+        cache = CoalescingCache("test")
+        load = Loader()
+        first = asyncio.ensure_future(cache.get("a", load))
+        await asyncio.sleep(0)
+        cache.invalidate("a")
+        assert await first == 1
+        assert len(cache) == 0
+        assert await cache.get("a", load) == 2
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_not_cached_and_lru_is_bounded():
+    async def scenario():
+        cache = CoalescingCache("test", max_entries=2)
+
+        async def fail():
+            raise RuntimeError("upstream down")
+
+        try:
+            await cache.get("x", fail)
+        except RuntimeError:
+            pass
+        assert len(cache) == 0
+        for key in ("a", "b", "c"):
+            await cache.get(key, Loader(0))
+        assert len(cache) == 2 and cache.evictions == 1
+
+    asyncio.run(scenario())
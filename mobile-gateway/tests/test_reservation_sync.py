@@ -0,0 +1,95 @@
+import time
+import asyncio
+
+import httpx
+
+from reservation_sync import ReservationSyncLog
+
+
+def test_delta_contains_only_changes_and_tombstones():
+    log = ReservationSyncLog()
+    log.upsert("a@x", "1", {"facility_id": "f1", "start_time": "2030-01-01T10:00:00Z"})
+    log.upsert("b@x", "2", {"facility_id": "f1", "start_time": "2030-01-01T11:00:00Z"})
+    reservations, token = log.snapshot("a@x")
+    assert [r["id"] for r in reservations] == ["1"]
+
+    log.upsert("a@x", "3", {"facility_id": "f2", "start_time": "2030-01-02T10:00:00Z"})
+    assert log.delete("1")
+    changed, deleted, next_token = log.changes_since("a@x", token)
+    assert [r["id"] for r in changed] == ["3"]
+    assert deleted == ["1"]
+    assert log.changes_since("a@x", next_token)[:2] == ([], [])
+
+
+def test_foreign_or_purged_tokens_force_a_resync():
+    log = ReservationSyncLog(tombstone_retention=0)
+    _, token = log.snapshot("a@x")
+    assert log.changes_since("a@x", "not-a-token") is None
+    assert ReservationSyncLog().changes_since("a@x", token) is None
+    log.upsert("a@x", "1", {})
+    log.delete("1")
+    log.upsert("a@x", "2", {})  # purges the expired tombstone
+    assert log.changes_since("a@x", token) is None
+
+
+def test_etag_changes_with_the_users_feed_only():
+    log = ReservationSyncLog()
+    before = log.etag("a@x")
+    log.upsert("b@x", "1", {})
+    assert log.etag("a@x") == before
+    log.upsert("a@x", "2", {})
+    assert log.etag("a@x") != before
+
+
+def test_seeding_from_upstream_turns_differences_into_changes():
+    log = ReservationSyncLog()
+    assert log.needs_seed("a@x")
+    log.seed("a@x", [{"id": "1", "status": "confirmed"}, {"id": "2", "status": "confirmed"}], time.time())
+    reservations, token = log.snapshot("a@x")
+    assert [r["id"] for r in reservations] == ["1", "2"] and not log.needs_seed("a@x")
+
+    fetched_at = time.time()
+    log.upsert("a@x", "4", {"status": "confirmed"})  # booked after the listing was read
+    log.seed("a@x", [{"id": "1", "status": "confirmed"}, {"id": "3", "status": "confirmed"}], fetched_at)
+    changed, deleted, _ = log.changes_since("a@x", token)
+    assert [r["id"] for r in changed] == ["4", "3"] and deleted == ["2"]
+
+
+def test_feeds_are_capped_and_only_expired_tombstones_are_visited():
+    log = ReservationSyncLog(max_records=2, max_users=2)
+    _, token = log.snapshot("a@x")
+    for reservation_id in ("1", "2", "3"):
+        log.upsert("a@x", reservation_id, {})
+    assert [r["id"] for r in log.snapshot("a@x")[0]] == ["2", "3"]
+    assert log.owner("1") is None and log.changes_since("a@x", token) is None
+
+    log.upsert("b@x", "4", {})
+    log.upsert("c@x", "5", {})  # over max_users: a@x is evicted
+    assert not log.has_feed("a@x") and log.needs_seed("a@x") and log.owner("2") is None
+
+    log.tombstone_retention = 60
+    log.delete("4")
+    log.delete("5")
+    log._tombstones[0] = (time.time() - 120,) + log._tombstones[0][1:]
+    log.upsert("c@x", "6", {})
+    assert len(log._tombstones) == 1 and log.snapshot("b@x")[0] == []
+    assert "4" not in log._users["b@x"].records and "5" in log._users["c@x"].records
+
+
+def test_gateway_seeds_the_feed_from_the_reservation_service(gateway):
+    listing = [{"id": "r1", "userEmail": "a@x", "facilityId": "f1", "startTime": "2030-01-01T10:00:00Z",
+                "endTime": "2030-01-01T11:00:00Z", "status": "confirmed"}]
+
+    async def scenario():
+        gateway.reservation_upstream._transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, json=listing if request.url.params.get("userEmail") == "a@x" else [])
+        )
+        gateway.reservation_log = ReservationSyncLog()
+        async with gateway.lifespan(gateway.app):
+            transport = httpx.ASGITransport(app=gateway.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return (await client.get("/mobile/reservations/user/a@x")).json()
+
+    body = asyncio.run(scenario())
+    assert [(r["id"], r["facility_id"], r["start_time"]) for r in body["reservations"]] == \
+        [("r1", "f1", "2030-01-01T10:00:00Z")]
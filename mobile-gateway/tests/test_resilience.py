@@ -0,0 +1,92 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add the gateway directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from resilience import CallPolicy, UpstreamTimeout, UpstreamUnavailable
+from upstream import PoolSettings, UpstreamPool
+
+
+async def make_pool(handler, **settings) -> UpstreamPool:
+    pool = UpstreamPool("reservation", "http://upstream", PoolSettings(**settings), httpx.MockTransport(handler))
+    await pool.start()
+    return pool
+
+
+def test_idempotent_reads_are_retried_within_budget():
+    async def scenario():
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            return httpx.Response(503 if len(calls) < 3 else 200)
+
+        pool = await make_pool(handler)
+        policy = CallPolicy(retries=2, backoff=0)
+        assert (await pool.get("/r/1", policy=policy)).status_code == 200
+        assert len(calls) == 3
+
+        # Non-idempotent calls that reached the upstream are never repeated
+        calls.clear()
+        assert (await pool.post("/r", policy=policy)).status_code == 503
+        assert len(calls) == 1
+
+        # An empty budget turns retries off instead of multiplying load
+        calls.clear()
+        pool.retry_budget.balance = pool.retry_budget.min_per_sec = 0
+        assert (await pool.get("/r/1", policy=policy)).status_code == 503
+        assert pool.retry_budget.exhausted == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_hedge_answers_from_the_faster_attempt():
+    async def scenario():
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.path)
+            # The first copy stalls like an upstream in a GC pause
+            await asyncio.sleep(1.0 if len(calls) == 1 else 0.0)
+            return httpx.Response(200, json={"attempt": len(calls)})
+
+        pool = await make_pool(handler)
+        for _ in range(pool.latency.min_samples):
+            pool.latency.observe(0.005)
+        start = asyncio.get_running_loop().time()
+        response = await pool.get("/r/1", policy=CallPolicy(hedge=True, hedge_min_delay=0.02))
+        assert response.json() == {"attempt": 2}
+        assert asyncio.get_running_loop().time() - start < 0.5
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_after_failures_and_fails_fast():
+    async def scenario():
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return httpx.Response(200)
+
+        pool = await make_pool(handler, breaker_failures=2, breaker_reset_timeout=30)
+        for _ in range(2):
+            with pytest.raises(UpstreamTimeout):
+                await pool.get("/r/1", policy=CallPolicy(timeout=0.01))
+        with pytest.raises(UpstreamUnavailable) as rejected:
+            await pool.get("/r/1")
+        assert rejected.value.status_code == 503
+        assert rejected.value.headers["Retry-After"] == "30"
+
+        # After the reset timeout one probe is let through and closes the circuit
+        pool.breaker.opened_at -= 30
+        assert (await pool.get("/r/1")).status_code == 200
+        assert pool.breaker.state == "closed"
+        await pool.close()
+
+    asyncio.run(scenario())
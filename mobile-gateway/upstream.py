@@ -0,0 +1,353 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+import httpx
+
+# Repository root, for the shared `common` package
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+from common.metrics import registry
+from resilience import (
+    IDEMPOTENT_METHODS, RETRYABLE_STATUS, CallPolicy, CircuitBreaker, LatencyTracker, RetryBudget,
+    UpstreamTimeout, UpstreamUnavailable,
+)
+
+logger = logging.getLogger("MobileGateway.upstream")
+
+upstream_request_seconds = registry.histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream services", ("target", "outcome")
+)
+upstream_retries = registry.counter("upstream_retries_total", "Retried upstream calls", ("target",))
+upstream_hedges = registry.counter(
+    "upstream_hedges_total", "Hedged upstream reads by which attempt answered first", ("target", "outcome")
+)
+# Errors raised before the request reached the upstream; retrying these is always safe
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class PoolSettings:
+    """Connection pool tuning for one upstream service."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 2.0
+    read_timeout: float = 10.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 2.0
+    http2: bool = False
+    breaker_failures: int = 5
+    breaker_reset_timeout: float = 10.0
+    retry_budget_ratio: float = 0.2
+    retry_budget_min_per_sec: float = 5.0
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "PoolSettings":
+        """Read settings from environment, e.g. AUTH_POOL_MAX_CONNECTIONS."""
+        defaults = cls()
+        return cls(
+            max_connections=_env_int(f"{prefix}_POOL_MAX_CONNECTIONS", defaults.max_connections),
+            max_keepalive_connections=_env_int(f"{prefix}_POOL_MAX_KEEPALIVE", defaults.max_keepalive_connections),
+            keepalive_expiry=_env_float(f"{prefix}_POOL_KEEPALIVE_EXPIRY", defaults.keepalive_expiry),
+            connect_timeout=_env_float(f"{prefix}_CONNECT_TIMEOUT", defaults.connect_timeout),
+            read_timeout=_env_float(f"{prefix}_READ_TIMEOUT", defaults.read_timeout),
+            write_timeout=_env_float(f"{prefix}_WRITE_TIMEOUT", defaults.write_timeout),
+            pool_timeout=_env_float(f"{prefix}_POOL_TIMEOUT", defaults.pool_timeout),
+            http2=_env_bool(f"{prefix}_HTTP2", defaults.http2),
+            breaker_failures=_env_int(f"{prefix}_BREAKER_FAILURES", defaults.breaker_failures),
+            breaker_reset_timeout=_env_float(f"{prefix}_BREAKER_RESET_TIMEOUT", defaults.breaker_reset_timeout),
+            retry_budget_ratio=_env_float(f"{prefix}_RETRY_BUDGET_RATIO", defaults.retry_budget_ratio),
+            retry_budget_min_per_sec=_env_float(f"{prefix}_RETRY_BUDGET_MIN_PER_SEC", defaults.retry_budget_min_per_sec),
+        )
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamPool:
+    """One long-lived, keep-alive httpx client for a single upstream service,
+    with a circuit breaker and retry budget shared by all calls to it."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        settings: Optional[PoolSettings] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.settings = settings or PoolSettings()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.default_policy = CallPolicy()
+        self.breaker = CircuitBreaker(self.settings.breaker_failures, self.settings.breaker_reset_timeout)
+        self.retry_budget = RetryBudget(self.settings.retry_budget_ratio, self.settings.retry_budget_min_per_sec)
+        self.latency = LatencyTracker()
+
+    async def start(self):
+        if self._client is not None:
+            return
+        s = self.settings
+        http2 = s.http2
+        if http2 and not _http2_available():
+            logger.warning("HTTP/2 requested for %s but 'h2' is not installed, using HTTP/1.1", self.name)
+            http2 = False
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=s.max_connections,
+                max_keepalive_connections=s.max_keepalive_connections,
+                keepalive_expiry=s.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=s.connect_timeout,
+                read=s.read_timeout,
+                write=s.write_timeout,
+                pool=s.pool_timeout,
+            ),
+            http2=http2,
+            transport=self._transport,
+        )
+        logger.info("Upstream pool '%s' started for %s", self.name, self.base_url)
+
+    async def close(self):
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+        logger.info("Upstream pool '%s' closed", self.name)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError(f"Upstream pool '{self.name}' is not started")
+        return self._client
+
+    async def request(
+        self, method: str, url: str, stream: bool = False, policy: Optional[CallPolicy] = None, **kwargs
+    ) -> httpx.Response:
+        """Send a request under `policy` (timeout, retries, hedging).
+
+        With stream=True the body is left unread and the caller must close the
+        response. Raises UpstreamUnavailable while the circuit is open and
+        UpstreamTimeout when the last attempt ran out of time.
+        """
+        policy = policy or self.default_policy
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(self.name, self.breaker.retry_after())
+        self.retry_budget.deposit()
+        # A streamed request body can only be sent once
+        replayable = not hasattr(kwargs.get("content"), "__aiter__")
+        idempotent = method in IDEMPOTENT_METHODS if policy.idempotent is None else policy.idempotent
+        attempt = 0
+        while True:
+            response = error = None
+            try:
+                if policy.hedge and idempotent and replayable:
+                    response = await self._hedged(method, url, stream, policy, kwargs)
+                else:
+                    response = await self._attempt(method, url, stream, policy.timeout, kwargs)
+            except (httpx.TransportError, UpstreamTimeout) as e:
+                error = e
+            if response is not None and response.status_code not in RETRYABLE_STATUS:
+                return response
+            if not (
+                attempt < policy.retries
+                and replayable
+                and (idempotent or isinstance(error, NOT_SENT_ERRORS))
+                and self.breaker.state != CircuitBreaker.OPEN
+                and self.retry_budget.try_withdraw()
+            ):
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            upstream_retries.inc((self.name,))
+            logger.info("Retrying %s %s on %s (attempt %d): %s", method, url, self.name, attempt + 1,
+                        error or response.status_code)
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(policy.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    async def _attempt(self, method: str, url: str, stream: bool, timeout: Optional[float], kwargs) -> httpx.Response:
+        self.in_flight += 1
+        self.total_requests += 1
+        if self.in_flight > self.peak_in_flight:
+            self.peak_in_flight = self.in_flight
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            if stream:
+                send = self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+            else:
+                send = self.client.request(method, url, **kwargs)
+            response = await (asyncio.wait_for(send, timeout) if timeout else send)
+            outcome = f"{response.status_code // 100}xx"
+            return response
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise UpstreamTimeout(self.name) from None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight -= 1
+            upstream_request_seconds.observe(elapsed, (self.name, outcome))
+            if outcome == "cancelled":
+                self.breaker.record_abandoned()
+            elif outcome in ("error", "timeout", "5xx"):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                self.latency.observe(elapsed)
+
+    async def _hedged(self, method: str, url: str, stream: bool, policy: CallPolicy, kwargs) -> httpx.Response:
+        """Send a second copy if the first has not answered within the recent p95
+        latency; the first good reply wins and the other attempt is cancelled."""
+        first = asyncio.ensure_future(self._attempt(method, url, stream, policy.timeout, kwargs))
+        tasks = [first]
+        winner = None
+        try:
+            p95 = self.latency.p95()
+            # Without enough samples for a p95 there is nothing to hedge against
+            delay = max(policy.hedge_min_delay, p95) if p95 is not None else None
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.retry_budget.try_withdraw():
+                winner = first
+                return await first
+            second = asyncio.ensure_future(self._attempt(method, url, stream, policy.timeout, kwargs))
+            tasks.append(second)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    if task.result().status_code not in RETRYABLE_STATUS:
+                        upstream_hedges.inc((self.name, "hedge" if task is second else "primary"))
+                        winner = task
+                        return task.result()
+            # Both failed: report the primary attempt's outcome
+            winner = first
+            return first.result()
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilisation snapshot: open/idle connections and in-flight requests."""
+        open_connections = idle_connections = 0
+        p95 = self.latency.p95()
+        pool = getattr(self._client._transport, "_pool", None) if self._client else None
+        if pool is not None:
+            connections = pool.connections
+            open_connections = len(connections)
+            idle_connections = sum(1 for c in connections if c.is_idle())
+        return {
+            "base_url": self.base_url,
+            "started": self._client is not None,
+            "max_connections": self.settings.max_connections,
+            "max_keepalive_connections": self.settings.max_keepalive_connections,
+            "open_connections": open_connections,
+            "idle_connections": idle_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_requests": self.total_requests,
+            "utilisation": round(self.in_flight / self.settings.max_connections, 3),
+            "circuit": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            "retry_budget": round(self.retry_budget.balance, 1),
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class UpstreamRegistry:
+    """Named upstream pools sharing the application lifespan."""
+
+    def __init__(self):
+        self._pools: Dict[str, UpstreamPool] = {}
+
+    def register(self, pool: UpstreamPool) -> UpstreamPool:
+        self._pools[pool.name] = pool
+        return pool
+
+    def __getitem__(self, name: str) -> UpstreamPool:
+        return self._pools[name]
+
+    async def start(self):
+        for pool in self._pools.values():
+            await pool.start()
+
+    async def close(self):
+        for pool in self._pools.values():
+            await pool.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in self._pools.items()}
+
+    def register_metrics(self):
+        """Expose pool in-flight and open connection counts, read at scrape time."""
+        registry.gauge(
+            "upstream_in_flight", "Requests in flight per upstream", ("target",),
+            function=lambda: {(name,): pool.in_flight for name, pool in self._pools.items()},
+        )
+        registry.gauge(
+            "upstream_open_connections", "Open pooled connections per upstream", ("target",),
+            function=lambda: {(name,): stats["open_connections"] for name, stats in self.stats().items()},
+        )
+        states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        registry.gauge(
+            "upstream_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)", ("target",),
+            function=lambda: {(name,): states[pool.breaker.state] for name, pool in self._pools.items()},
+        )
+        registry.counter(
+            "upstream_circuit_rejections_total", "Calls failed fast by an open circuit", ("target",),
+            function=lambda: {(name,): pool.breaker.rejections for name, pool in self._pools.items()},
+        )
+        registry.counter(
+            "upstream_retry_budget_exhausted_total", "Retries and hedges skipped for lack of budget", ("target",),
+            function=lambda: {(name,): pool.retry_budget.exhausted for name, pool in self._pools.items()},
+        )
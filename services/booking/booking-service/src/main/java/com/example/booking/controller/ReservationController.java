@@ -4,6 +4,7 @@ import com.example.booking.model.Reservation;
 import com.example.booking.service.ReservationService;
 import org.springframework.beans.factory.annotation.Autowired;
 import org.springframework.web.bind.annotation.*;
+import reactor.core.publisher.Flux;
 import reactor.core.publisher.Mono;
 import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
@@ -23,6 +24,13 @@ public class ReservationController {
         return reservationService.createReservation(reservation);
     }
 
+    @GetMapping
+    public Flux<Reservation> listReservations(@RequestParam(required = false) String facilityId,
+                                              @RequestParam(required = false) String userEmail) {
+        logger.info("GET /reservations - Listing reservations");
+        return reservationService.listReservations(facilityId, userEmail);
+    }
+
     @GetMapping("/{id}")
     public Mono<Reservation> getReservation(@PathVariable String id) {
         logger.info("GET /reservations/{} - Fetching reservation", id);
@@ -12,6 +12,12 @@ public class Reservation {
     private String facilityName;
     private Long reservationDate;
     private String status; // pending, confirmed, cancelled
+    // Booked slot, as sent by the gateways (ISO-8601)
+    private String facilityId;
+    private String startTime;
+    private String endTime;
+    private String userEmail;
+    private String notes;
 
     // Getters and Setters
     public String getId() { return id; }
@@ -28,4 +34,19 @@ public class Reservation {
 
     public String getStatus() { return status; }
     public void setStatus(String status) { this.status = status; }
+
+    public String getFacilityId() { return facilityId; }
+    public void setFacilityId(String facilityId) { this.facilityId = facilityId; }
+
+    public String getStartTime() { return startTime; }
+    public void setStartTime(String startTime) { this.startTime = startTime; }
+
+    public String getEndTime() { return endTime; }
+    public void setEndTime(String endTime) { this.endTime = endTime; }
+
+    public String getUserEmail() { return userEmail; }
+    public void setUserEmail(String userEmail) { this.userEmail = userEmail; }
+
+    public String getNotes() { return notes; }
+    public void setNotes(String notes) { this.notes = notes; }
 }
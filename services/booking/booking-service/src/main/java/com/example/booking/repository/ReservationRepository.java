@@ -3,7 +3,11 @@ package com.example.booking.repository;
 import com.example.booking.model.Reservation;
 import org.springframework.data.mongodb.repository.ReactiveMongoRepository;
 import org.springframework.stereotype.Repository;
+import reactor.core.publisher.Flux;
 
 @Repository
 public interface ReservationRepository extends ReactiveMongoRepository<Reservation, String> {
+    Flux<Reservation> findByFacilityId(String facilityId);
+
+    Flux<Reservation> findByUserEmail(String userEmail);
 }
@@ -6,6 +6,7 @@ import org.slf4j.Logger;
 import org.slf4j.LoggerFactory;
 import org.springframework.beans.factory.annotation.Autowired;
 import org.springframework.stereotype.Service;
+import reactor.core.publisher.Flux;
 import reactor.core.publisher.Mono;
 
 @Service
@@ -44,6 +45,20 @@ public class ReservationService {
             .doOnError(error -> logger.error("Error fetching reservation with ID: {}", id, error));
     }
 
+    public Flux<Reservation> listReservations(String facilityId, String userEmail) {
+        logger.info("Listing reservations for facility: {}, user: {}", facilityId, userEmail);
+        Flux<Reservation> reservations;
+        if (userEmail != null) {
+            reservations = reservationRepository.findByUserEmail(userEmail)
+                .filter(reservation -> facilityId == null || facilityId.equals(reservation.getFacilityId()));
+        } else if (facilityId != null) {
+            reservations = reservationRepository.findByFacilityId(facilityId);
+        } else {
+            reservations = reservationRepository.findAll();
+        }
+        return reservations.doOnError(error -> logger.error("Error listing reservations", error));
+    }
+
     public Mono<Void> cancelReservation(String id) {
         logger.info("Cancelling reservation with ID: {}", id);
         return reservationRepository.deleteById(id)
@@ -13,13 +13,13 @@ const logger = winston.createLogger({
 });
 
 const createFacility = async (call, callback) => {
-  const { name, description } = call.request;
-  const facility = new Facility({ name, description });
+  const { name, description, location } = call.request;
+  const facility = new Facility({ name, description, location: location || undefined });
 
   try {
     await facility.save();
     logger.info(`Facility created: ${name}`);
-    callback(null, { id: facility._id.toString(), name, description });
+    callback(null, { id: facility._id.toString(), name, description, location: facility.location });
   } catch (error) {
     logger.error(`Error creating facility: ${error.message}`);
     callback(error);
@@ -39,7 +39,8 @@ const getFacility = async (call, callback) => {
         id: facility._id.toString(),
         name: facility.name,
         description: facility.description,
-        availableTimes: facility.availableTimes,  
+        availableTimes: facility.availableTimes,
+        location: facility.location,
       });
     }
   } catch (error) {
@@ -57,7 +58,12 @@ const updateFacility = async (call, callback) => {
       callback({ code: grpc.status.NOT_FOUND, details: 'Facility not found' });
     } else {
       logger.info(`Updated facility with ID: ${id}`);
-      callback(null, { id: facility._id.toString(), name: facility.name, description: facility.description });
+      callback(null, {
+        id: facility._id.toString(),
+        name: facility.name,
+        description: facility.description,
+        location: facility.location,
+      });
     }
   } catch (error) {
     logger.error(`Error updating facility: ${error.message}`);
@@ -82,6 +88,55 @@ const deleteFacility = async (call, callback) => {
   }
 };
 
+const LIST_DEFAULT_LIMIT = 500;
+const LIST_MAX_LIMIT = 1000;
+
+const listFacilities = async (call, callback) => {
+  const offset = Math.max(0, call.request.offset || 0);
+  const limit = Math.min(call.request.limit || LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT);
+  try {
+    const facilities = await Facility.find().sort({ _id: 1 }).skip(offset).limit(limit);
+    callback(null, {
+      facilities: facilities.map((facility) => ({
+        id: facility._id.toString(),
+        name: facility.name,
+        description: facility.description,
+        availableTimes: facility.availableTimes,
+        location: facility.location,
+      })),
+    });
+  } catch (error) {
+    logger.error(`Error listing facilities: ${error.message}`);
+    callback({ code: grpc.status.INTERNAL, details: 'Error listing facilities' });
+  }
+};
+
+const setFacilityLocation = async (call, callback) => {
+  const { id, location } = call.request;
+  if (!location) {
+    return callback({ code: grpc.status.INVALID_ARGUMENT, details: 'Location is required' });
+  }
+  try {
+    const facility = await Facility.findByIdAndUpdate(
+      id, { location: { lat: location.lat, lng: location.lng } }, { new: true }
+    );
+    if (!facility) {
+      logger.warn(`Facility not found for location update with ID: ${id}`);
+      return callback({ code: grpc.status.NOT_FOUND, details: 'Facility not found' });
+    }
+    logger.info(`Updated location of facility with ID: ${id}`);
+    callback(null, {
+      id: facility._id.toString(),
+      name: facility.name,
+      description: facility.description,
+      availableTimes: facility.availableTimes,
+      location: facility.location,
+    });
+  } catch (error) {
+    logger.error(`Error updating facility location: ${error.message}`);
+    callback({ code: grpc.status.INTERNAL, details: 'Internal server error' });
+  }
+};
 
 const addAvailableTime = async (call, callback) => {
   const { facilityId, time } = call.request;
@@ -100,6 +155,7 @@ const addAvailableTime = async (call, callback) => {
       name: facility.name,
       description: facility.description,
       availableTimes: facility.availableTimes,
+      location: facility.location,
     });
   } catch (error) {
     logger.error(`Error adding available time: ${error.message}`);
@@ -127,6 +183,7 @@ const removeAvailableTime = async (call, callback) => {
       name: facility.name,
       description: facility.description,
       availableTimes: facility.availableTimes,
+      location: facility.location,
     });
   } catch (error) {
     logger.error(`Error removing available time: ${error.message}`);
@@ -139,6 +196,8 @@ module.exports = {
   getFacility,
   updateFacility,
   deleteFacility,
+  listFacilities,
+  setFacilityLocation,
   addAvailableTime,
   removeAvailableTime,
 };
@@ -5,10 +5,16 @@ const availableTimeSchema = new mongoose.Schema({
   end: String
 }, { _id: false });
 
+const locationSchema = new mongoose.Schema({
+  lat: Number,
+  lng: Number
+}, { _id: false });
+
 const facilitySchema = new mongoose.Schema({
   name: String,
   description: String,
-  availableTimes: [availableTimeSchema]
+  availableTimes: [availableTimeSchema],
+  location: locationSchema
 });
 
 module.exports = mongoose.model('Facility', facilitySchema);
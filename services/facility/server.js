@@ -8,6 +8,8 @@ const {
   getFacility,
   updateFacility,
   deleteFacility,
+  listFacilities,
+  setFacilityLocation,
   addAvailableTime,
   removeAvailableTime,
 } = require('./controllers/facilityCon');
@@ -39,6 +41,8 @@ server.addService(facilityProto.FacilityService.service, {
   GetFacility: getFacility,
   UpdateFacility: updateFacility,
   DeleteFacility: deleteFacility,
+  ListFacilities: listFacilities,
+  SetFacilityLocation: setFacilityLocation,
   AddAvailableTime: addAvailableTime,
   RemoveAvailableTime: removeAvailableTime,
 });
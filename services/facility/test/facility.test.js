@@ -12,6 +12,8 @@ const {
   getFacility,
   updateFacility,
   deleteFacility,
+  listFacilities,
+  setFacilityLocation,
   addAvailableTime,
   removeAvailableTime,
 } = facilityController;
@@ -47,6 +49,8 @@ describe('Facility Service Tests', () => {
         GetFacility: getFacility,
         UpdateFacility: updateFacility,
         DeleteFacility: deleteFacility,
+        ListFacilities: listFacilities,
+        SetFacilityLocation: setFacilityLocation,
         AddAvailableTime: addAvailableTime,
         RemoveAvailableTime: removeAvailableTime,
       });
@@ -240,7 +244,33 @@ describe('Facility Service Tests', () => {
     });
   });
 
-  
+  it('should set the location of a facility', (done) => {
+    client.SetFacilityLocation({ id: testId, location: { lat: 46.05, lng: 14.5 } }, (error, response) => {
+      try {
+        expect(error).toBeNull();
+        expect(response.id).toBe(testId);
+        expect(response.location).toEqual({ lat: 46.05, lng: 14.5 });
+        done();
+      } catch (err) {
+        done(err);
+      }
+    });
+  });
+
+  it('should list facilities with their available times', (done) => {
+    client.ListFacilities({ offset: 0, limit: 100 }, (error, response) => {
+      try {
+        expect(error).toBeNull();
+        const listed = response.facilities.find((facility) => facility.id === testId);
+        expect(listed).toBeDefined();
+        expect(listed.availableTimes).toHaveLength(1);
+        expect(listed.location).toEqual({ lat: 46.05, lng: 14.5 });
+        done();
+      } catch (err) {
+        done(err);
+      }
+    });
+  });
 
   it('should handle facility not found error', (done) => {
     const nonExistentId = new mongoose.Types.ObjectId().toString();
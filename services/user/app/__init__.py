@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Make the repository-level `common` package (shared with the mobile gateway) importable
+_repo_root = str(Path(__file__).resolve().parents[3])
+if _repo_root not in sys.path:
+    sys.path.append(_repo_root)
@@ -1,9 +1,31 @@
 from passlib.context import CryptContext
 import jwt
 from datetime import datetime, timedelta
-from .config import JWT_SECRET
+from fastapi import Depends, HTTPException
+from .config import JWT_SECRET, BCRYPT_ROUNDS, BULK_IMPORT_ADMINS
+from common.jwt_auth import TokenVerifier, auth_dependency
 
+# The service's only password context (app.utils.security re-exports it)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_bcrypt_rounds = BCRYPT_ROUNDS
+
+def configure_bcrypt_rounds(rounds: int):
+    """Hash with `rounds`; hashes of a lower cost then report needs_update.
+
+    Stronger hashes are left alone: replicas configured (or calibrated) with
+    different costs must not rewrite the same users' hashes back and forth.
+    """
+    global _bcrypt_rounds
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds
+    )
+    _bcrypt_rounds = rounds
+
+def bcrypt_rounds() -> int:
+    return _bcrypt_rounds
+
+configure_bcrypt_rounds(BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -11,7 +33,23 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password: str, hashed_password: str):
+    """(valid, new_hash); new_hash is set when the stored hash uses an outdated cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_jwt(data: dict, expires_delta: timedelta = timedelta(hours=1)):
     to_encode = data.copy()
     to_encode.update({"exp": datetime.utcnow() + expires_delta})
     return jwt.encode(to_encode, JWT_SECRET, algorithm="HS256")
+
+# Local verification of our own tokens, with a verified-token cache and logout revocation
+token_verifier = TokenVerifier(JWT_SECRET)
+require_user = auth_dependency(token_verifier)
+
+bulk_import_admins = BULK_IMPORT_ADMINS
+
+async def require_bulk_import_admin(claims: dict = Depends(require_user)) -> dict:
+    """Claims of a caller listed in BULK_IMPORT_ADMINS; 403 for everyone else."""
+    if claims.get("sub") not in bulk_import_admins:
+        raise HTTPException(status_code=403, detail="Bulk import is restricted to administrators")
+    return claims
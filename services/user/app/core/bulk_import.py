@@ -0,0 +1,216 @@
+"""Bulk user import: CSV or NDJSON in, batched INSERTs out.
+
+Passwords are hashed through the hash pool's bounded queue, rows are inserted
+in chunks with a single ON CONFLICT DO NOTHING / ON DUPLICATE KEY UPDATE id=id
+per chunk, and the users.email unique index decides conflicts. The affected
+emails are only looked up when a chunk reports fewer inserted rows than it sent.
+
+CLI: python -m app.core.bulk_import users.csv [--format ndjson] [--chunk-size 500]
+"""
+import io
+import csv
+import json
+import time
+import asyncio
+import argparse
+from typing import AsyncIterator, Iterable, List, Tuple, Optional, Union
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.hashing import HashPool
+from app.core.logger import logger
+from app.models.schemas import UserCreate
+from app.models.user import User
+from app.core.user_cache import user_cache
+
+CHUNK_SIZE = 500
+FORMATS = ("csv", "ndjson")
+
+
+def _decode(line: bytes) -> Union[str, bytes]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return line
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Union[str, bytes]]:
+    """Split a byte stream (e.g. request.stream()) into decoded lines.
+
+    Lines that are not valid UTF-8 are passed on as bytes, for parse_records
+    to report as row errors.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+async def aiter_sync(lines: Iterable[str]) -> AsyncIterator[str]:
+    for line in lines:
+        yield line.rstrip("\r\n")
+
+
+async def parse_records(lines: AsyncIterator[Union[str, bytes]], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (line number, UserCreate or error message) for each input record.
+
+    A CSV record whose quoted field spans lines is reported at its first line.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {FORMATS}")
+    header: Optional[List[str]] = None
+    line_no = record_no = 0
+    pending: List[str] = []
+    async for line in lines:
+        line_no += 1
+        if isinstance(line, bytes):
+            # Undecodable: the record it belongs to (if one was open) is lost too
+            yield (record_no if pending else line_no), "Invalid record: not valid UTF-8"
+            pending = []
+            continue
+        if fmt == "csv":
+            if not pending:
+                record_no = line_no
+            pending.append(line)
+            text = "\n".join(pending)
+            if text.count('"') % 2:
+                continue  # inside a quoted field: the record goes on in the next line
+            pending = []
+        else:
+            record_no, text = line_no, line
+        if not text.strip():
+            continue
+        try:
+            if fmt == "ndjson":
+                data = json.loads(text)
+            else:
+                row = next(csv.reader(io.StringIO(text)))
+                if header is None:
+                    header = [column.strip() for column in row]
+                    continue
+                data = dict(zip(header, row))
+            record = UserCreate(**data)
+            record.email = record.email.strip()
+            yield record_no, record
+        except (ValueError, TypeError, ValidationError) as e:
+            yield record_no, f"Invalid record: {e}".splitlines()[0]
+    if pending:
+        yield record_no, "Invalid record: unterminated quoted field"
+
+
+def insert_ignore(dialect_name: str):
+    """INSERT that skips rows violating the users.email unique index."""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(User).on_conflict_do_nothing(index_elements=["email"])
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(User).on_conflict_do_nothing(index_elements=["email"])
+    if dialect_name == "mysql":
+        # Not INSERT IGNORE: that also turns truncation and bad values into warnings
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        return mysql_insert(User).on_duplicate_key_update(id=User.__table__.c.id)
+    return insert(User)
+
+
+class BulkImporter:
+    def __init__(self, session_factory: async_sessionmaker, hash_pool: HashPool, chunk_size: int = CHUNK_SIZE,
+                 hash_concurrency: int = 0):
+        self.session_factory = session_factory
+        self.hash_pool = hash_pool
+        self.hash_concurrency = hash_concurrency
+        self.chunk_size = max(1, chunk_size)
+
+    async def run(self, records: AsyncIterator[Tuple[int, object]]) -> dict:
+        started = time.perf_counter()
+        report = {"total": 0, "inserted": 0, "conflicts": [], "errors": []}
+        seen = set()
+        chunk: List[Tuple[int, UserCreate]] = []
+        async with self.session_factory() as db:
+            async for line_no, record in records:
+                report["total"] += 1
+                if isinstance(record, str):
+                    report["errors"].append({"line": line_no, "error": record})
+                    continue
+                if record.email in seen:
+                    report["conflicts"].append({"line": line_no, "email": record.email, "reason": "duplicate in input"})
+                    continue
+                seen.add(record.email)
+                chunk.append((line_no, record))
+                if len(chunk) >= self.chunk_size:
+                    await self._flush(db, chunk, report)
+                    chunk = []
+            if chunk:
+                await self._flush(db, chunk, report)
+
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["rate_per_second"] = round(report["inserted"] / elapsed, 1) if elapsed else None
+        logger.info(
+            "Bulk import finished: %s/%s inserted, %s conflicts, %s errors",
+            report["inserted"], report["total"], len(report["conflicts"]), len(report["errors"]),
+        )
+        return report
+
+    async def _flush(self, db: AsyncSession, chunk: List[Tuple[int, UserCreate]], report: dict):
+        hashes = await self.hash_pool.hash_many([record.password for _, record in chunk], self.hash_concurrency)
+        rows = [
+            {"email": record.email, "password_hash": password_hash, "full_name": record.full_name}
+            for (_, record), password_hash in zip(chunk, hashes)
+        ]
+        # Core executemany on the session's connection, bypassing ORM object hydration
+        conn = await db.connection()
+        result = await conn.execute(insert_ignore(conn.dialect.name), rows)
+        await db.commit()
+        # Drop negative entries for the new emails (ids are not returned by executemany)
+        for row in rows:
+            user_cache.invalidate(row["email"])
+        inserted = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else None
+        if conn.dialect.name == "mysql":
+            # With CLIENT_FOUND_ROWS (the driver default) a no-op update counts as a row
+            inserted = None
+
+        if inserted == len(rows):
+            report["inserted"] += inserted
+            return
+        # Some rows hit the unique index: the ones whose stored hash isn't ours
+        stored = await db.execute(
+            select(User.email, User.password_hash).where(User.email.in_([row["email"] for row in rows]))
+        )
+        stored_hashes = dict(stored.all())
+        for (line_no, record), row in zip(chunk, rows):
+            if stored_hashes.get(record.email) == row["password_hash"]:
+                report["inserted"] += 1
+            else:
+                report["conflicts"].append({"line": line_no, "email": record.email, "reason": "email already registered"})
+
+
+async def _main(args):
+    from app.core.database import SessionLocal, create_tables, engine
+    pool = HashPool(workers=args.workers) if args.workers else HashPool()
+    try:
+        await create_tables(engine)
+        # The CLI has the pool to itself: no logins to leave workers for
+        importer = BulkImporter(SessionLocal, pool, chunk_size=args.chunk_size, hash_concurrency=pool.workers)
+        with open(args.file, encoding="utf-8") as f:
+            report = await importer.run(parse_records(aiter_sync(f), args.format))
+    finally:
+        pool.shutdown()
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or NDJSON")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = "ndjson" if args.file.endswith((".ndjson", ".jsonl")) else "csv"
+    asyncio.run(_main(args))
@@ -0,0 +1,64 @@
+"""Pick the bcrypt cost for this host from a p99 latency budget.
+
+CLI: python -m app.core.calibrate [--budget-ms 250] [--samples 7]
+"""
+import json
+import math
+import time
+import argparse
+import secrets
+from passlib.context import CryptContext
+from app.core.config import BCRYPT_P99_BUDGET_MS
+from app.core.logger import logger
+
+MIN_ROUNDS = 10  # never go below this, whatever the budget
+MAX_ROUNDS = 16
+
+
+def p99(samples: list) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(0.99 * len(ordered)) - 1)]
+
+
+def measure_rounds(rounds: int, samples: int = 7) -> float:
+    """p99 seconds for one bcrypt hash at `rounds` on this host."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    password = secrets.token_urlsafe(12)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash(password)
+        timings.append(time.perf_counter() - start)
+    return p99(timings)
+
+
+def calibrate_bcrypt_rounds(budget_ms: float = BCRYPT_P99_BUDGET_MS, samples: int = 7,
+                            min_rounds: int = MIN_ROUNDS, max_rounds: int = MAX_ROUNDS):
+    """Return (rounds, {rounds: p99_ms}) for the highest cost whose p99 fits the budget.
+
+    Each extra round doubles the work, so a cost is only measured when the
+    previous one predicts it could still fit.
+    """
+    budget = budget_ms / 1000.0
+    measured = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        if rounds > min_rounds and measured[rounds - 1] * 2 > budget * 1.25:
+            break
+        measured[rounds] = measure_rounds(rounds, samples)
+        if measured[rounds] > budget:
+            break
+        chosen = rounds
+    if measured[min_rounds] > budget:
+        logger.warning("bcrypt cost %s exceeds the %.0fms budget on this host, using it anyway", min_rounds, budget_ms)
+    logger.info("Calibrated bcrypt cost %s for a %.0fms p99 budget", chosen, budget_ms)
+    return chosen, {r: round(t * 1000, 1) for r, t in measured.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt and pick a cost for a p99 budget")
+    parser.add_argument("--budget-ms", type=float, default=BCRYPT_P99_BUDGET_MS)
+    parser.add_argument("--samples", type=int, default=7)
+    args = parser.parse_args()
+    rounds, timings = calibrate_bcrypt_rounds(args.budget_ms, args.samples)
+    print(json.dumps({"BCRYPT_ROUNDS": rounds, "p99_ms_by_rounds": timings}, indent=2))
@@ -10,6 +10,33 @@ db_user = os.getenv("MYSQL_USER", "root")
 db_password = os.getenv("MYSQL_PASSWORD", "Geslo123")
 db_name = os.getenv("MYSQL_DATABASE", "user")
 
-# Build the connection URL
-DATABASE_URL = f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}/{db_name}"
-JWT_SECRET = os.getenv("JWT_SECRET", "e8694db72620093716a6c0a54ce7936e4bfc134da762595b7599092017c54872")
\ No newline at end of file
+# Build the connection URL (async driver). Set DATABASE_URL to override, e.g.
+# sqlite+aiosqlite:///./user.db or sqlite+aiosqlite:///:memory: for local runs.
+DATABASE_URL = os.getenv("DATABASE_URL", f"mysql+aiomysql://{db_user}:{db_password}@{db_host}/{db_name}")
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+# Connection pool tuning (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Connections opened in parallel at startup, so first requests don't pay for connecting
+DB_POOL_WARM_CONNECTIONS = int(os.getenv("DB_POOL_WARM_CONNECTIONS", str(DB_POOL_SIZE)))
+# Seconds between startup attempts while the database (or anything else) is not reachable
+STARTUP_RETRY_SECONDS = float(os.getenv("STARTUP_RETRY_SECONDS", "5"))
+JWT_SECRET = os.getenv("JWT_SECRET", "e8694db72620093716a6c0a54ce7936e4bfc134da762595b7599092017c54872")
+
+# bcrypt cost. Set explicitly, or let the service pick the highest cost whose
+# p99 hash time fits BCRYPT_P99_BUDGET_MS when BCRYPT_CALIBRATE_ON_STARTUP is on
+# (or run: python -m app.core.calibrate). With several replicas, calibrate once
+# on the target hardware and set BCRYPT_ROUNDS, so all of them hash alike.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_P99_BUDGET_MS = float(os.getenv("BCRYPT_P99_BUDGET_MS", "250"))
+BCRYPT_CALIBRATE_ON_STARTUP = os.getenv("BCRYPT_CALIBRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# Accounts (token subjects) allowed to call POST /users/bulk, comma separated.
+# Empty keeps the HTTP importer off; python -m app.core.bulk_import still works.
+BULK_IMPORT_ADMINS = frozenset(
+    email.strip() for email in os.getenv("BULK_IMPORT_ADMINS", "").split(",") if email.strip()
+)
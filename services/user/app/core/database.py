@@ -1,33 +1,146 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+import time
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Optional
+from sqlalchemy import Column, Integer, Table, delete, insert, inspect, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import StaticPool
+from app.core.config import (
+    DATABASE_URL, TEST_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
 from app.core.logger import logger
+from common.metrics import registry
+
+db_checkout_seconds = registry.histogram(
+    "db_pool_checkout_duration_seconds", "Time spent waiting for a pooled DB connection", ("engine",)
+)
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """Create an async engine; SQLite gets a single shared connection when in-memory."""
+    if url.startswith("sqlite"):
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or url.rstrip("/").endswith("sqlite+aiosqlite:"):
+            kwargs["poolclass"] = StaticPool
+        return create_async_engine(url, **kwargs)
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    """Time connection checkouts and expose pool size gauges for /metrics."""
+    sync_engine = engine.sync_engine
+    raw_connection = sync_engine.raw_connection
+
+    # Wrapped on the engine rather than the pool, which dispose() replaces
+    def timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            db_checkout_seconds.observe(time.perf_counter() - start, (name,))
+
+    sync_engine.raw_connection = timed_raw_connection
+
+    def pool_value(method: str):
+        # StaticPool (in-memory SQLite) has no size accounting
+        fn = getattr(sync_engine.pool, method, None)
+        return {(name,): fn()} if fn is not None else {}
+
+    registry.gauge("db_pool_size", "Configured pool size", ("engine",), function=lambda: pool_value("size"))
+    registry.gauge("db_pool_checked_out", "Connections currently checked out", ("engine",),
+                   function=lambda: pool_value("checkedout"))
+    registry.gauge("db_pool_overflow", "Overflow connections in use", ("engine",),
+                   function=lambda: pool_value("overflow"))
+
 
 # Main Database Engine
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = build_engine(DATABASE_URL)
+instrument_engine(engine, "main")
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
+# Test Database Engine (in-memory SQLite unless TEST_DATABASE_URL is set)
+test_engine = build_engine(TEST_DATABASE_URL)
 
 Base = declarative_base()
 
+# Bump when the models change, and add the MIGRATIONS step that takes an
+# existing database from the previous version to the new one
+SCHEMA_VERSION = 1
 
+# One row: the version the database schema is at
+schema_version = Table("schema_version", Base.metadata, Column("version", Integer, nullable=False))
 
-def init_db():
-    """Initialize the database and create tables."""
-    try:
-        logger.info("Initializing the database and creating tables...")
-        from app.models.user import Base  
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully.")
-    except Exception as e:
-        logger.error(f"Error during database initialization: {e}")
 
-def init_test_db():
+def _create_all(conn):
+    import app.models.user  # noqa: F401 - registers the models on Base.metadata
+    Base.metadata.create_all(conn)
+
+MIGRATIONS = {
+    1: _create_all,  # baseline; also adopts databases created before versioning
+}
+
+
+async def stored_schema_version(bind: AsyncEngine) -> Optional[int]:
+    """Version recorded in the database, or None if it has no version table yet.
+
+    Other errors (database down, permissions) propagate to the caller's retry.
+    """
+    async with bind.connect() as conn:
+        if not await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(schema_version.name)):
+            return None
+        return (await conn.execute(select(schema_version.c.version))).scalar()
+
+async def ensure_schema(bind: AsyncEngine) -> int:
+    """Migrate to SCHEMA_VERSION if needed; costs one SELECT when the schema is current."""
+    current = await stored_schema_version(bind)
+    if current is not None and current >= SCHEMA_VERSION:
+        if current > SCHEMA_VERSION:
+            # A newer release already migrated (rolling deploy); its changes must stay compatible
+            logger.warning("Database schema is at version %s, ahead of this build (%s)", current, SCHEMA_VERSION)
+        return current
+    async with bind.begin() as conn:
+        for version in range((current or 0) + 1, SCHEMA_VERSION + 1):
+            logger.info("Migrating database schema to version %s", version)
+            await conn.run_sync(MIGRATIONS[version])
+        await conn.run_sync(lambda sync_conn: schema_version.create(sync_conn, checkfirst=True))
+        await conn.execute(delete(schema_version))
+        await conn.execute(insert(schema_version).values(version=SCHEMA_VERSION))
+    return SCHEMA_VERSION
+
+async def warm_pool(bind: AsyncEngine, connections: int) -> int:
+    """Open up to `connections` pooled connections in parallel and hand them back to the pool."""
+    size = getattr(bind.sync_engine.pool, "size", None)
+    # StaticPool (in-memory SQLite) holds a single shared connection
+    connections = min(connections, size()) if size is not None else 1
+    async with AsyncExitStack() as stack:
+        await asyncio.gather(*(stack.enter_async_context(bind.connect()) for _ in range(connections)))
+    return connections
+
+
+async def create_tables(bind: AsyncEngine):
+    from app.models.user import Base
+    async with bind.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def init_db():
+    """Bring the main database schema up to date; errors propagate to the caller."""
+    version = await ensure_schema(engine)
+    logger.info("Database schema is at version %s", version)
+
+async def init_test_db():
     """Initialize the test database and create tables."""
     try:
         logger.info("Initializing the test database and creating tables...")
-        from app.models.user import Base  
-        Base.metadata.create_all(bind=test_engine)
+        await create_tables(test_engine)
         logger.info("Test database tables created successfully.")
     except Exception as e:
-        logger.error(f"Error during test database initialization: {e}")
+        logger.error("Error during test database initialization: %s", e)
@@ -0,0 +1,163 @@
+import os
+import time
+import secrets
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from app.core.auth import hash_password, verify_password, verify_and_update, configure_bcrypt_rounds, bcrypt_rounds
+from app.core.logger import logger
+from common.metrics import registry
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+# Requests allowed to wait for a free worker before we start rejecting
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", HASH_WORKERS * 4))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+
+bcrypt_seconds = registry.histogram(
+    "bcrypt_duration_seconds", "CPU time of one bcrypt operation in a worker", ("operation",)
+)
+hash_wait_seconds = registry.histogram(
+    "bcrypt_queue_wait_seconds", "Time a bcrypt job waited for a free worker"
+)
+
+
+class HashPoolSaturated(Exception):
+    """Raised when the bcrypt wait queue is full."""
+
+    def __init__(self, retry_after: int = HASH_RETRY_AFTER):
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HashPool:
+    """Bounded process pool for bcrypt so hashing never occupies request threads."""
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_size: int = HASH_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+        self._dummy_hash = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Workers get the current cost even when they are spawned rather than forked
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        initializer=configure_bcrypt_rounds,
+                        initargs=(bcrypt_rounds(),)
+                    )
+                    logger.info("Hash pool started with %s worker process(es), bcrypt cost %s", self.workers, bcrypt_rounds())
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("Hash pool stopped")
+
+    def set_rounds(self, rounds: int):
+        """Change the bcrypt cost; workers are replaced so new hashes use it."""
+        configure_bcrypt_rounds(rounds)
+        self._dummy_hash = None
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    async def run(self, fn, *args):
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HashPoolSaturated()
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_seconds = await loop.run_in_executor(self.executor, _timed, fn, *args)
+        finally:
+            self.pending -= 1
+        elapsed = time.perf_counter() - start
+        self.completed += 1
+        self.hash_seconds_total += hash_seconds
+        self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds)
+        self.wait_seconds_total += max(0.0, elapsed - hash_seconds)
+        bcrypt_seconds.observe(hash_seconds, (fn.__name__,))
+        hash_wait_seconds.observe(max(0.0, elapsed - hash_seconds))
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        return await self.run(hash_password, password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str):
+        return await self.run(verify_and_update, plain_password, hashed_password)
+
+    async def dummy_verify(self, plain_password: str) -> bool:
+        """Burn the same bcrypt work as a real verify, for unknown emails; always False."""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash_password(secrets.token_urlsafe(16))
+        await self.verify_password(plain_password, self._dummy_hash)
+        return False
+
+    async def warm_up(self):
+        """Start every worker process and prepare the dummy hash before the first login needs them."""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash_password(secrets.token_urlsafe(16))
+        await asyncio.gather(*(self.verify_password("warm-up", self._dummy_hash) for _ in range(self.workers)))
+
+    async def hash_many(self, passwords: list, concurrency: int = 0) -> list:
+        """Hash a batch through the bounded queue, `concurrency` at a time.
+
+        Defaults to half the workers, so logins keep the rest; a full queue
+        makes the batch wait and retry instead of failing.
+        """
+        semaphore = asyncio.Semaphore(concurrency or max(1, self.workers // 2))
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                while True:
+                    try:
+                        return await self.run(hash_password, password)
+                    except HashPoolSaturated as e:
+                        await asyncio.sleep(e.retry_after)
+
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "bcrypt_rounds": bcrypt_rounds(),
+            "queue_size": self.queue_size,
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_seconds_avg": self.hash_seconds_total / completed,
+            "hash_seconds_max": self.hash_seconds_max,
+            "wait_seconds_avg": self.wait_seconds_total / completed,
+        }
+
+
+hash_pool = HashPool()
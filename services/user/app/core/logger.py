@@ -1,4 +1,10 @@
+import os
 import logging
+from common.logging_setup import setup_logging, AccessLogSampler
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# JSON records written by a background thread; LOG_FILE enables a rotating file
+setup_logging("user-service", log_file=os.getenv("LOG_FILE"))
 logger = logging.getLogger("app_logger")
+access_logger = logging.getLogger("app_logger.access")
+# Per-route access log sampling, e.g. "default=1.0,/static=0.1"
+access_log_sampler = AccessLogSampler(os.getenv("ACCESS_LOG_SAMPLING", "default=1.0,/static=0.1,/metrics=0.05,/ready=0.05"))
@@ -0,0 +1,76 @@
+"""Startup sequence behind the /ready probe.
+
+The schema check runs first; then DB pool, crypto and static asset warm-up
+run in parallel. /ready answers 503 until all of them have finished, so a
+rolling deploy only routes users to instances that are already warm.
+"""
+import time
+import asyncio
+from starlette.concurrency import run_in_threadpool
+from app.core.auth import create_jwt, token_verifier
+from app.core.calibrate import calibrate_bcrypt_rounds
+from app.core.config import (
+    BCRYPT_CALIBRATE_ON_STARTUP, BCRYPT_P99_BUDGET_MS, DB_POOL_WARM_CONNECTIONS, STARTUP_RETRY_SECONDS
+)
+from app.core.database import engine, ensure_schema, warm_pool
+from app.core.hashing import hash_pool
+from app.core.static_cache import frontend_assets
+from app.core.logger import logger
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.steps = {}
+
+    async def step(self, name: str, coro):
+        self.steps[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            result = await coro
+        except Exception as e:
+            self.steps[name] = {"status": "failed", "error": str(e)}
+            raise
+        self.steps[name] = {"status": "done", "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+        return result
+
+    def report(self) -> dict:
+        return {"ready": self.ready, "attempts": self.attempts, "steps": dict(self.steps)}
+
+
+readiness = Readiness()
+
+
+async def warm_crypto():
+    if BCRYPT_CALIBRATE_ON_STARTUP:
+        rounds, _ = await run_in_threadpool(calibrate_bcrypt_rounds, BCRYPT_P99_BUDGET_MS)
+        hash_pool.set_rounds(rounds)
+    await hash_pool.warm_up()
+    # First encode/decode pays for PyJWT's algorithm setup and the HMAC key
+    token_verifier.verify(create_jwt({"sub": "warm-up"}))
+
+
+async def run_startup():
+    """One pass over every startup step; raises if any of them fails."""
+    readiness.attempts += 1
+    start = time.perf_counter()
+    await readiness.step("schema", ensure_schema(engine))
+    await asyncio.gather(
+        readiness.step("db_pool", warm_pool(engine, DB_POOL_WARM_CONNECTIONS)),
+        readiness.step("crypto", warm_crypto()),
+        readiness.step("static", run_in_threadpool(frontend_assets.load)),
+    )
+    readiness.ready = True
+    logger.info("Service ready after %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+async def start_until_ready():
+    """Retry the startup steps until they all succeed (e.g. MySQL still booting)."""
+    while True:
+        try:
+            await run_startup()
+            return
+        except Exception as e:
+            logger.error("Startup attempt %s failed, retrying in %ss: %s", readiness.attempts, STARTUP_RETRY_SECONDS, e)
+            await asyncio.sleep(STARTUP_RETRY_SECONDS)
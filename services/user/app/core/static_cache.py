@@ -0,0 +1,155 @@
+import os
+import gzip
+import time
+import hashlib
+import mimetypes
+import threading
+from types import MappingProxyType
+from typing import Dict, Optional, Mapping
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.logger import logger
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+FRONTEND_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "frontend")
+# Development only: re-read assets that changed on disk (checked at most once a second)
+STATIC_RELOAD = os.getenv("STATIC_RELOAD", "false").lower() in ("1", "true", "yes")
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+class Asset:
+    """One file held in memory with its precompressed variants."""
+    __slots__ = ("name", "content_type", "etags", "mtime", "bodies")
+
+    def __init__(self, name: str, data: bytes, mtime: float):
+        self.name = name
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type.endswith(("javascript", "json")):
+            self.content_type += "; charset=utf-8"
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        self.mtime = mtime
+        bodies = {"identity": data}
+        # Compressed variants are only kept when they are actually smaller
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gzipped) < len(data):
+            bodies["gzip"] = gzipped
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                bodies["br"] = compressed
+        self.bodies = MappingProxyType(bodies)
+        # Strong ETags are per representation, so each encoding gets its own
+        self.etags = MappingProxyType({
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in bodies
+        })
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+
+def etag_matches(if_none_match: str, etags) -> bool:
+    """Weak comparison of an If-None-Match header against any of our ETags."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
+
+
+class StaticAssetCache:
+    """Immutable in-memory snapshot of a directory, served without filesystem I/O."""
+
+    def __init__(self, directory: str, reload: bool = False):
+        self.directory = os.path.abspath(directory)
+        self.reload = reload
+        self._assets: Mapping[str, Asset] = MappingProxyType({})
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+
+    def load(self):
+        """Read every file once; the new snapshot replaces the old one atomically."""
+        assets = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    assets[name] = Asset(name, f.read(), os.path.getmtime(path))
+        self._assets = MappingProxyType(assets)
+        self._loaded = True
+        logger.info("Loaded %s static asset(s) from %s", len(assets), self.directory)
+
+    def _changed(self) -> bool:
+        seen = 0
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                asset = self._assets.get(name)
+                if asset is None or asset.mtime != os.path.getmtime(path):
+                    return True
+                seen += 1
+        return seen != len(self._assets)
+
+    def get(self, name: str) -> Optional[Asset]:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+        elif self.reload and time.monotonic() >= self._next_check:
+            with self._lock:
+                self._next_check = time.monotonic() + RELOAD_CHECK_INTERVAL
+                if self._changed():
+                    self.load()
+        return self._assets.get(name)
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def response(self, request: Request, name: str, cache_control: str = "no-cache") -> Optional[Response]:
+        """Response for `name`, honouring If-None-Match and Accept-Encoding; None if unknown."""
+        asset = self.get(name)
+        if asset is None:
+            return None
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in asset.bodies and accepted.get(candidate, accepted.get("*", 0.0)) > 0:
+                encoding = candidate
+                break
+        headers = {"ETag": asset.etags[encoding], "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, asset.etags.values()):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=asset.bodies[encoding], media_type=asset.content_type, headers=headers)
+
+
+frontend_assets = StaticAssetCache(FRONTEND_DIRECTORY, reload=STATIC_RELOAD)
@@ -0,0 +1,179 @@
+import os
+import time
+import threading
+import ipaddress
+from collections import OrderedDict
+from typing import Optional
+
+# Per-email and per-IP token buckets: `burst` attempts, refilled at `rate` per second
+EMAIL_BURST = float(os.getenv("LOGIN_EMAIL_BURST", "5"))
+EMAIL_RATE = float(os.getenv("LOGIN_EMAIL_RATE", str(5 / 60)))
+IP_BURST = float(os.getenv("LOGIN_IP_BURST", "30"))
+IP_RATE = float(os.getenv("LOGIN_IP_RATE", "1"))
+# Exponential backoff after consecutive failures: base * 2^(failures - free), capped.
+# IPs get more free failures since many users can share one (NAT, campus networks).
+EMAIL_FREE_FAILURES = int(os.getenv("LOGIN_EMAIL_FREE_FAILURES", "3"))
+IP_FREE_FAILURES = int(os.getenv("LOGIN_IP_FREE_FAILURES", "20"))
+BACKOFF_BASE = float(os.getenv("LOGIN_BACKOFF_BASE", "1"))
+BACKOFF_MAX = float(os.getenv("LOGIN_BACKOFF_MAX", "900"))
+# Memory bound: at most this many tracked keys, idle ones are dropped first
+THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+THROTTLE_IDLE_SECONDS = float(os.getenv("LOGIN_THROTTLE_IDLE_SECONDS", "3600"))
+# Proxies (addresses or CIDRs) whose X-Forwarded-For is believed, e.g. the mobile
+# gateway; without this every user behind the gateway would share its IP's limits
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(net.strip(), strict=False)
+    for net in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if net.strip()
+]
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(f"Too many login attempts ({reason})")
+        self.retry_after = max(1, int(retry_after + 0.999))
+        self.reason = reason
+
+
+class _KeyState:
+    __slots__ = ("tokens", "updated", "failures", "blocked_until")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.failures = 0
+        self.blocked_until = 0.0
+
+
+class KeyedLimiter:
+    """Token bucket plus failure backoff for one key space (emails or IPs)."""
+
+    def __init__(self, name: str, burst: float, rate: float, free_failures: int,
+                 max_keys: int = THROTTLE_MAX_KEYS, idle_seconds: float = THROTTLE_IDLE_SECONDS):
+        self.name = name
+        self.burst = burst
+        self.rate = rate
+        self.free_failures = free_failures
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self._states: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _state(self, key: str, now: float) -> _KeyState:
+        state = self._states.get(key)
+        if state is None:
+            state = _KeyState(self.burst, now)
+            self._states[key] = state
+            self._evict(now)
+        else:
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+            state.updated = now
+            self._states.move_to_end(key)
+        return state
+
+    def _evict(self, now: float):
+        # Least recently used first; stop at the first key that is still active
+        states = self._states
+        while states:
+            oldest = next(iter(states.values()))
+            idle = now - oldest.updated > self.idle_seconds and oldest.blocked_until <= now
+            if not idle and len(states) <= self.max_keys:
+                break
+            states.popitem(last=False)
+            self.evicted += 1
+
+    def check(self, key: str, now: float) -> Optional[LoginThrottled]:
+        state = self._state(key, now)
+        if state.blocked_until > now:
+            return LoginThrottled(state.blocked_until - now, f"{self.name}_backoff")
+        if state.tokens < 1:
+            return LoginThrottled((1 - state.tokens) / self.rate, f"{self.name}_rate")
+        state.tokens -= 1
+        return None
+
+    def failure(self, key: str, now: float):
+        state = self._state(key, now)
+        state.failures += 1
+        if state.failures >= self.free_failures:
+            delay = BACKOFF_BASE * 2 ** min(32, state.failures - self.free_failures)
+            state.blocked_until = now + min(BACKOFF_MAX, delay)
+
+    def success(self, key: str):
+        state = self._states.get(key)
+        if state is not None:
+            state.failures = 0
+            state.blocked_until = 0.0
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in net for net in TRUSTED_PROXIES)
+
+
+def client_address(peer: Optional[str], forwarded_for: Optional[str]) -> Optional[str]:
+    """The address that reached the first trusted proxy.
+
+    X-Forwarded-For is read right to left and only while each hop is a trusted
+    proxy, so entries a client writes itself cannot choose its throttle key.
+    """
+    address = peer
+    if forwarded_for and address and _trusted(address):
+        for hop in reversed([h.strip() for h in forwarded_for.split(",") if h.strip()]):
+            address = hop
+            if not _trusted(hop):
+                break
+    return address
+
+
+class LoginThrottle:
+    """Rejects abusive login attempts before any DB query or bcrypt work."""
+
+    def __init__(self):
+        self.emails = KeyedLimiter("email", EMAIL_BURST, EMAIL_RATE, EMAIL_FREE_FAILURES)
+        self.ips = KeyedLimiter("ip", IP_BURST, IP_RATE, IP_FREE_FAILURES)
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejections = {}
+
+    @staticmethod
+    def normalise(email: str) -> str:
+        return email.strip().lower()
+
+    def check(self, email: str, ip: Optional[str]):
+        """Raise LoginThrottled if this attempt must be rejected."""
+        now = time.monotonic()
+        with self._lock:
+            rejection = self.ips.check(ip or "unknown", now) or self.emails.check(self.normalise(email), now)
+            if rejection is not None:
+                self.rejections[rejection.reason] = self.rejections.get(rejection.reason, 0) + 1
+                raise rejection
+            self.allowed += 1
+
+    def record_failure(self, email: str, ip: Optional[str]):
+        now = time.monotonic()
+        with self._lock:
+            self.emails.failure(self.normalise(email), now)
+            self.ips.failure(ip or "unknown", now)
+
+    def record_success(self, email: str, ip: Optional[str]):
+        with self._lock:
+            self.emails.success(self.normalise(email))
+            self.ips.success(ip or "unknown")
+
+    def stats(self) -> dict:
+        return {
+            "allowed": self.allowed,
+            "rejected": sum(self.rejections.values()),
+            "rejections": dict(self.rejections),
+            "tracked_emails": len(self.emails),
+            "tracked_ips": len(self.ips),
+            "evicted": self.emails.evicted + self.ips.evicted,
+        }
+
+
+login_throttle = LoginThrottle()
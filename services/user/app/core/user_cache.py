@@ -0,0 +1,125 @@
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from common.metrics import registry
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "50000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+# Kept short: another replica may register the email meanwhile
+USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", "10"))
+
+
+class CachedUser(NamedTuple):
+    """The columns login and register need, instead of a hydrated ORM object."""
+    id: int
+    email: str
+    password_hash: str
+
+
+class _Entry:
+    __slots__ = ("queried", "user", "expires")
+
+    def __init__(self, queried: str, user: Optional[CachedUser], expires: float):
+        self.queried = queried
+        self.user = user
+        self.expires = expires
+
+
+# Returned by get() when the cache cannot answer and the DB must be asked
+MISS = object()
+
+
+class UserCache:
+    """Bounded LRU/TTL cache of user credentials by normalised email.
+
+    Unknown emails are cached too (as None), for a shorter TTL. An entry only
+    answers for the exact email string it was filled with: whether "A@x" and
+    "a@x" are one user is up to the DB collation, so case variants go to the DB.
+    Writes go through `store` / `invalidate`; a DB read that overlapped a write
+    is not cached, so it cannot put back a value from before that write.
+    """
+
+    def __init__(self, max_entries: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL,
+                 negative_ttl: float = USER_CACHE_NEGATIVE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.writes = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def normalise(email: str) -> str:
+        return email.strip().lower()
+
+    def get(self, email: str):
+        """The cached user, None if the email is known not to exist, or MISS."""
+        key = self.normalise(email)
+        entry = self._entries.get(key)
+        if entry is None or entry.queried != email or entry.expires <= time.monotonic():
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        if entry.user is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry.user
+
+    def fill(self, email: str, user: Optional[CachedUser], since_writes: int):
+        """Cache a DB read that started when `writes` was `since_writes`."""
+        if self.writes == since_writes:
+            self._put(email, user)
+
+    def store(self, user: CachedUser, email: Optional[str] = None):
+        """Write-through after the row was created or changed."""
+        self.writes += 1
+        self._put(email or user.email, user)
+
+    def invalidate(self, email: str):
+        self.writes += 1
+        self._entries.pop(self.normalise(email), None)
+
+    def clear(self):
+        self.writes += 1
+        self._entries.clear()
+
+    def _put(self, email: str, user: Optional[CachedUser]):
+        key = self.normalise(email)
+        ttl = self.ttl if user is not None else self.negative_ttl
+        self._entries[key] = _Entry(email, user, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    def register_metrics(self):
+        registry.counter(
+            "user_cache_lookups_total", "User credential cache lookups by outcome", ("outcome",),
+            function=lambda: {("hit",): self.hits, ("negative_hit",): self.negative_hits, ("miss",): self.misses},
+        )
+        registry.gauge("user_cache_size", "Entries in the user credential cache", function=lambda: {(): len(self._entries)})
+
+
+user_cache = UserCache()
+user_cache.register_metrics()
@@ -1,33 +1,112 @@
 import os
-from fastapi import FastAPI, Depends
-from fastapi.staticfiles import StaticFiles
+import time
+import asyncio
+from fastapi import FastAPI, Depends, Request, HTTPException
+from fastapi.responses import JSONResponse
 from app.routes import user
-from app.core.database import init_db
-from app.core.logger import logger
+from app.core.database import engine
+from app.core.hashing import hash_pool, HashPoolSaturated
+from app.core.startup import readiness, start_until_ready
+from app.core.throttle import login_throttle, LoginThrottled
+from app.core.user_cache import user_cache
+from app.core.static_cache import frontend_assets, FRONTEND_DIRECTORY
+from app.core.logger import logger, access_logger, access_log_sampler
+from common.logging_setup import logging_stats
+from common.metrics import MetricsMiddleware, registry as metrics_registry
 
 app = FastAPI()
+# Route latency, status codes and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
+@app.middleware("http")
+async def log_requests(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    path = request.url.path
+    if access_log_sampler.should_log(path):
+        access_logger.info(
+            "%s %s %s", request.method, path, response.status_code,
+            extra={
+                "method": request.method,
+                "path": path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "sample_rate": access_log_sampler.rate_for(path),
+            }
+        )
+    return response
+
+startup_task = None
 
 @app.on_event("startup")
-def on_startup():
-    try:
-        # Initialize DB (create tables)
-        init_db()
-        logger.info("Database tables created successfully.")
-    except Exception as e:
-        logger.error(f"Error creating tables: {str(e)}")
+async def on_startup():
+    # Schema check and warm-up run in the background; /ready reports when they are done
+    global startup_task
+    startup_task = asyncio.create_task(start_until_ready())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    if startup_task is not None:
+        startup_task.cancel()
+    hash_pool.shutdown()
+    await engine.dispose()
+
+@app.exception_handler(HashPoolSaturated)
+async def hash_pool_saturated_handler(request: Request, exc: HashPoolSaturated):
+    logger.warning("Rejected %s: password hashing queue is full", request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(LoginThrottled)
+async def login_throttled_handler(request: Request, exc: LoginThrottled):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many login attempts, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    """Readiness probe: 200 once the schema is checked and pools, crypto and assets are warm"""
+    return JSONResponse(readiness.report(), status_code=200 if readiness.ready else 503)
+
+@app.get("/metrics/login-throttle")
+def login_throttle_metrics():
+    return login_throttle.stats()
+
+@app.get("/metrics/user-cache")
+def user_cache_metrics():
+    return user_cache.stats()
+
+@app.get("/metrics/hashing")
+def hashing_metrics():
+    return hash_pool.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_registry.response()
+
+@app.get("/metrics/logging")
+def logging_metrics():
+    return {**logging_stats(), "access_log_sampled_out": access_log_sampler.sampled_out}
 
 # Use production database in normal operation
 app.include_router(user.router, prefix="/users", tags=["users"])
 
-# Serve static files from the frontend directory
-frontend_directory = os.path.join(os.path.dirname(__file__), "frontend")
-
-if not os.path.exists(frontend_directory):
-    raise RuntimeError(f"Directory '{frontend_directory}' does not exist")
+# Serve static files from the frontend directory, held in memory
+if not os.path.exists(FRONTEND_DIRECTORY):
+    raise RuntimeError(f"Directory '{FRONTEND_DIRECTORY}' does not exist")
 
-app.mount("/static", StaticFiles(directory=frontend_directory), name="static")
+@app.get("/static/{path:path}", name="static")
+def serve_static(path: str, request: Request):
+    response = frontend_assets.response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 @app.get("/")
-def serve_index():
-    with open(os.path.join(frontend_directory, "index.html")) as f:
-        return f.read()
+def serve_index(request: Request):
+    return frontend_assets.response(request, "index.html")
@@ -1,69 +1,128 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import SessionLocal
 from app.models.user import User
-from app.core.auth import hash_password, verify_password, create_jwt
-from pydantic import BaseModel
-import os
+from app.core.auth import create_jwt, require_user, require_bulk_import_admin, token_verifier
+from common.jwt_auth import bearer_token
+from app.core.hashing import hash_pool
+from app.core.throttle import client_address, login_throttle
+from app.core.bulk_import import BulkImporter, FORMATS, iter_lines, parse_records
+from app.models.schemas import UserCreate, UserLogin
+from app.core.static_cache import frontend_assets
+from app.core.user_cache import user_cache, CachedUser, MISS
 from app.core.logger import logger
 
 router = APIRouter()
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-class UserCreate(BaseModel):
-    email: str
-    password: str
-    full_name: str
+@router.get("/register", response_class=HTMLResponse)
+def serve_register_page(request: Request):
+    return frontend_assets.response(request, "register.html")
 
-class UserLogin(BaseModel):
-    email: str
-    password: str
+async def find_user(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-@router.get("/register", response_class=HTMLResponse)
-def serve_register_page():
-    frontend_directory = os.path.join(os.path.dirname(__file__), "..", "frontend")
-    with open(os.path.join(frontend_directory, "register.html")) as f:
-        return HTMLResponse(content=f.read(), status_code=200)
+async def find_credentials(db: AsyncSession, email: str) -> Optional[CachedUser]:
+    """id, email and password hash for `email` (None if unknown), from the cache when possible"""
+    cached = user_cache.get(email)
+    if cached is not MISS:
+        return cached
+    writes = user_cache.writes
+    result = await db.execute(select(User.id, User.email, User.password_hash).where(User.email == email))
+    row = result.first()
+    found = CachedUser(*row) if row else None
+    user_cache.fill(email, found, writes)
+    return found
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user.email).first():
-        logger.warning(f"Failed register attempt for {user.email}")
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    if await find_credentials(db, user.email):
+        logger.warning("Failed register attempt for %s", user.email)
         raise HTTPException(status_code=400, detail="Email already registered")
         
     new_user = User(
         email=user.email,
-        password_hash=hash_password(user.password),
+        password_hash=await hash_pool.hash_password(user.password),
         full_name=user.full_name
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    logger.info(f"User {user.email} registered successfully")
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration of the same email
+        await db.rollback()
+        user_cache.invalidate(user.email)
+        logger.warning("Failed register attempt for %s", user.email)
+        raise HTTPException(status_code=400, detail="Email already registered")
+    user_cache.store(CachedUser(new_user.id, new_user.email, new_user.password_hash))
+    logger.info("User %s registered successfully", user.email)
     return {"message": "User created successfully"}
 
 @router.get("/login", response_class=HTMLResponse)
-def serve_login_page():
-    frontend_directory = os.path.join(os.path.dirname(__file__), "..", "frontend")
-    with open(os.path.join(frontend_directory, "login.html")) as f:
-        return HTMLResponse(content=f.read(), status_code=200)
+def serve_login_page(request: Request):
+    return frontend_assets.response(request, "login.html")
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.password_hash):
-        logger.warning(f"Failed login attempt for {user.email}")
+async def login(user: UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
+    client_ip = client_address(request.client.host if request.client else None, request.headers.get("x-forwarded-for"))
+    # Throttled attempts are rejected before any DB or bcrypt work
+    login_throttle.check(user.email, client_ip)
+
+    db_user = await find_credentials(db, user.email)
+    new_hash = None
+    if db_user:
+        valid, new_hash = await hash_pool.verify_and_update(user.password, db_user.password_hash)
+    else:
+        # Same bcrypt cost for unknown emails so response timing doesn't reveal them
+        valid = await hash_pool.dummy_verify(user.password)
+    if not valid:
+        login_throttle.record_failure(user.email, client_ip)
+        logger.warning("Failed login attempt for %s", user.email)
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    logger.info(f"User {user.email} logged in successfully")
+    login_throttle.record_success(user.email, client_ip)
+    if new_hash:
+        # Stored hash predates the current bcrypt cost: upgrade it while we have the password
+        await db.execute(update(User).where(User.id == db_user.id).values(password_hash=new_hash))
+        await db.commit()
+        user_cache.store(db_user._replace(password_hash=new_hash), user.email)
+        logger.info("Rehashed password for %s with the current bcrypt cost", user.email)
+    logger.info("User %s logged in successfully", user.email)
     token = create_jwt({"sub": db_user.email})
-    return {"message": "Login successful", "token": token}
\ No newline at end of file
+    return {"message": "Login successful", "token": token}
+
+@router.get("/me")
+async def read_current_user(claims: dict = Depends(require_user), db: AsyncSession = Depends(get_db)):
+    db_user = await find_user(db, claims["sub"])
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"id": db_user.id, "email": db_user.email, "full_name": db_user.full_name}
+
+@router.post("/logout")
+async def logout(claims: dict = Depends(require_user), authorization: Optional[str] = Header(None)):
+    token_verifier.revoke(bearer_token(authorization))
+    logger.info("User %s logged out", claims['sub'])
+    return {"message": "Logout successful"}
+
+@router.post("/bulk")
+async def bulk_register(request: Request, format: Optional[str] = None,
+                        claims: dict = Depends(require_bulk_import_admin)):
+    """Register many users from a CSV (email,password,full_name header) or NDJSON body; admins only"""
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, expected one of {', '.join(FORMATS)}")
+
+    logger.info("Bulk import started by %s", claims["sub"])
+    importer = BulkImporter(SessionLocal, hash_pool)
+    return await importer.run(parse_records(iter_lines(request.stream()), fmt))
@@ -0,0 +1,21 @@
+import os
+import sys
+import asyncio
+from pathlib import Path
+
+# Run the suite against in-memory SQLite unless a database is configured
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("BULK_IMPORT_ADMINS", "admin@example.com")
+
+# Add the root project directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.database import create_tables, engine
+from app.core.hashing import hash_pool
+
+asyncio.run(create_tables(engine))
+
+def pytest_sessionfinish(session, exitstatus):
+    # Release the pooled connections so their worker threads don't keep the run alive
+    hash_pool.shutdown()
+    asyncio.run(engine.dispose())
@@ -0,0 +1,40 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+# Add the root project directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.hashing import HashPool, HashPoolSaturated
+
+def test_hash_pool_rejects_when_queue_is_full():
+    pool = HashPool(workers=1, queue_size=1)
+
+    async def burst():
+        return await asyncio.gather(
+            *(pool.run(time.sleep, 0.2) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        pool.shutdown()
+
+    rejected = [r for r in results if isinstance(r, HashPoolSaturated)]
+    assert len(rejected) == 1
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["completed"] == 2
+
+def test_hash_pool_round_trip():
+    pool = HashPool(workers=1, queue_size=0)
+
+    async def round_trip():
+        hashed = await pool.hash_password("secret")
+        return await pool.verify_password("secret", hashed), await pool.verify_password("wrong", hashed)
+
+    try:
+        assert asyncio.run(round_trip()) == (True, False)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+# Add the root project directory to the system path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.throttle import KeyedLimiter, LoginThrottled, client_address
+
+def test_token_bucket_refills():
+    limiter = KeyedLimiter("email", burst=2, rate=1, free_failures=100)
+    assert limiter.check("a", 0.0) is None
+    assert limiter.check("a", 0.0) is None
+    rejection = limiter.check("a", 0.0)
+    assert isinstance(rejection, LoginThrottled) and rejection.reason == "email_rate"
+    assert limiter.check("a", 1.0) is None
+
+def test_backoff_doubles_after_free_failures():
+    limiter = KeyedLimiter("email", burst=100, rate=1, free_failures=2)
+    limiter.failure("a", 0.0)
+    assert limiter.check("a", 0.0) is None
+    limiter.failure("a", 0.0)
+    assert limiter.check("a", 0.5).reason == "email_backoff"
+    assert limiter.check("a", 1.0) is None
+    limiter.failure("a", 1.0)
+    assert limiter.check("a", 2.5).retry_after == 1
+    limiter.success("a")
+    assert limiter.check("a", 2.5) is None
+
+def test_idle_and_excess_keys_are_evicted():
+    limiter = KeyedLimiter("ip", burst=5, rate=1, free_failures=5, max_keys=3, idle_seconds=10)
+    for i in range(5):
+        limiter.check(f"ip{i}", 0.0)
+    assert len(limiter) == 3
+    limiter.check("late", 100.0)
+    assert len(limiter) == 1
+
+def test_client_address_trusts_forwarded_for_only_from_proxies():
+    assert client_address("127.0.0.1", "6.6.6.6, 10.0.0.5") == "10.0.0.5"
+    assert client_address("127.0.0.1", "10.0.0.5, 127.0.0.1") == "10.0.0.5"
+    assert client_address("10.0.0.9", "6.6.6.6") == "10.0.0.9"
+    assert client_address("127.0.0.1", None) == "127.0.0.1"
@@ -6,6 +6,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from app.main import app
+from app.core.auth import create_jwt
 from fastapi.testclient import TestClient
 
 client = TestClient(app)
@@ -26,3 +27,166 @@ def test_login():
     })
     assert response.status_code == 200
     assert "token" in response.json()
+
+def test_bulk_register_reports_conflicts():
+    body = "\n".join([
+        "email,password,full_name",
+        "bulk1@example.com,pw1,Bulk One",
+        'bulk2@example.com,pw2,"Bulk',
+        'Two"',
+        "bulk1@example.com,pw3,Duplicate",
+        "luka8@example.com,pw4,Already Registered",
+        "not-enough-columns",
+    ])
+    response = client.post("/users/bulk", content=body, headers={"content-type": "text/csv"})
+    assert response.status_code == 401
+    user_token = client.post("/users/login", json={"email": "luka8@example.com", "password": "testpass123"}).json()["token"]
+    response = client.post("/users/bulk", content=body, headers={"content-type": "text/csv",
+                                                                 "Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+
+    admin_token = create_jwt({"sub": "admin@example.com"})
+    response = client.post("/users/bulk", content=body, headers={"content-type": "text/csv",
+                                                                 "Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    report = response.json()
+    assert report["total"] == 5
+    assert report["inserted"] == 2
+    assert [c["line"] for c in report["conflicts"]] == [5, 6]
+    assert [e["line"] for e in report["errors"]] == [7]
+
+    response = client.post("/users/login", json={"email": "bulk2@example.com", "password": "pw2"})
+    assert response.status_code == 200
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {response.json()['token']}"})
+    assert me.json()["full_name"] == "Bulk\nTwo"
+
+def test_bulk_register_reports_undecodable_lines():
+    body = "\n".join([
+        "email,password,full_name",
+        "latin1@example.com,pw1,Zo\u00eb",
+        "utf8@example.com,pw2,Zo\u00eb",
+    ]).encode("utf-8").replace("Zo\u00eb".encode("utf-8"), "Zo\u00eb".encode("latin-1"), 1)
+    admin_token = create_jwt({"sub": "admin@example.com"})
+    response = client.post("/users/bulk", content=body, headers={"content-type": "text/csv",
+                                                                 "Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 1
+    assert report["errors"] == [{"line": 2, "error": "Invalid record: not valid UTF-8"}]
+
+def test_me_and_logout():
+    token = client.post("/users/login", json={
+        "email": "luka8@example.com",
+        "password": "testpass123"
+    }).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "luka8@example.com"
+
+    assert client.post("/users/logout", headers=headers).status_code == 200
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.get("/users/me").status_code == 401
+
+def test_login_rehashes_outdated_cost():
+    import asyncio
+    from passlib.hash import bcrypt
+    from sqlalchemy import select, update
+    from app.core.auth import bcrypt_rounds
+    from app.core.database import SessionLocal
+    from app.core.hashing import hash_pool
+    from app.core.user_cache import user_cache
+    from app.models.user import User
+
+    async def stored_hash():
+        async with SessionLocal() as db:
+            return (await db.execute(select(User.password_hash).where(User.email == "luka8@example.com"))).scalar_one()
+
+    async def store_hash(password_hash: str):
+        async with SessionLocal() as db:
+            await db.execute(update(User).where(User.email == "luka8@example.com").values(password_hash=password_hash))
+            await db.commit()
+        user_cache.clear()
+
+    def login():
+        return client.post("/users/login", json={"email": "luka8@example.com", "password": "testpass123"})
+
+    original = bcrypt_rounds()
+    asyncio.run(store_hash(bcrypt.using(rounds=original - 2).hash("testpass123")))
+    assert login().status_code == 200
+    assert asyncio.run(stored_hash()).startswith(f"$2b${original}$")
+
+    # A hash stronger than the configured cost is never downgraded
+    hash_pool.set_rounds(original - 2)
+    try:
+        assert login().status_code == 200
+        assert asyncio.run(stored_hash()).startswith(f"$2b${original}$")
+    finally:
+        hash_pool.set_rounds(original)
+
+def test_pages_served_from_memory_with_etag():
+    response = client.get("/users/login", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "<" in response.text
+
+    etag = response.headers["etag"]
+    response = client.get("/users/login", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+
+    assert client.get("/static/register.html").status_code == 200
+    assert client.get("/static/missing.html").status_code == 404
+
+def test_metrics_exposition():
+    client.get("/users/login")
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/users/login",status="200"}' in body
+    assert 'bcrypt_duration_seconds_count{operation="hash_password"}' in body
+    assert "db_pool_checkout_duration_seconds_bucket" in body
+
+def test_user_cache_negative_entry_replaced_on_register():
+    from app.core.user_cache import user_cache
+
+    credentials = {"email": "cached@example.com", "password": "pw"}
+    assert client.post("/users/login", json=credentials).status_code == 401
+    assert user_cache.get("cached@example.com") is None
+
+    response = client.post("/users/register", json={**credentials, "full_name": "Cached"})
+    assert response.status_code == 200
+    misses = user_cache.misses
+    assert client.post("/users/login", json=credentials).status_code == 200
+    assert client.post("/users/register", json={**credentials, "full_name": "Again"}).status_code == 400
+    assert user_cache.misses == misses
+    assert client.get("/metrics/user-cache").json()["hit_ratio"] > 0
+
+def test_ready_after_startup_steps():
+    import asyncio
+    from app.core.database import SCHEMA_VERSION, engine, stored_schema_version
+    from app.core.startup import readiness, run_startup
+
+    if not readiness.ready:
+        assert client.get("/ready").status_code == 503
+        asyncio.run(run_startup())
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert set(response.json()["steps"]) == {"schema", "db_pool", "crypto", "static"}
+    assert asyncio.run(stored_schema_version(engine)) == SCHEMA_VERSION
+
+def test_schema_version_is_none_only_without_a_version_table():
+    import asyncio
+    import pytest
+    from sqlalchemy.exc import DBAPIError
+    from app.core.database import build_engine, stored_schema_version
+
+    async def version_of(url):
+        bind = build_engine(url)
+        try:
+            return await stored_schema_version(bind)
+        finally:
+            await bind.dispose()
+
+    assert asyncio.run(version_of("sqlite+aiosqlite:///:memory:")) is None
+    with pytest.raises(DBAPIError):
+        asyncio.run(version_of("sqlite+aiosqlite:////nonexistent-dir/users.db"))